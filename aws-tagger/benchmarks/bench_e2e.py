@@ -0,0 +1,192 @@
+"""
+End-to-end load harness: runs `cli.tag_resources` against the local fake AWS endpoint.
+
+Generates a synthetic Wiz export, starts `benchmarks.fake_aws` in a separate process, so that
+it does not compete with the tool for the interpreter, and tags every resource through it
+with `--endpoint-url`, so concurrency, batching and rate limiting changes can be measured
+offline. Reports:
+    - ARNs tagged per second, end to end (parsing included)
+    - p50/p90/p99 latency of the API calls, as seen by the clients (botocore retries included)
+    - API calls, HTTP requests, throttled responses and retried requests
+
+Usage (from the aws-tagger directory):
+    python -m benchmarks.bench_e2e --rows 20000 --workers 32 --latency 30
+    python -m benchmarks.bench_e2e --rows 20000 --workers 32 --rate 200 --service ec2:rate=20 --output e2e.json
+    python -m benchmarks.bench_e2e --rows 20000 --executor async --workers 500 --bulk --throttle 0.02
+    python -m benchmarks.bench_e2e --rows 100000 --workers 256 --processes 8
+
+With --processes, the calls are sent by the worker processes, whose clients the harness does not
+see: the latencies are then missing, and the calls are those counted by the endpoint.
+"""
+import argparse
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from benchmarks.corpus import generate_wiz_csv, parse_mix, tag_list
+from benchmarks.fake_aws import STATS_PATH, add_profile_arguments
+
+DEFAULT_MIX = "ec2=4,lambda=3,s3=1,rds=2"
+
+
+class CallRecorder:
+    """Measures the latency of every API call sent by the clients, through botocore events."""
+
+    def __init__(self):
+        self.latencies = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def register(self, session) -> None:
+        session.events.register("before-call", self.before_call)
+        session.events.register("after-call", self.after_call)
+        session.events.register("after-call-error", self.after_call)
+
+    def before_call(self, context: dict, **kwargs) -> None:
+        context["bench_started"] = time.perf_counter()
+
+    def after_call(self, context: dict, **kwargs) -> None:
+        started = context.pop("bench_started", None)
+        if started is not None:
+            with self._lock:
+                self.calls += 1
+                self.latencies.append(time.perf_counter() - started)
+
+    def percentile(self, share: float) -> float:
+        """Returns a latency percentile in milliseconds (share between 0 and 1)."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(share * len(ordered)))] * 1000
+
+
+@contextlib.contextmanager
+def fake_endpoint(args):
+    """Runs the fake endpoint in a child process with the profile options, and yields its URL."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    profile_options = [
+        "--latency", str(args.latency), "--jitter", str(args.jitter), "--rate", str(args.rate),
+        "--throttle", str(args.throttle), "--error", str(args.error), "--fault", str(args.fault),
+    ]
+    for spec in args.service:
+        profile_options += ["--service", spec]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_aws", "--port", str(port), *profile_options],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def endpoint_stats(url: str) -> dict:
+    with urllib.request.urlopen(url + STATS_PATH) as response:
+        return json.load(response)
+
+
+def run(args) -> dict:
+    # The fake endpoint does not check signatures, but the clients need credentials to sign.
+    os.environ.update({
+        "AWS_ACCESS_KEY_ID": "testing", "AWS_SECRET_ACCESS_KEY": "testing", "AWS_DEFAULT_REGION": "us-east-1",
+        "AWS_EC2_METADATA_DISABLED": "true",
+    })
+    os.environ.pop("AWS_PROFILE", None)
+
+    # Imported after the environment is set up, as a tool run would be.
+    from cli import tag_resources
+    from utils.clients import ClientFactory
+
+    recorder = CallRecorder()
+    recorder.register(ClientFactory.session())
+
+    with tempfile.TemporaryDirectory() as directory, fake_endpoint(args) as url:
+        ClientFactory.configure(endpoint_url=url, max_attempts=args.max_attempts)
+        input_file = os.path.join(directory, "wiz.csv")
+        tags_file = os.path.join(directory, "tags.json")
+        generate_wiz_csv(input_file, args.rows, args.columns, parse_mix(args.mix))
+        with open(tags_file, "w") as file:
+            json.dump(tag_list(args.tags), file)
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull if args.quiet else sys.stdout):
+            start = time.perf_counter()
+            tag_resources(
+                input_file, tags_file, "wiz", workers=args.workers, executor_type=args.executor, bulk=args.bulk,
+                initial_rate=args.initial_rate, max_rate=args.max_rate, journal_dir=directory,
+                max_per_service_region=args.max_per_service_region, processes=args.processes,
+            )
+            elapsed = time.perf_counter() - start
+        stats = endpoint_stats(url)
+
+    return {
+        "rows": args.rows,
+        "seconds": elapsed,
+        "arns_per_s": args.rows / elapsed,
+        "api_calls": recorder.calls or sum(stats["operations"].values()),
+        "latency_ms": {
+            "p50": recorder.percentile(0.50), "p90": recorder.percentile(0.90), "p99": recorder.percentile(0.99),
+        },
+        "http_requests": stats["requests"],
+        "throttled": stats["outcomes"].get("throttled", 0),
+        "retried_requests": stats["retries"],
+        "outcomes": stats["outcomes"],
+        "operations": stats["operations"],
+        "settings": {
+            "workers": args.workers, "executor": args.executor, "processes": args.processes, "bulk": args.bulk,
+            "mix": args.mix,
+            "latency": args.latency, "rate": args.rate, "throttle": args.throttle, "error": args.error,
+            "fault": args.fault, "services": args.service,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Service mix of the generated resources (see corpus.py).")
+    parser.add_argument("--tags", type=int, default=5, help="Number of tags applied to every resource.")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--executor", default=None, help="sequential, threads, async or processes.")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes of the processes executor.")
+    parser.add_argument("--max-per-service-region", type=int, default=None)
+    parser.add_argument("--bulk", action="store_true", help="Tag through the Resource Groups Tagging API.")
+    parser.add_argument("--initial-rate", type=float, default=None)
+    parser.add_argument("--max-rate", type=float, default=None)
+    parser.add_argument("--max-attempts", type=int, default=None, help="botocore attempts per call.")
+    parser.add_argument("--verbose", dest="quiet", action="store_false", help="Show the output of the tool.")
+    parser.add_argument("--output", help="Path of the JSON file the results are written to.")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"{results['rows']} ARNs in {results['seconds']:.2f}s: {results['arns_per_s']:,.0f} ARNs/s")
+    latency = results["latency_ms"]
+    print(f"{results['api_calls']} API calls, latency p50 {latency['p50']:.1f} ms, p90 {latency['p90']:.1f} ms, "
+          f"p99 {latency['p99']:.1f} ms")
+    print(f"{results['http_requests']} HTTP requests, {results['throttled']} throttled, "
+          f"{results['retried_requests']} retried, outcomes {results['outcomes']}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Startup benchmark: import time of the CLI, measured with `python -X importtime`.
+
+Reports the cumulative import time of each module (best of several fresh interpreters),
+the heaviest top-level packages it pulls in, and the wall time of `main.py --help`.
+It fails with exit code 1 when a module exceeds `--max-ms`, or when importing it pulls in
+a package listed in `--forbid`, so it can guard against slow imports creeping back.
+
+Usage (from the aws-tagger directory):
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --max-ms 150 --forbid boto3 botocore tqdm
+"""
+import argparse
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+DEFAULT_MODULES = ["cli", "main"]
+DEFAULT_FORBIDDEN = ["boto3", "botocore", "tqdm", "taggers.ec2_tagger", "daemon", "executors.async_executor"]
+
+
+def import_times(module: str) -> dict:
+    """
+    Imports a module in a fresh interpreter and returns the import time of every module loaded.
+
+    Returns:
+        dict: Maps each imported module name to its (self, cumulative) import time in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def heaviest_packages(times: dict, count: int) -> list:
+    """Returns the `count` top-level packages with the highest total self import time."""
+    totals = defaultdict(int)
+    for name, (own, _) in times.items():
+        totals[name.split(".")[0]] += own
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def help_wall_time(repeat: int) -> float:
+    """Returns the best wall time in seconds of `python main.py --help`."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", "--help"], capture_output=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail when a module takes longer to import.")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="Fail when importing a module pulls in one of these modules.")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda times: times[module][1])
+        total_ms = best[module][1] / 1000
+        print(f"import {module}: {total_ms:.1f} ms ({len(best)} modules)")
+        for package, own in heaviest_packages(best, args.top):
+            print(f"  {package:<24} {own / 1000:8.1f} ms")
+
+        if args.max_ms is not None and total_ms > args.max_ms:
+            failures.append(f"import {module} took {total_ms:.1f} ms, more than {args.max_ms} ms")
+        for forbidden in args.forbid or []:
+            if forbidden in best:
+                failures.append(f"import {module} imports {forbidden}")
+
+    print(f"main.py --help: {help_wall_time(args.repeat) * 1000:.0f} ms wall time")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
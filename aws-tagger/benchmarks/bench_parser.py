@@ -0,0 +1,72 @@
+"""
+Parse benchmark for CSVWizParser on a synthetic wide Wiz export.
+
+Compares the rows per second of the current parser ("after") with the previous
+implementation, which built a csv.DictReader dict per row and scanned every column
+header for each of its five fields ("before").
+
+Usage (from the aws-tagger directory):
+    python -m benchmarks.bench_parser --rows 200000 --columns 60
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import generate_wiz_csv
+from parsers.csv_wiz_parser import CSVWizParser
+
+
+def legacy_parse(file_path: str) -> list:
+    """The DictReader-based implementation of CSVWizParser.parse, kept as the baseline."""
+    def get_column_value(row: dict, suffix: str) -> str:
+        column_name = next((col for col in row if col.endswith(suffix)), None)
+        if not column_name:
+            raise KeyError(f"Column ending with '{suffix}' not found in row: {row}")
+        return row[column_name]
+
+    fix_arn = CSVWizParser._CSVWizParser__fix_arn
+    resources = []
+    with open(file_path, "r") as file:
+        for row in csv.DictReader(file):
+            resources.append(fix_arn(
+                get_column_value(row, "providerUniqueId"), get_column_value(row, "region"),
+                get_column_value(row, "nativeType"), get_column_value(row, "Name"),
+                get_column_value(row, "subscriptionExternalId"),
+            ))
+    return resources
+
+
+def measure(parse: callable, path: str, repeat: int) -> float:
+    """Returns the best rows per second of `repeat` runs of `parse`."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(parse(path))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return rows / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "wiz.csv")
+        generate_wiz_csv(path, args.rows, args.columns)
+        before = measure(legacy_parse, path, args.repeat)
+        after = measure(CSVWizParser.parse, path, args.repeat)
+
+    print(f"{args.rows} rows, {args.columns} columns")
+    print(f"before (DictReader + suffix scan per row): {before:,.0f} rows/s")
+    print(f"after  (header-resolved positions):        {after:,.0f} rows/s")
+    print(f"speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Microbenchmark suite for the hot paths of a tagging run: parsing, ARN handling and tag formatting.
+
+Measures, on synthetic inputs from `benchmarks.corpus`:
+    - parse.rows_per_s:        CSVWizParser.parse on a generated Wiz export
+    - parse_columns.rows_per_s: CSVWizParser.parse_columns on the same export
+    - fix_arn.rows_per_s:      CSVWizParser.__fix_arn on rows covering every resource type it rewrites
+    - arn.parse_cold_per_s:    AWSArnParser.parse on distinct ARNs, with an empty cache
+    - arn.parse_cached_per_s:  AWSArnParser.parse on ARNs already in the cache
+    - arn.parse_arn_per_s:     AWSArnParser.parse_arn (regular expression, no cache)
+    - arn.resource_id_per_s:   resource ID of freshly parsed ARNs
+    - arn.split_columns_per_s: ArnColumns.split on the ARN corpus
+    - batch.per_arn_per_s:     batch_resources on the ARN corpus, parsing every ARN with an empty cache
+    - batch.columnar_per_s:    ArnColumns.split and ArnColumns.batches on the ARN corpus
+    - tags.<function>_per_s:   adapt_tags, adapt_ecs_tags and adapt_autoscaling_tags calls per second
+
+Each measure is the best of `--repeat` runs. Results are written as JSON with the commit they
+were measured on, and `--compare` prints the change against a previous results file.
+
+Usage (from the aws-tagger directory):
+    python -m benchmarks.bench_suite --rows 200000 --output results.json
+    python -m benchmarks.bench_suite --rows 200000 --mix ec2=5,s3=1,key-pair=1 --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+from benchmarks.corpus import DEFAULT_MIX, arn_corpus, generate_rows, generate_wiz_csv, parse_mix, tag_list
+from parsers.csv_wiz_parser import CSVWizParser
+from taggers.registry import TaggerRegistry
+from utils.arn_columns import ArnColumns
+from utils.arn_parser import AWSArnParser, _parse_cached
+from utils.batching import batch_resources
+from utils.tag_formatter import adapt_autoscaling_tags, adapt_ecs_tags, adapt_tags
+
+
+def best_rate(run: callable, items: int, repeat: int, setup: callable = None) -> float:
+    """
+    Returns the best number of items per second of `repeat` runs.
+
+    Args:
+        run (callable): Processes `items` items.
+        items (int): The number of items processed by a run.
+        repeat (int): The number of runs.
+        setup (callable): Called before every run, outside of the timing.
+    """
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return items / best
+
+
+def bench_parse(rows: int, columns: int, mix: dict, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "wiz.csv")
+        generate_wiz_csv(path, rows, columns, mix)
+        return {
+            "parse.rows_per_s": best_rate(lambda: CSVWizParser.parse(path), rows, repeat,
+                                          setup=_parse_cached.cache_clear),
+            "parse_columns.rows_per_s": best_rate(lambda: CSVWizParser().parse_columns(path), rows, repeat,
+                                                  setup=_parse_cached.cache_clear),
+        }
+
+
+def bench_arns(count: int, mix: dict, repeat: int) -> dict:
+    rows = list(generate_rows(count, mix))
+    arns = arn_corpus(count, mix)
+    fix_arn = CSVWizParser._CSVWizParser__fix_arn
+
+    def fix_all():
+        for fields in rows:
+            fix_arn(*fields)
+
+    def parse_all():
+        for arn in arns:
+            AWSArnParser.parse(arn)
+
+    def parse_arn_all():
+        for arn in arns:
+            AWSArnParser.parse_arn(arn)
+
+    def resource_ids():
+        for arn in arns:
+            AWSArnParser.parse(arn).resource_id
+
+    def batch_per_arn():
+        for _ in batch_resources(arns, TaggerRegistry.get_batch_size):
+            pass
+
+    def batch_columnar():
+        for _ in ArnColumns.split(arns).batches(TaggerRegistry.get_batch_size):
+            pass
+
+    cold = best_rate(parse_all, count, repeat, setup=_parse_cached.cache_clear)
+    # The cache is bounded, so the cached measure only uses as many ARNs as it holds.
+    cached_arns = arns[:AWSArnParser.CACHE_SIZE]
+
+    def parse_cached():
+        for arn in cached_arns:
+            AWSArnParser.parse(arn)
+
+    return {
+        "fix_arn.rows_per_s": best_rate(fix_all, count, repeat, setup=_parse_cached.cache_clear),
+        "arn.parse_cold_per_s": cold,
+        "arn.parse_cached_per_s": best_rate(parse_cached, len(cached_arns), repeat, setup=parse_cached),
+        "arn.parse_arn_per_s": best_rate(parse_arn_all, count, repeat),
+        "arn.resource_id_per_s": best_rate(resource_ids, count, repeat, setup=_parse_cached.cache_clear),
+        "arn.split_columns_per_s": best_rate(lambda: ArnColumns.split(arns), count, repeat),
+        "batch.per_arn_per_s": best_rate(batch_per_arn, count, repeat, setup=_parse_cached.cache_clear),
+        "batch.columnar_per_s": best_rate(batch_columnar, count, repeat),
+    }
+
+
+def bench_tags(tag_count: int, calls: int, repeat: int) -> dict:
+    tags = tag_list(tag_count)
+
+    def repeat_calls(function, *args):
+        def run():
+            for _ in range(calls):
+                function(tags, *args)
+        return run
+
+    return {
+        "tags.adapt_tags_per_s": best_rate(repeat_calls(adapt_tags), calls, repeat),
+        "tags.adapt_ecs_tags_per_s": best_rate(repeat_calls(adapt_ecs_tags), calls, repeat),
+        "tags.adapt_autoscaling_tags_per_s": best_rate(repeat_calls(adapt_autoscaling_tags, "group-name"), calls,
+                                                       repeat),
+    }
+
+
+def current_commit() -> str:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    """Prints the change of every measure against a previous results file."""
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    print(f"\nchange against {baseline_path} (commit {baseline.get('commit')}):")
+    for name, value in results.items():
+        before = baseline["results"].get(name)
+        if before:
+            print(f"  {name:<36} {(value / before - 1) * 100:+7.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Rows of the generated Wiz export.")
+    parser.add_argument("--columns", type=int, default=60, help="Columns of the generated Wiz export.")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Service mix, as comma-separated name=weight pairs (e.g., ec2=5,s3=1), or 'all'.")
+    parser.add_argument("--arns", type=int, default=100000, help="Size of the ARN corpus.")
+    parser.add_argument("--tags", type=int, default=10, help="Number of tags formatted per call.")
+    parser.add_argument("--tag-calls", type=int, default=100000, help="Calls of each tag formatter.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Path of the JSON file the results are written to.")
+    parser.add_argument("--compare", help="Path of a previous JSON results file to compare with.")
+    args = parser.parse_args()
+
+    results = {}
+    results.update(bench_parse(args.rows, args.columns, args.mix, args.repeat))
+    results.update(bench_arns(args.arns, args.mix, args.repeat))
+    results.update(bench_tags(args.tags, args.tag_calls, args.repeat))
+
+    for name, value in results.items():
+        print(f"{name:<36} {value:>14,.0f}")
+
+    report = {
+        "commit": current_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "rows": args.rows, "columns": args.columns, "mix": args.mix, "arns": args.arns,
+            "tags": args.tags, "tag_calls": args.tag_calls, "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
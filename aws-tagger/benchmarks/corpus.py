@@ -0,0 +1,181 @@
+"""
+Synthetic inputs shared by the benchmarks: Wiz CSV exports and ARN corpora.
+
+Every row generator returns the five Wiz fields read by `CSVWizParser`, in the order
+(providerUniqueId, region, nativeType, Name, subscriptionExternalId). The generators cover
+every service with a tagger, and every case `CSVWizParser.__fix_arn` rewrites: ECR
+repositories, EC2 key pairs, route tables and SES identities exported as WorkSpaces.
+"""
+import csv
+import random
+
+REQUIRED_COLUMNS = [
+    "resource.providerUniqueId", "resource.region", "resource.nativeType", "resource.Name",
+    "resource.subscriptionExternalId",
+]
+
+REGIONS = ["us-east-1", "us-west-2", "eu-west-1", "eu-central-1", "ap-southeast-2"]
+
+
+def _regional(service: str, resource: str, native_type: str):
+    def row(i: int, region: str, account: str) -> list:
+        name = f"{native_type}-{i}"
+        return [f"arn:aws:{service}:{region}:{account}:{resource.format(name=name, i=i)}", region, native_type, name,
+                account]
+    return row
+
+
+def _global(service: str, resource: str, native_type: str, with_account: bool = True):
+    def row(i: int, region: str, account: str) -> list:
+        name = f"{native_type}-{i}"
+        owner = account if with_account else ""
+        return [f"arn:aws:{service}::{owner}:{resource.format(name=name, i=i)}", "", native_type, name, account]
+    return row
+
+
+def _ecr_repository(i: int, region: str, account: str) -> list:
+    # Wiz exports the repository URI, rebuilt into an ARN from the name
+    name = f"repository-{i}"
+    return [f"{account}.dkr.ecr.{region}.amazonaws.com/{name}", region, "repository", name, account]
+
+
+def _key_pair(i: int, region: str, account: str) -> list:
+    key_id = f"key-{i:017x}"
+    return [key_id, region, "keyPair", f"key-pair-{i}", account]
+
+
+def _route_table(i: int, region: str, account: str) -> list:
+    table_id = f"rtb-{i:017x}"
+    return [table_id, region, "routeTable", f"route-table-{i}", account]
+
+
+def _ses_identity(i: int, region: str, account: str) -> list:
+    # Wiz exports SES identities with a WorkSpaces ARN
+    name = f"mail{i}.example.com"
+    return [f"arn:aws:workspaces:{region}:{account}:ses/{name}", region, "emailIdentity", name, account]
+
+
+# Row generators, keyed by the name used in service mixes
+ROW_GENERATORS = {
+    "acm": _regional("acm", "certificate/{i:08x}-0000-0000-0000-000000000000", "certificate"),
+    "apigateway": _regional("apigateway", "/restapis/{i:010x}", "restApi"),
+    "athena": _regional("athena", "workgroup/{name}", "workgroup"),
+    "autoscaling": _regional(
+        "autoscaling", "autoScalingGroup:{i:08x}-0000-0000-0000-000000000000:autoScalingGroupName/{name}",
+        "autoScalingGroup",
+    ),
+    "cloudfront": _global("cloudfront", "distribution/E{i:013X}", "distribution"),
+    "cloudwatch": _regional("cloudwatch", "alarm:{name}", "alarm"),
+    "dynamodb": _regional("dynamodb", "table/{name}", "table"),
+    "ec2": _regional("ec2", "instance/i-{i:017x}", "instance"),
+    "ecr": _ecr_repository,
+    "ecs": _regional("ecs", "cluster/{name}", "cluster"),
+    "events": _regional("events", "rule/{name}", "rule"),
+    "lambda": _regional("lambda", "function:{name}", "function"),
+    "logs": _regional("logs", "log-group:/aws/lambda/{name}", "logGroup"),
+    "mediaconvert": _regional("mediaconvert", "queues/{name}", "queue"),
+    "rds": _regional("rds", "db:{name}", "dbInstance"),
+    "route53": _global("route53", "hostedzone/Z{i:020X}", "hostedZone", with_account=False),
+    "route53domains": _global("route53domains", "domain/example{i}.com", "domain"),
+    "s3": _global("s3", "{name}", "bucket", with_account=False),
+    "ses": _ses_identity,
+    "sns": _regional("sns", "{name}", "topic"),
+    "sqs": _regional("sqs", "{name}", "queue"),
+    "key-pair": _key_pair,
+    "route-table": _route_table,
+}
+
+# Rough share of each resource type in a real inventory
+DEFAULT_MIX = {
+    "ec2": 25, "s3": 10, "lambda": 10, "logs": 10, "sqs": 5, "sns": 5, "dynamodb": 5, "rds": 4, "ecr": 4,
+    "route-table": 4, "key-pair": 2, "ecs": 2, "cloudwatch": 3, "events": 2, "acm": 2, "apigateway": 1,
+    "autoscaling": 1, "cloudfront": 1, "route53": 1, "route53domains": 0.5, "athena": 0.5, "mediaconvert": 0.5,
+    "ses": 0.5,
+}
+
+
+def parse_mix(spec: str) -> dict:
+    """
+    Parses a service mix given on the command line.
+
+    Args:
+        spec (str): Comma-separated `name=weight` pairs (e.g., "ec2=5,s3=1"), or "all" for an even mix.
+
+    Returns:
+        dict: The weight of every row generator name.
+    """
+    if spec == "all":
+        return {name: 1 for name in ROW_GENERATORS}
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ROW_GENERATORS:
+            raise ValueError(f"Unknown service in mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def generate_rows(count: int, mix: dict = None, seed: int = 0, accounts: int = 20):
+    """
+    Yields the Wiz fields of `count` synthetic resources drawn from a service mix.
+
+    Args:
+        count (int): The number of rows.
+        mix (dict): The weight of every row generator name. Defaults to `DEFAULT_MIX`.
+        seed (int): The seed of the random generator, so corpora are the same across runs.
+        accounts (int): The number of distinct AWS accounts.
+
+    Yields:
+        list: The (providerUniqueId, region, nativeType, Name, subscriptionExternalId) fields.
+    """
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    names = list(mix)
+    generators = [ROW_GENERATORS[name] for name in names]
+    weights = [mix[name] for name in names]
+    account_ids = [f"{rng.randrange(10 ** 12):012d}" for _ in range(accounts)]
+    for i, generate in enumerate(rng.choices(generators, weights, k=count)):
+        yield generate(i, rng.choice(REGIONS), rng.choice(account_ids))
+
+
+def generate_wiz_csv(path: str, rows: int, columns: int, mix: dict = None, seed: int = 0) -> None:
+    """
+    Writes a synthetic Wiz export with `columns` columns, the required ones being the last.
+
+    Args:
+        path (str): Path of the CSV file to write.
+        rows (int): The number of resources.
+        columns (int): The total number of columns, filler columns included.
+        mix (dict): The weight of every row generator name. Defaults to `DEFAULT_MIX`.
+        seed (int): The seed of the random generator.
+    """
+    rng = random.Random(seed)
+    filler = [f"resource.properties.attribute{i}" for i in range(max(0, columns - len(REQUIRED_COLUMNS)))]
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(filler + REQUIRED_COLUMNS)
+        for fields in generate_rows(rows, mix, seed):
+            writer.writerow([f"value-{rng.randrange(1000)}" for _ in filler] + fields)
+
+
+def arn_corpus(count: int, mix: dict = None, seed: int = 0) -> list:
+    """
+    Returns the ARN strings of `count` synthetic resources, as the Wiz parser outputs them.
+
+    Args:
+        count (int): The number of ARNs.
+        mix (dict): The weight of every row generator name. Defaults to `DEFAULT_MIX`.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        list: The ARN strings, all distinct.
+    """
+    from parsers.csv_wiz_parser import CSVWizParser
+
+    fix_arn = CSVWizParser._CSVWizParser__fix_arn
+    return [fix_arn(*fields).arn for fields in generate_rows(count, mix, seed)]
+
+
+def tag_list(count: int) -> list:
+    """Returns `count` tags in the format of the tags file."""
+    return [{"Key": f"tag-key-{i}", "Value": f"tag-value-{i}"} for i in range(count)]
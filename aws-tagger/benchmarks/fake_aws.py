@@ -0,0 +1,396 @@
+"""
+A local stand-in for the AWS tagging APIs, to load test the tool without touching real accounts.
+
+The server answers the calls sent by the taggers over the wire protocols of their services:
+    - EC2 query protocol, e.g. CreateTags
+    - Query protocol (RDS, SNS, ...), e.g. AddTagsToResource
+    - REST-JSON protocol (Lambda, ...), e.g. TagResource
+    - REST-XML protocol (S3), e.g. PutBucketTagging
+    - JSON protocol (Resource Groups Tagging API, ...), e.g. TagResources and GetResources
+    - STS AssumeRole, returning credentials whose access key ends with the account of the role
+
+Calls of other operations get an empty successful response in their protocol. The service of
+a request is read from the credential scope of its signature, and every service has its own
+profile: a latency distribution, a maximum rate above which calls are throttled, and rates of
+throttling, permanent errors and server faults injected at random.
+
+The statistics of the calls received are returned as JSON by `GET /__stats`.
+
+Usage (from the aws-tagger directory):
+    python -m benchmarks.fake_aws --port 4566 --latency 20 --service ec2:latency=50,throttle=0.05
+    python main.py tag resources.csv tags.json --endpoint-url http://127.0.0.1:4566
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+# Path answering the statistics of the server as JSON, instead of an AWS response
+STATS_PATH = "/__stats"
+
+CREDENTIAL_SCOPE = re.compile(r"Credential=(?P<access_key>[^/]+)/\d+/(?P<region>[^/]+)/(?P<service>[^/]+)/aws4_request")
+
+# Errors returned by each protocol: (HTTP status, error code)
+THROTTLING_ERRORS = {
+    "ec2": (503, "RequestLimitExceeded"),
+    "query": (400, "Throttling"),
+    "rest-json": (429, "TooManyRequestsException"),
+    "rest-xml": (503, "SlowDown"),
+    "json": (400, "ThrottlingException"),
+}
+PERMANENT_ERRORS = {
+    "ec2": (400, "InvalidID"),
+    "query": (404, "NotFound"),
+    "rest-json": (404, "ResourceNotFoundException"),
+    "rest-xml": (404, "NoSuchBucket"),
+    "json": (400, "InvalidParameterException"),
+}
+FAULTS = {
+    "ec2": (500, "InternalError"),
+    "query": (500, "InternalFailure"),
+    "rest-json": (500, "ServiceException"),
+    "rest-xml": (500, "InternalError"),
+    "json": (500, "InternalServiceException"),
+}
+
+
+class ServiceProfile:
+    """
+    How the fake endpoint behaves for the calls of a service.
+
+    Attributes:
+        latency (float): The median latency of a call, in milliseconds.
+        jitter (float): The spread of the latency, as the sigma of a log-normal distribution.
+        rate (float): Calls per second above which calls are throttled, or 0 for no limit.
+        throttle (float): The share of calls throttled at random.
+        error (float): The share of calls failing with a permanent error (e.g., resource not found).
+        fault (float): The share of calls failing with a server error.
+    """
+
+    def __init__(self, latency: float = 20.0, jitter: float = 0.3, rate: float = 0.0, throttle: float = 0.0,
+                 error: float = 0.0, fault: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate = rate
+        self.throttle = throttle
+        self.error = error
+        self.fault = fault
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    @classmethod
+    def from_spec(cls, spec: str, default: "ServiceProfile") -> tuple:
+        """
+        Parses a service profile given on the command line.
+
+        Args:
+            spec (str): The service and its settings, e.g. "ec2:latency=50,rate=100,throttle=0.05".
+            default (ServiceProfile): The profile whose settings are used for the ones not given.
+
+        Returns:
+            tuple: The service name and its profile.
+        """
+        service, _, settings = spec.partition(":")
+        values = {name: getattr(default, name) for name in ("latency", "jitter", "rate", "throttle", "error", "fault")}
+        for setting in filter(None, settings.split(",")):
+            name, _, value = setting.partition("=")
+            if name not in values:
+                raise ValueError(f"Unknown setting {name} in service profile: {spec}")
+            values[name] = float(value)
+        return service, cls(**values)
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Returns the latency of a call, in seconds."""
+        if self.latency <= 0:
+            return 0.0
+        return rng.lognormvariate(math.log(self.latency), self.jitter) / 1000
+
+    def over_rate(self) -> bool:
+        """Returns whether a call arriving now exceeds the rate of the service."""
+        if not self.rate:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now - 1.0)
+            if slot > now:
+                return True
+            self._next_slot = slot + 1.0 / self.rate
+            return False
+
+
+class FakeAwsServer(ThreadingHTTPServer):
+    """
+    The HTTP server, with the profiles of the services and the statistics of the calls received.
+
+    Attributes:
+        profiles (dict): The `ServiceProfile` of every service, keyed by signing name (e.g., 'ec2').
+        default_profile (ServiceProfile): The profile of services without their own.
+        tags (dict): The tags applied to every ARN through ARN-based calls.
+        requests (Counter): The number of requests per (service, operation).
+        outcomes (Counter): The number of responses per outcome (ok, throttled, error, fault).
+        retries (int): The number of requests identical to a previous one, i.e. sent again.
+        access_keys (Counter): The number of requests signed with every access key.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address: tuple = ("127.0.0.1", 0), profiles: dict = None, default_profile=None,
+                 seed: int = 0):
+        super().__init__(address, FakeAwsHandler)
+        self.profiles = profiles or {}
+        self.default_profile = default_profile or ServiceProfile()
+        self.tags = {}
+        self.requests = Counter()
+        self.outcomes = Counter()
+        self.retries = 0
+        self.access_keys = Counter()
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._seed = seed
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAwsServer":
+        """Serves requests in a background thread."""
+        threading.Thread(target=self.serve_forever, name="fake-aws", daemon=True).start()
+        return self
+
+    def profile(self, service: str) -> ServiceProfile:
+        return self.profiles.get(service, self.default_profile)
+
+    def rng(self) -> random.Random:
+        # One generator per handler thread, as random.Random is not meant to be shared.
+        if not hasattr(self._local, "rng"):
+            self._local.rng = random.Random(f"{self._seed}-{threading.get_ident()}")
+        return self._local.rng
+
+    def record(self, service: str, operation: str, body: bytes, path: str, access_key: str = None) -> None:
+        digest = hashlib.sha1(service.encode() + path.encode() + body).digest()
+        with self._lock:
+            self.requests[(service, operation)] += 1
+            self.access_keys[access_key] += 1
+            if digest in self._seen:
+                self.retries += 1
+            else:
+                self._seen.add(digest)
+
+    def stats(self) -> dict:
+        """Returns the statistics of the requests received so far."""
+        with self._lock:
+            return {
+                "requests": sum(self.requests.values()),
+                "retries": self.retries,
+                "outcomes": dict(self.outcomes),
+                "operations": {f"{service}.{operation}": count for (service, operation), count in self.requests.items()},
+                "access_keys": dict(self.access_keys),
+            }
+
+
+class FakeAwsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections alive, as AWS endpoints do
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self._handle()
+
+    def do_PUT(self) -> None:
+        self._handle()
+
+    def do_GET(self) -> None:
+        self._handle()
+
+    def do_DELETE(self) -> None:
+        self._handle()
+
+    def _handle(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path == STATS_PATH:
+            self._send(200, json.dumps(self.server.stats()), "application/json")
+            return
+
+        match = CREDENTIAL_SCOPE.search(self.headers.get("Authorization", ""))
+        service = match.group("service") if match else "unknown"
+        protocol, operation, params = self._parse(service, body)
+        server = self.server
+        server.record(service, operation, body, self.path, match.group("access_key") if match else None)
+
+        profile = server.profile(service)
+        rng = server.rng()
+        time.sleep(profile.sample_latency(rng))
+
+        draw = rng.random()
+        if profile.over_rate() or draw < profile.throttle:
+            outcome, error = "throttled", THROTTLING_ERRORS[protocol]
+        elif draw < profile.throttle + profile.error:
+            outcome, error = "error", PERMANENT_ERRORS[protocol]
+        elif draw < profile.throttle + profile.error + profile.fault:
+            outcome, error = "fault", FAULTS[protocol]
+        else:
+            outcome, error = "ok", None
+        with server._lock:
+            server.outcomes[outcome] += 1
+
+        if error:
+            self._send_error(protocol, service, *error)
+        else:
+            self._send_success(protocol, service, operation, params)
+
+    def _parse(self, service: str, body: bytes) -> tuple:
+        """Returns the protocol, operation name and parameters of the request."""
+        target = self.headers.get("X-Amz-Target")
+        if target:
+            return "json", target.rpartition(".")[2], json.loads(body or b"{}")
+
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            params = {name: values[0] for name, values in parse_qs(body.decode()).items()}
+            return ("ec2" if service == "ec2" else "query"), params.get("Action", "Unknown"), params
+
+        url = urlparse(self.path)
+        if service == "s3":
+            operation = "PutBucketTagging" if "tagging" in url.query and self.command == "PUT" else self.command
+            return "rest-xml", operation, {}
+
+        if service == "lambda" and url.path.startswith("/2017-03-31/tags/"):
+            arn = unquote(url.path[len("/2017-03-31/tags/"):])
+            return "rest-json", "TagResource", {"Resource": arn, **json.loads(body or b"{}")}
+        return "rest-json", f"{self.command} {url.path}", {}
+
+    def _send_success(self, protocol: str, service: str, operation: str, params: dict) -> None:
+        request_id = str(uuid.uuid4())
+        if protocol == "json":
+            self._send(200, json.dumps(self._json_result(operation, params)), "application/x-amz-json-1.1")
+        elif protocol == "ec2":
+            self._send(200, f'<{operation}Response xmlns="http://ec2.amazonaws.com/doc/2016-11-15/">'
+                            f'<requestId>{request_id}</requestId><return>true</return></{operation}Response>', "text/xml")
+        elif operation == "AssumeRole":
+            account = params.get("RoleArn", "").split(":")[4]
+            expiration = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 3600))
+            self._send(200, f'<AssumeRoleResponse><AssumeRoleResult><Credentials>'
+                            f'<AccessKeyId>ASIAFAKE{account}</AccessKeyId><SecretAccessKey>fake</SecretAccessKey>'
+                            f'<SessionToken>fake</SessionToken><Expiration>{expiration}</Expiration></Credentials>'
+                            f'</AssumeRoleResult><ResponseMetadata><RequestId>{request_id}</RequestId>'
+                            f'</ResponseMetadata></AssumeRoleResponse>', "text/xml")
+        elif protocol == "query":
+            if "ResourceName" in params:
+                self._store(params["ResourceName"], self._query_tags(params))
+            self._send(200, f'<{operation}Response><{operation}Result/><ResponseMetadata><RequestId>{request_id}'
+                            f'</RequestId></ResponseMetadata></{operation}Response>', "text/xml")
+        elif protocol == "rest-xml":
+            self._send(200, "", "application/xml")
+        else:
+            if "Resource" in params:
+                self._store(params["Resource"], params.get("Tags", {}))
+            self._send(204, "", "application/json")
+
+    def _json_result(self, operation: str, params: dict) -> dict:
+        if operation == "TagResources":
+            for arn in params.get("ResourceARNList", []):
+                self._store(arn, params.get("Tags", {}))
+            return {"FailedResourcesMap": {}}
+        if operation == "GetResources":
+            with self.server._lock:
+                found = [(arn, self.server.tags[arn]) for arn in params.get("ResourceARNList", [])
+                         if arn in self.server.tags]
+            return {"ResourceTagMappingList": [
+                {"ResourceARN": arn, "Tags": [{"Key": key, "Value": value} for key, value in tags.items()]}
+                for arn, tags in found
+            ]}
+        return {}
+
+    def _store(self, arn: str, tags: dict) -> None:
+        with self.server._lock:
+            self.server.tags.setdefault(arn, {}).update(tags)
+
+    @staticmethod
+    def _query_tags(params: dict) -> dict:
+        tags = {}
+        index = 1
+        while f"Tags.member.{index}.Key" in params:
+            tags[params[f"Tags.member.{index}.Key"]] = params.get(f"Tags.member.{index}.Value", "")
+            index += 1
+        return tags
+
+    def _send_error(self, protocol: str, service: str, status: int, code: str) -> None:
+        request_id = str(uuid.uuid4())
+        message = f"Injected {code} error"
+        if protocol == "json":
+            self._send(status, json.dumps({"__type": code, "Message": message}), "application/x-amz-json-1.1")
+        elif protocol == "rest-json":
+            self._send(status, json.dumps({"Type": "User", "message": message}), "application/json",
+                       {"X-Amzn-ErrorType": code})
+        elif protocol == "ec2":
+            self._send(status, f"<Response><Errors><Error><Code>{code}</Code><Message>{message}</Message></Error>"
+                               f"</Errors><RequestID>{request_id}</RequestID></Response>", "text/xml")
+        elif protocol == "rest-xml":
+            self._send(status, f"<Error><Code>{code}</Code><Message>{message}</Message>"
+                               f"<RequestId>{request_id}</RequestId></Error>", "application/xml")
+        else:
+            self._send(status, f"<ErrorResponse><Error><Type>Sender</Type><Code>{code}</Code><Message>{message}"
+                               f"</Message></Error><RequestId>{request_id}</RequestId></ErrorResponse>", "text/xml")
+
+    def _send(self, status: int, body: str, content_type: str, headers: dict = None) -> None:
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("x-amzn-RequestId", str(uuid.uuid4()))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the options describing the service profiles to a command line parser."""
+    parser.add_argument("--latency", type=float, default=20.0, help="Median latency of a call, in ms.")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Sigma of the log-normal latency distribution.")
+    parser.add_argument("--rate", type=float, default=0.0, help="Calls/s per service above which calls are throttled.")
+    parser.add_argument("--throttle", type=float, default=0.0, help="Share of calls throttled at random.")
+    parser.add_argument("--error", type=float, default=0.0, help="Share of calls failing with a permanent error.")
+    parser.add_argument("--fault", type=float, default=0.0, help="Share of calls failing with a server error.")
+    parser.add_argument("--service", action="append", default=[],
+                        help="Profile of a service, e.g. ec2:latency=50,rate=100,throttle=0.05. Can be repeated.")
+
+
+def profiles_from_arguments(args) -> tuple:
+    """Returns the default profile and the profiles of the services given on the command line."""
+    default = ServiceProfile(args.latency, args.jitter, args.rate, args.throttle, args.error, args.fault)
+    return default, dict(ServiceProfile.from_spec(spec, default) for spec in args.service)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4566)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    default, profiles = profiles_from_arguments(args)
+    server = FakeAwsServer((args.host, args.port), profiles, default)
+    print(f"Fake AWS endpoint listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
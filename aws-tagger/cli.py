@@ -1,9 +1,28 @@
+import contextlib
+import functools
 import json
-from tqdm import tqdm
+import os
 
+from executors.registry import ExecutorRegistry
 from parsers.registry import ParserRegistry
 from taggers.registry import TaggerRegistry
+from utils.arn_columns import ArnColumns
 from utils.arn_parser import AWSArnParser
+from utils.batching import batch_resources
+from utils.clients import AccountRoles, ClientFactory, prewarm_clients
+from utils.concurrency import ConcurrencyLimits
+from utils.inventory import TagInventory
+from utils.journal import Journal, TagStatus
+from utils.metrics import LiveRates, MetricsRegistry
+from utils.pipeline import prefetch
+from utils.profiling import Profiler
+from utils.progress import ResourceProgress, StreamProgress
+from utils.rate_limiter import RateLimiterRegistry
+from utils.tag_diff import TagDiff
+from utils.tag_verify import TagVerifier
+
+# Directory where the journals of the runs are kept, relative to the working directory
+DEFAULT_JOURNAL_DIR = ".aws-tagger"
 
 
 def load_tags(tags_file: str):
@@ -16,21 +35,114 @@ def load_tags(tags_file: str):
         return None
 
 
-def get_resources(input_file: str, parser_type: str):
-    """Parse the input file to extract AWS resource ARNs."""
-    parser = ParserRegistry.get_parser(parser_type)
-    return parser.parse(input_file)
+def get_resources(input_file: str, parser_type: str, columnar: bool = False, parser_options: dict = None):
+    """
+    Parse the input file to extract AWS resource ARNs.
+
+    Streaming parsers are run in a background thread that yields the ARNs through a bounded
+    queue as the file is read, and the progress is tracked from the byte offset in the file.
+    Other parsers return the full list first, and the progress counts resources. In columnar
+    mode, the ARNs of the whole file are split at once into an `ArnColumns`.
+
+    Returns:
+        tuple: The resources to tag (an iterator, a list or an `ArnColumns`) and their progress bar.
+    """
+    parser = ParserRegistry.get_parser(parser_type, **(parser_options or {}))
+    if columnar:
+        with MetricsRegistry.phase("parse"), Profiler.phase("parse"):
+            columns = parser.parse_columns(input_file)
+        return columns, ResourceProgress(len(columns))
+    if not parser.streams():
+        with MetricsRegistry.phase("parse"), Profiler.phase("parse"):
+            resources = parser.parse(input_file)
+        return resources, ResourceProgress(len(resources))
+
+    progress = StreamProgress(parser, os.path.getsize(input_file))
+    resources = Profiler.iterate(MetricsRegistry.timed(parser.iter_parse(input_file), "parse"), "parse")
+    return prefetch(progress.track(resources)), progress
+
+
+def read_tags(region: str, arns: list, account: str = None) -> dict:
+    """Read the current tags of resources of a region and account through the Resource Groups Tagging API."""
+    return TaggerRegistry.get_tagger("tagging", region, account).get_tags(arns)
+
+
+def get_bulk_route(service: str, region: str, limits: ConcurrencyLimits = None) -> str:
+    """
+    Route the resources supported by the Resource Groups Tagging API to the bulk tagger.
+
+    Concurrency limits apply to the tagger a resource is routed to, so the resources of a service
+    given its own limit in `limits` (e.g., `--limit lambda=2`) stay with the tagger of their service.
+    """
+    if limits is not None and limits.overrides_service(service, region):
+        return service
+    return "tagging" if TaggerRegistry.get_tagger_class("tagging").supports(service, region) else service
+
+
+def configure_clients(workers: int = 1, initial_rate: float = None, max_rate: float = None,
+                      max_pool_connections: int = None, retry_mode: str = None, connect_timeout: float = None,
+                      read_timeout: float = None, endpoint_url: str = None, role_arn: str = None,
+                      accounts_file: str = None, external_id: str = None, role_session_name: str = None) -> None:
+    """Configure the rate limiters and the AWS clients shared by every tagger. See `tag_resources`."""
+    RateLimiterRegistry.configure(rate=initial_rate, max_rate=max_rate)
+    roles = {"role_arn": role_arn, "external_id": external_id, "session_name": role_session_name or "aws-tagger"}
+    roles = AccountRoles.from_file(accounts_file, **roles) if accounts_file else AccountRoles(**roles)
+    ClientFactory.configure(
+        max_pool_connections=max_pool_connections or max(10, workers), retry_mode=retry_mode,
+        connect_timeout=connect_timeout, read_timeout=read_timeout, endpoint_url=endpoint_url, roles=roles,
+    )
+
+
+def verify_resources(arns: list, tags: list, workers: int = 8, executor=None, route: callable = None,
+                     output: str = None) -> TagVerifier:
+    """
+    Read back the tags of resources in bulk, and report the ones missing a requested key or having a different value.
+
+    With an executor, the mismatched resources are tagged again, then verified once more.
+
+    Args:
+        arns (list): The ARNs of the resources to verify.
+        tags (list): A list of key-value pairs representing the tags that should be applied.
+        workers (int): Number of read calls sent at the same time, across regions.
+        executor (BaseExecutor): Tags the mismatched resources again, if given.
+        route (callable): Returns the name of the tagger used for a given service and region.
+        output (str): Path of a JSON file the mismatched keys of every resource are written to.
+
+    Returns:
+        TagVerifier: The last verification, whose `mismatches` are the resources still not carrying the tags.
+    """
+    verifier = TagVerifier(read_tags, workers)
+    with ResourceProgress(len(arns)) as progress:
+        mismatches = verifier.verify(arns, tags, on_verify=progress.update)
+    print("\n".join(verifier.report()))
 
+    if executor is not None and mismatches:
+        pending = [AWSArnParser.parse(arn) for arn in mismatches]
+        print(f"Tagging {len(pending)} mismatched resources again.")
+        with ResourceProgress(len(pending)) as progress:
+            executor.run(batch_resources(pending, TaggerRegistry.get_batch_size, route), tags, progress)
+        verifier = TagVerifier(read_tags, workers)
+        with ResourceProgress(len(pending)) as progress:
+            verifier.verify(pending, tags, on_verify=progress.update)
+        print("\n".join(verifier.report()))
 
-def tag_resource(arn: str, tags: list):
-    """Tag a single AWS resource."""
-    service = AWSArnParser.get_service(arn)
-    region = AWSArnParser.get_region(arn)
-    tagger = TaggerRegistry.get_tagger(service, region)
-    tagger.tag_resource(arn, tags)
+    if output:
+        verifier.write(output)
+    return verifier
 
 
-def tag_resources(input_file: str, tags_file: str, parser_type: str):
+def tag_resources(input_file: str, tags_file: str, parser_type: str, *, workers: int = 1,
+                  max_per_service_region: int = None, limits: list = None, executor_type: str = None,
+                  bulk: bool = False, initial_rate: float = None, max_rate: float = None, diff: bool = False,
+                  resume: bool = False, retry_failed: bool = False, journal_dir: str = DEFAULT_JOURNAL_DIR,
+                  queue_stats: bool = False, max_pool_connections: int = None, retry_mode: str = None,
+                  connect_timeout: float = None, read_timeout: float = None, endpoint_url: str = None,
+                  prewarm: bool = False, metrics_file: str = None, prometheus_file: str = None,
+                  live_rates: bool = False, profile: str = None, role_arn: str = None, accounts_file: str = None,
+                  external_id: str = None, role_session_name: str = None, columnar: bool = False,
+                  arn_field: str = None, parse_processes: int = None, unordered: bool = False,
+                  inventory: str = None, inventory_ttl: float = None, verify: bool = False, retag: bool = False,
+                  verify_output: str = None, processes: int = None, shard_by: str = None):
     """
     Parses an input file containing AWS resource ARNs and applies predefined tags to them.
 
@@ -38,11 +150,212 @@ def tag_resources(input_file: str, tags_file: str, parser_type: str):
         input_file (str): Path to the file containing AWS resource ARNs.
         tags_file (str): Path to the file containing a list of dictionaries specifying the tags to be applied.
         parser_type (str): The type of parser to use for processing the input file.
+        workers (int): Number of resources tagged at the same time. With a single worker,
+            resources are tagged one after another.
+        max_per_service_region (int): Default maximum number of resources tagged at the same time
+            for each (service, region) pair. None means only the number of workers applies.
+        limits (list): Overrides of `max_per_service_region` formatted as `service=N` or `service:region=N`.
+            With `bulk`, the resources of a service given a limit are tagged by its own tagger, so the
+            limit applies; the other ones are limited as `tagging`.
+        executor_type (str): The executor used to run the tagging calls ("sequential", "threads" or "async").
+            By default, resources are tagged in a thread pool when there is more than one worker.
+        bulk (bool): Tag resources in batches of 20 through the Resource Groups Tagging API, falling back
+            to the tagger of each service for the resources the API cannot tag.
+        initial_rate (float): Calls per second each (service, region, account) starts at before adapting
+            to throttling. None keeps the default.
+        max_rate (float): Highest calls per second each (service, region, account) may ramp up to.
+            None keeps the default.
+        diff (bool): Read the current tags of the resources in bulk first, and only send writes for the
+            resources missing a requested tag or having a different value.
+        resume (bool): Skip the resources completed by a previous attempt of the same run, i.e. tagged
+            or failed permanently. Without it, the run starts over.
+        retry_failed (bool): Only tag the resources that failed in the previous attempt of the same run,
+            read from its journal instead of the input file.
+        journal_dir (str): Directory of the journals recording the outcome of every resource, one per
+            (input file, tags file, parser).
+        queue_stats (bool): Print the number of resources, throughput and peak depth of every
+            (service, region, account) queue once tagging is finished.
+        max_pool_connections (int): Connections kept open by each client. By default, one per worker
+            and at least 10.
+        retry_mode (str): The botocore retry mode of the clients ("standard", "adaptive" or "legacy").
+        connect_timeout (float): Seconds the clients wait for a connection. None keeps the default.
+        read_timeout (float): Seconds the clients wait for a response. None keeps the default.
+        endpoint_url (str): Send every call to this endpoint instead of AWS (e.g., a local test server).
+        prewarm (bool): Create the client of every (service, region) in the background as soon as it
+            appears in the input, instead of when its first batch is tagged.
+        metrics_file (str): Path of a JSON file the calls, latencies, errors, throttles, retries and bytes
+            sent of every (service, region) are written to at the end of the run. The busiest services
+            are also printed.
+        prometheus_file (str): Path of a file the same measures are written to in the Prometheus text
+            format, e.g. for the textfile collector of node_exporter.
+        live_rates (bool): Show the calls per second of the busiest services under the progress bar.
+        profile (str): Profile the parse and tag phases separately, and write the profiles to files
+            starting with this prefix: a cProfile stats file per phase, collapsed stacks for flame graphs,
+            and the wall and CPU time of every phase. Streaming parsers are profiled in their own thread.
+        role_arn (str): ARN template of the IAM role assumed in the account of every resource, whose
+            `{account}` placeholder is replaced by the account ID (e.g., "arn:aws:iam::{account}:role/Tagger").
+            Without a role, every resource is tagged with the default credentials.
+        accounts_file (str): Path of a JSON file mapping account IDs to the role ARN assumed in them
+            (or null for the default credentials), overriding `role_arn`.
+        external_id (str): The external ID passed when assuming the roles.
+        role_session_name (str): The session name of the assumed roles, shown in CloudTrail.
+        columnar (bool): Read the whole input file at once and split its ARNs column-wise, then build
+            the batches from the resources of every (service, region, account), instead of parsing
+            and grouping the ARNs one by one as they are read.
+        arn_field (str): Dot-separated path of the ARN in every line of the "ndjson" parser (e.g.,
+            "configurationItem.ARN"). None keeps the default, "arn".
+        parse_processes (int): Number of processes parsing the input of the "wiz" parser in parallel, by
+            byte ranges aligned to its records. None or 1 parses it in a single process.
+        unordered (bool): Tag the resources of the ranges parsed in parallel as soon as each range is
+            parsed, instead of in the order of the file.
+        inventory (str): Path of a SQLite database caching the tags of every resource across runs. With
+            `diff`, resources whose cached tags already hold the requested ones are skipped without any
+            call, and only the others are read. Tags written by the run are recorded in it.
+        inventory_ttl (float): Seconds after which the cached tags of a resource are read again. None keeps
+            the default, a day.
+        verify (bool): Once tagging is finished, read back the tags of every resource tagged by the run in
+            bulk, and report the ones missing a requested key or having a different value.
+        retag (bool): With `verify`, tag the mismatched resources again and verify them once more.
+        verify_output (str): Path of a JSON file the mismatched keys of every resource are written to.
+        processes (int): Tag the resources in this number of worker processes, sharded by region, each one
+            running its share of the workers with its own clients. Selects the "processes" executor.
+        shard_by (str): The key the batches are sharded by across the processes, "region" (default) or
+            "service-region".
     """
     tags = load_tags(tags_file)
     if tags is None:
         return
 
-    resources = get_resources(input_file, parser_type)
-    for arn in tqdm(resources):
-        tag_resource(arn, tags)
+    if profile:
+        Profiler.configure(profile)
+    MetricsRegistry.configure(enabled=bool(metrics_file or prometheus_file or live_rates))
+    configure_clients(workers, initial_rate, max_rate, max_pool_connections, retry_mode, connect_timeout, read_timeout,
+                      endpoint_url, role_arn, accounts_file, external_id, role_session_name)
+    if inventory:
+        TagInventory.configure(inventory, ttl=inventory_ttl)
+    with Journal.for_run(journal_dir, input_file, tags_file, parser_type) as journal:
+        if retry_failed:
+            failed = journal.resources(TagStatus.FAILED, TagStatus.RETRYABLE)
+            if not failed:
+                print(f"No failed resources recorded in {journal.path}.")
+                TagInventory.close()
+                return
+            resources, progress = failed, ResourceProgress(len(failed))
+        else:
+            if not resume:
+                journal.clear()
+            parser_options = {}
+            if arn_field:
+                parser_options["arn_field"] = arn_field
+            if parse_processes:
+                parser_options["processes"] = parse_processes
+            if unordered:
+                parser_options["ordered"] = False
+            resources, progress = get_resources(input_file, parser_type, columnar, parser_options)
+
+        executor_type = executor_type or ("processes" if processes else "threads" if workers > 1 else "sequential")
+        executor_options = {}
+        if executor_type == "processes":
+            executor_options = {"processes": processes, "shard_by": shard_by or "region"}
+        executor = ExecutorRegistry.get_executor(
+            executor_type,
+            workers=workers,
+            limits=ConcurrencyLimits.from_specs(limits, max_per_service_region),
+            journal=journal,
+            **executor_options,
+        )
+
+        with progress:
+            pending = resources
+            if resume and not retry_failed:
+                pending = journal.skip_completed(pending, on_skip=progress.update)
+            if diff:
+                tag_diff = TagDiff(read_tags)
+                pending = tag_diff.filter(pending, tags, on_skip=progress.update)
+
+            # Resources of services that accept many resources per call (e.g., EC2) are grouped by region
+            route = functools.partial(get_bulk_route, limits=executor.limits) if bulk else None
+            if isinstance(resources, ArnColumns):
+                if pending is not resources:
+                    pending = ArnColumns.from_parsed(list(pending))
+                batches = pending.batches(TaggerRegistry.get_batch_size, route)
+            else:
+                batches = batch_resources(pending, TaggerRegistry.get_batch_size, route)
+            if prewarm:
+                batches = prewarm_clients(batches, TaggerRegistry.get_tagger)
+            with LiveRates() if live_rates else contextlib.nullcontext(), MetricsRegistry.phase("tagging"), \
+                    Profiler.phase("tag"):
+                executor.run(batches, tags, progress)
+
+        if verify:
+            verify_resources(journal.resources(TagStatus.SUCCESS), tags, max(8, min(workers, 64)),
+                             executor if retag else None, route, verify_output)
+        counts = journal.counts()
+    TagInventory.close()
+
+    if queue_stats:
+        print("\n".join(executor.scheduler.report()))
+    if profile:
+        print("\n".join(Profiler.finish()))
+    if metrics_file:
+        MetricsRegistry.write_json(metrics_file)
+        print("\n".join(MetricsRegistry.report()))
+    if prometheus_file:
+        MetricsRegistry.write_prometheus(prometheus_file)
+    if diff:
+        print(f"Skipped {tag_diff.skipped} of {tag_diff.checked} checked resources already carrying the tags"
+              + (f" ({tag_diff.cached} compared with the inventory)." if inventory else "."))
+    print(f"{counts.get(TagStatus.SUCCESS, 0)} resources tagged, {counts.get(TagStatus.FAILED, 0)} failed and "
+          f"{counts.get(TagStatus.RETRYABLE, 0)} to retry with --retry-failed (journal: {journal.path}).")
+
+
+def verify_tags(input_file: str, tags_file: str, parser_type: str, *, workers: int = 8, retag: bool = False,
+                journal_dir: str = DEFAULT_JOURNAL_DIR, output: str = None, bulk: bool = False,
+                initial_rate: float = None, max_rate: float = None, endpoint_url: str = None, role_arn: str = None,
+                accounts_file: str = None, external_id: str = None, role_session_name: str = None,
+                arn_field: str = None) -> bool:
+    """
+    Reads back the tags of the resources of a run, and reports the ones missing a requested key or having a
+    different value.
+
+    The resources recorded as tagged in the journal of the run (same input file, tags file and parser) are
+    verified. Without a journal, every resource of the input file is.
+
+    Args:
+        input_file (str): Path to the file containing AWS resource ARNs.
+        tags_file (str): Path to the file containing a list of dictionaries specifying the tags that should be applied.
+        parser_type (str): The type of parser to use for processing the input file.
+        workers (int): Number of calls sent at the same time, across regions.
+        retag (bool): Tag the mismatched resources again, then verify them once more.
+        journal_dir (str): Directory of the journals recording the outcome of every resource.
+        output (str): Path of a JSON file the mismatched keys of every resource are written to.
+        bulk (bool): Tag the mismatched resources through the Resource Groups Tagging API.
+        initial_rate (float): Calls per second each (service, region, account) starts at. None keeps the default.
+        max_rate (float): Highest calls per second each (service, region, account) may ramp up to.
+        endpoint_url (str): Send every call to this endpoint instead of AWS (e.g., a local test server).
+        role_arn (str): ARN template of the IAM role assumed in the account of every resource.
+        accounts_file (str): Path of a JSON file mapping account IDs to the role ARN assumed in them.
+        external_id (str): The external ID passed when assuming the roles.
+        role_session_name (str): The session name of the assumed roles, shown in CloudTrail.
+        arn_field (str): Dot-separated path of the ARN in every line of the "ndjson" parser.
+
+    Returns:
+        bool: Whether every verified resource carries the tags.
+    """
+    tags = load_tags(tags_file)
+    if tags is None:
+        return False
+
+    configure_clients(workers, initial_rate, max_rate, endpoint_url=endpoint_url, role_arn=role_arn,
+                      accounts_file=accounts_file, external_id=external_id, role_session_name=role_session_name)
+    with Journal.for_run(journal_dir, input_file, tags_file, parser_type) as journal:
+        arns = journal.resources(TagStatus.SUCCESS)
+        if not arns:
+            print(f"No tagged resources recorded in {journal.path}, verifying every resource of {input_file}.")
+            parser = ParserRegistry.get_parser(parser_type, **({"arn_field": arn_field} if arn_field else {}))
+            # Parsed ARNs keep the account the parser knows for ARNs without one
+            arns = list(parser.iter_parse(input_file))
+
+        executor = ExecutorRegistry.get_executor("threads", workers=workers, journal=journal) if retag else None
+        verifier = verify_resources(arns, tags, workers, executor, get_bulk_route if bulk else None, output)
+    return not verifier.mismatches
@@ -0,0 +1,598 @@
+import contextlib
+import functools
+import hmac
+import http.client
+import json
+import os
+import queue
+import secrets
+import signal
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+
+from cli import DEFAULT_JOURNAL_DIR, configure_clients, get_bulk_route, load_tags
+from executors.base import BaseExecutor
+from executors.thread_executor import ThreadExecutor
+from parsers.registry import ParserRegistry
+from taggers.registry import TaggerRegistry
+from utils.arn_parser import AWSArnParser, ParsedArn
+from utils.clients import ClientFactory, prewarm_clients
+from utils.concurrency import ConcurrencyLimits
+from utils.inventory import TagInventory, tags_etag
+from utils.journal import TagStatus, classify_error
+from utils.tag_formatter import adapt_tags
+
+# Unix socket the daemon listens on by default, relative to the working directory
+DEFAULT_SOCKET = os.path.join(DEFAULT_JOURNAL_DIR, "daemon.sock")
+
+# File the token required by a daemon listening on a TCP port is written to, relative to the working directory
+DEFAULT_TOKEN_FILE = os.path.join(DEFAULT_JOURNAL_DIR, "daemon.token")
+
+# Seconds a partial batch waits for resources of other jobs before it is tagged
+DEFAULT_LINGER = 0.05
+
+# Paths of the HTTP API of the daemon
+JOBS_PATH = "/jobs"
+STATS_PATH = "/stats"
+
+
+class JobBatch(NamedTuple):
+    """
+    A batch of resources of the same service, region, account and tags, gathered from one or more jobs.
+
+    It has the attributes of a `TagBatch`, so it goes through the scheduler and the executors unchanged.
+
+    Attributes:
+        service (str): The name of the tagger used for the resources.
+        region (str): The AWS region of the resources, or None for global resources.
+        arns (list): The ARNs of the resources, as `ParsedArn`, without duplicates.
+        account (str): The AWS account ID of the resources, or None when their ARN has none.
+        tags (list): The key-value pairs applied to the resources.
+        waiters (dict): The jobs waiting for the outcome of every resource, keyed by ARN string.
+    """
+
+    service: str
+    region: str
+    arns: list
+    account: str = None
+    tags: list = None
+    waiters: dict = None
+
+
+class Job:
+    """
+    The resources a submitter asked to tag, and their outcomes as the batches holding them finish.
+
+    Outcomes are reported from the worker threads and read by the thread answering the submitter,
+    which is the only one updating the counts.
+
+    Attributes:
+        size (int): The number of resources of the job.
+        remaining (int): The number of resources whose outcome has not been read yet.
+        counts (dict): The number of outcomes read so far, keyed by `TagStatus`.
+        started (float): When the job was submitted (monotonic clock).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.remaining = size
+        self.counts = {TagStatus.SUCCESS: 0, TagStatus.FAILED: 0, TagStatus.RETRYABLE: 0}
+        self.started = time.monotonic()
+        self._results = queue.Queue()
+
+    def report(self, arn: str, error=None) -> None:
+        """Records the outcome of a resource, tagged if `error` is None."""
+        if error is None:
+            self._results.put({"arn": arn, "status": TagStatus.SUCCESS})
+        else:
+            status = classify_error(error) if isinstance(error, Exception) else TagStatus.FAILED
+            self._results.put({"arn": arn, "status": status, "error": str(error)})
+
+    def wait(self) -> list:
+        """
+        Waits for the next outcomes of the job.
+
+        Returns:
+            list: The outcomes reported since the last call, at least one, as dictionaries holding
+                the `arn`, its `status` and, for failures, the `error`.
+        """
+        results = [self._results.get()]
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        for result in results:
+            self.counts[result["status"]] += 1
+        self.remaining -= len(results)
+        return results
+
+    def summary(self) -> dict:
+        """Returns the counts of the outcomes of the job and its duration."""
+        return {"summary": dict(self.counts), "seconds": round(time.monotonic() - self.started, 3)}
+
+
+class MicroBatcher:
+    """
+    Gathers the resources of concurrent jobs into shared batches, per service, region, account and tags.
+
+    A batch is handed to the executor as soon as it holds the batch size of its tagger, or once
+    `linger` seconds passed since its first resource, so the resources sent by submitters at
+    about the same time share the same calls instead of sending a partial batch each. Taggers
+    sending a call per resource get their batches right away. A resource submitted again
+    while it is waiting in a batch with the same tags is only tagged once, and its outcome is
+    reported to every job.
+
+    Attributes:
+        batches (queue.Queue): The batches ready to be tagged, followed by None once the batcher is closed.
+        linger (float): Seconds a partial batch waits for more resources.
+    """
+
+    def __init__(self, batch_size_for: callable, route: callable = None, linger: float = DEFAULT_LINGER):
+        self.batches = queue.Queue()
+        self.linger = linger
+        self._batch_size_for = batch_size_for
+        self._route = route
+        self._batch_sizes = {}
+        self._buffers = {}  # (service, region, account, tags hash) -> (deadline, tags, {arn: (ParsedArn, jobs)})
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._expire, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def __iter__(self):
+        return iter(self.batches.get, None)
+
+    def add(self, arns: list, tags: list, job: Job) -> None:
+        """
+        Adds the resources of a job to the batches waiting to be tagged.
+
+        Args:
+            arns (list): The ARNs of the resources, as `ParsedArn`.
+            tags (list): A list of key-value pairs representing the tags to be applied.
+            job (Job): The job the outcome of every resource is reported to.
+
+        Raises:
+            RuntimeError: If the batcher is closed.
+        """
+        tags_hash = tags_etag(adapt_tags(tags))
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The daemon is shutting down")
+            for arn in arns:
+                service = self._route(arn.service, arn.region) if self._route else arn.service
+                if service not in self._batch_sizes:
+                    self._batch_sizes[service] = self._batch_size_for(service)
+                key = (service, arn.region, arn.account_id, tags_hash)
+                buffer = self._buffers.get(key)
+                if buffer is None:
+                    buffer = self._buffers[key] = (time.monotonic() + self.linger, tags, {})
+                    self._condition.notify()
+                entry = buffer[2].get(arn.arn)
+                if entry is None:
+                    buffer[2][arn.arn] = (arn, [job])
+                else:
+                    entry[1].append(job)
+                if len(buffer[2]) >= self._batch_sizes[service]:
+                    self._emit(key)
+
+    def close(self) -> None:
+        """Hands the partial batches to the executor, and ends the stream of batches."""
+        with self._condition:
+            self._closed = True
+            for key in list(self._buffers):
+                self._emit(key)
+            self._condition.notify()
+        self._thread.join()
+        self.batches.put(None)
+
+    def _emit(self, key: tuple) -> None:
+        # Must be called while holding the condition.
+        _, tags, entries = self._buffers.pop(key)
+        service, region, account, _ = key
+        arns = [arn for arn, _ in entries.values()]
+        waiters = {arn: jobs for arn, (_, jobs) in entries.items()}
+        self.batches.put(JobBatch(service, region, arns, account, tags, waiters))
+
+    def _expire(self) -> None:
+        # Hands the partial batches whose linger window is over to the executor.
+        with self._condition:
+            while not self._closed:
+                now = time.monotonic()
+                for key in [key for key, (deadline, _, _) in self._buffers.items() if deadline <= now]:
+                    self._emit(key)
+                deadlines = [deadline for deadline, _, _ in self._buffers.values()]
+                self._condition.wait(min(deadlines) - now if deadlines else None)
+
+
+class DaemonExecutor(ThreadExecutor):
+    """
+    Runs the batches of the daemon in a pool of threads, with the tags of every batch.
+
+    Batches wait in the fair per-(service, region, account) queues of the scheduler like in a
+    regular run, and the outcome of every resource is reported to the jobs waiting for it.
+    """
+
+    @staticmethod
+    def tag_batch(batch: JobBatch, tags: list) -> dict:
+        return BaseExecutor.tag_batch(batch, batch.tags)
+
+    def record(self, batch: JobBatch, errors: dict = None, error: Exception = None) -> None:
+        super().record(batch, errors, error)
+        errors = errors or {}
+        for arn in batch.arns:
+            for job in batch.waiters[arn.arn]:
+                job.report(arn.arn, error if error is not None else errors.get(arn))
+
+
+class TagDaemon:
+    """
+    A long-running tagger, accepting jobs from many submitters and sharing its clients and batches between them.
+
+    Every run of the tool pays the interpreter startup, the imports, the creation of the boto3
+    clients and the TLS handshakes, which dominate runs tagging a few resources, e.g. from CI
+    pipelines. The daemon pays them once: its taggers, clients, connection pools, assumed
+    roles and rate limiters stay alive between jobs, and the resources of concurrent jobs are
+    gathered into shared batches by a `MicroBatcher`.
+
+    Attributes:
+        executor (DaemonExecutor): Tags the batches, for as long as the daemon runs.
+        batcher (MicroBatcher): Gathers the resources of the jobs into batches.
+        jobs (int): The number of jobs submitted so far.
+        submitted (int): The number of resources submitted so far.
+        processed (int): The number of resources whose batch is finished.
+    """
+
+    def __init__(self, workers: int = 1, limits: ConcurrencyLimits = None, bulk: bool = False,
+                 linger: float = DEFAULT_LINGER):
+        self.executor = DaemonExecutor(workers=workers, limits=limits)
+        route = functools.partial(get_bulk_route, limits=self.executor.limits) if bulk else None
+        self.batcher = MicroBatcher(TaggerRegistry.get_batch_size, route, linger)
+        self.jobs = 0
+        self.submitted = 0
+        self.processed = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        batches = prewarm_clients(self.batcher, TaggerRegistry.get_tagger)
+        self._thread = threading.Thread(target=self.executor.run, args=(batches, None, self), name="daemon")
+        self._thread.start()
+
+    def update(self, count: int = 1) -> None:
+        """Records that `count` more resources were processed, as a progress bar of the executor."""
+        with self._lock:
+            self.processed += count
+
+    def submit(self, arns: list, tags: list, accounts: dict = None) -> Job:
+        """
+        Queues the resources of a job.
+
+        Args:
+            arns (list): The ARN strings of the resources.
+            tags (list): A list of key-value pairs representing the tags to be applied.
+            accounts (dict): The AWS account ID of resources whose ARN has none (e.g., S3 buckets), keyed
+                by ARN string, so they are tagged with the credentials of their account.
+
+        Returns:
+            Job: The job, reporting the outcome of every resource. Invalid ARNs are reported as failed right away.
+
+        Raises:
+            RuntimeError: If the daemon is shutting down.
+        """
+        job = Job(len(arns))
+        parsed = []
+        accounts = accounts or {}
+        for arn in arns:
+            try:
+                arn = AWSArnParser.parse(arn)
+            except ValueError as e:
+                job.report(arn, e)
+                continue
+            parsed.append(arn.with_account(accounts[arn.arn]) if arn.arn in accounts and not arn.account_id else arn)
+        self.batcher.add(parsed, tags, job)
+        with self._lock:
+            self.jobs += 1
+            self.submitted += len(arns)
+        return job
+
+    def stats(self) -> dict:
+        """Returns the number of jobs and resources handled since the daemon started."""
+        with self._lock:
+            return {
+                "jobs": self.jobs, "submitted": self.submitted, "processed": self.processed,
+                "uptime": round(time.monotonic() - self.started, 3),
+            }
+
+    def close(self) -> None:
+        """Stops accepting jobs, and waits until the queued resources are tagged."""
+        self.batcher.close()
+        self._thread.join()
+
+
+class _JobHandler(BaseHTTPRequestHandler):
+    """
+    Answers `POST /jobs` with the outcome of every resource, one JSON object per line, and `GET /stats`.
+
+    When the server has a `token`, requests must send it as `Authorization: Bearer <token>`.
+    """
+
+    server_version = "aws-tagger"
+
+    def authorized(self) -> bool:
+        token = getattr(self.server, "token", None)
+        if token is None:
+            return True
+        if hmac.compare_digest(self.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+            return True
+        self.send_error(401, "Missing or invalid token")
+        return False
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        if self.path != JOBS_PATH:
+            self.send_error(404)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            arns, tags, accounts = body["arns"], body["tags"], body.get("accounts", {})
+            if not isinstance(arns, list) or not all(isinstance(arn, str) for arn in arns):
+                raise ValueError("'arns' must be a list of ARN strings")
+            if not isinstance(accounts, dict) or not all(isinstance(account, str) for account in accounts.values()):
+                raise ValueError("'accounts' must map ARN strings to account IDs")
+            adapt_tags(tags)
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_error(400, f"Invalid job: {e}")
+            return
+        try:
+            job = self.server.tag_daemon.submit(arns, tags, accounts)
+        except RuntimeError as e:
+            self.send_error(503, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        while job.remaining:
+            self.wfile.write("".join(json.dumps(result) + "\n" for result in job.wait()).encode())
+        self.wfile.write((json.dumps(job.summary()) + "\n").encode())
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        if self.path != STATS_PATH:
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.tag_daemon.stats()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Requests are not logged; Unix socket clients have no address to log anyway.
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """An HTTP connection to a server listening on a Unix socket."""
+
+    def __init__(self, path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+@contextlib.contextmanager
+def _private_files():
+    # Files and sockets created meanwhile can only be opened by the current user.
+    umask = os.umask(0o177)
+    try:
+        yield
+    finally:
+        os.umask(umask)
+
+
+def _bind(socket_path: str = None, port: int = None, token_file: str = None):
+    # Listens on a local TCP port when one is given, and on a Unix socket otherwise. Returns the server, its
+    # address and the file to remove when it stops (the token file or the socket).
+    if port is not None:
+        # Any local user can connect to a TCP port, so requests must carry a token only readable by this user.
+        server = ThreadingHTTPServer(("127.0.0.1", port), _JobHandler)
+        server.token = secrets.token_urlsafe(32)
+        token_file = token_file or DEFAULT_TOKEN_FILE
+        os.makedirs(os.path.dirname(os.path.abspath(token_file)), mode=0o700, exist_ok=True)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(token_file)  # An existing file would keep its permissions
+        with _private_files(), open(token_file, "w") as file:
+            file.write(server.token)
+        return server, f"http://127.0.0.1:{port} (token in {token_file})", token_file
+    socket_path = socket_path or DEFAULT_SOCKET
+    if os.path.exists(socket_path):
+        probe = _UnixHTTPConnection(socket_path, timeout=1)
+        try:
+            probe.connect()
+        except OSError:
+            os.remove(socket_path)  # Left by a daemon that did not stop cleanly
+        else:
+            raise OSError(f"A daemon is already listening on {socket_path}")
+        finally:
+            probe.close()
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), mode=0o700, exist_ok=True)
+    # Created private rather than restricted after bind, which would leave other users time to connect.
+    with _private_files():
+        server = _UnixHTTPServer(socket_path, _JobHandler)
+    return server, socket_path, socket_path
+
+
+def _connect(socket_path: str = None, port: int = None, timeout: float = None) -> http.client.HTTPConnection:
+    if port is not None:
+        return http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    return _UnixHTTPConnection(socket_path or DEFAULT_SOCKET, timeout=timeout)
+
+
+def _auth_headers(port: int = None, token_file: str = None) -> dict:
+    # The token of a daemon listening on a TCP port, read from the file it wrote it to.
+    if port is None:
+        return {}
+    with open(token_file or DEFAULT_TOKEN_FILE) as file:
+        return {"Authorization": f"Bearer {file.read().strip()}"}
+
+
+def serve(socket_path: str = None, port: int = None, workers: int = 1, max_per_service_region: int = None,
+          limits: list = None, bulk: bool = False, linger: float = DEFAULT_LINGER, initial_rate: float = None,
+          max_rate: float = None, max_pool_connections: int = None, retry_mode: str = None,
+          endpoint_url: str = None, role_arn: str = None, accounts_file: str = None, external_id: str = None,
+          role_session_name: str = None, warm: list = None, inventory: str = None, inventory_ttl: float = None,
+          token_file: str = None):
+    """
+    Runs the tagging daemon until it is interrupted (Ctrl+C or SIGTERM).
+
+    Jobs are submitted with `submit`, or by sending `POST /jobs` with a JSON object holding
+    `arns`, a list of ARN strings, `tags`, a list of key-value pairs, and optionally `accounts`,
+    the account ID of the ARNs without one (e.g., S3 buckets), keyed by ARN. The response streams
+    the outcome of every resource as it finishes, one JSON object per line, followed by a
+    `summary` line. `GET /stats` returns the number of jobs and resources handled so far.
+    Once interrupted, the daemon stops accepting jobs and finishes the queued resources.
+
+    The Unix socket can only be opened by the user running the daemon. A TCP port can be
+    opened by any local user, so the daemon then writes a random token to `token_file`,
+    readable by that user only, and rejects the requests that do not send it.
+
+    Args:
+        socket_path (str): Path of the Unix socket the daemon listens on. Defaults to `DEFAULT_SOCKET`.
+        port (int): Listen on this TCP port of the loopback interface instead of a Unix socket.
+        workers (int): Number of resources tagged at the same time, across every job.
+        max_per_service_region (int): Default maximum number of resources tagged at the same time
+            for each (service, region) pair. None means only the number of workers applies.
+        limits (list): Overrides of `max_per_service_region` formatted as `service=N` or `service:region=N`.
+            With `bulk`, the resources of a service given a limit are tagged by its own tagger.
+        bulk (bool): Tag resources in batches of 20 through the Resource Groups Tagging API, falling back
+            to the tagger of each service for the resources the API cannot tag.
+        linger (float): Seconds a partial batch waits for the resources of other jobs before it is tagged.
+        initial_rate (float): Calls per second each (service, region, account) starts at. None keeps the default.
+        max_rate (float): Highest calls per second each (service, region, account) may ramp up to.
+        max_pool_connections (int): Connections kept open by each client. By default, one per worker
+            and at least 10.
+        retry_mode (str): The botocore retry mode of the clients ("standard", "adaptive" or "legacy").
+        endpoint_url (str): Send every call to this endpoint instead of AWS (e.g., a local test server).
+        role_arn (str): ARN template of the IAM role assumed in the account of every resource.
+        accounts_file (str): Path of a JSON file mapping account IDs to the role ARN assumed in them.
+        external_id (str): The external ID passed when assuming the roles.
+        role_session_name (str): The session name of the assumed roles, shown in CloudTrail.
+        warm (list): The clients created at startup, formatted as `service:region`, instead of when
+            their first job arrives.
+        inventory (str): Path of the SQLite database the tags written by the daemon are recorded in.
+        inventory_ttl (float): Seconds after which the cached tags of a resource are read again. None keeps
+            the default, a day.
+        token_file (str): Path of the file the token is written to when listening on a TCP port.
+            Defaults to `DEFAULT_TOKEN_FILE`.
+    """
+    configure_clients(workers, initial_rate, max_rate, max_pool_connections, retry_mode, endpoint_url=endpoint_url,
+                      role_arn=role_arn, accounts_file=accounts_file, external_id=external_id,
+                      role_session_name=role_session_name)
+    if inventory:
+        TagInventory.configure(inventory, ttl=inventory_ttl)
+    for spec in warm or []:
+        service, _, region = spec.partition(":")
+        ClientFactory.prewarm(TaggerRegistry.get_tagger, service, region or None)
+
+    try:
+        server, address, created = _bind(socket_path, port, token_file)
+    except OSError as e:
+        print(f"Error starting the daemon: {e}")
+        return
+    tag_daemon = server.tag_daemon = TagDaemon(workers, ConcurrencyLimits.from_specs(limits, max_per_service_region),
+                                               bulk, linger)
+    # SIGTERM stops the daemon as cleanly as Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"Listening on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(created)
+        print("Finishing the queued resources...")
+        tag_daemon.close()
+        TagInventory.close()
+    stats = tag_daemon.stats()
+    print(f"{stats['processed']} resources of {stats['jobs']} jobs processed.")
+
+
+def submit(input_file: str, tags_file: str, parser_type: str, socket_path: str = None, port: int = None,
+           arn_field: str = None, output: str = None, token_file: str = None) -> bool:
+    """
+    Sends the resources of an input file to a running daemon, and prints their outcome as they finish.
+
+    Args:
+        input_file (str): Path to the file containing AWS resource ARNs.
+        tags_file (str): Path to the file containing a list of dictionaries specifying the tags to be applied.
+        parser_type (str): The type of parser to use for processing the input file.
+        socket_path (str): Path of the Unix socket the daemon listens on. Defaults to `DEFAULT_SOCKET`.
+        port (int): Connect to the daemon on this TCP port of the loopback interface instead.
+        arn_field (str): Dot-separated path of the ARN in every line of the "ndjson" parser.
+        output (str): Path of a file the outcome of every resource is written to, one JSON object per line.
+        token_file (str): Path of the file holding the token of a daemon listening on a TCP port.
+            Defaults to `DEFAULT_TOKEN_FILE`.
+
+    Returns:
+        bool: Whether every resource was tagged.
+    """
+    tags = load_tags(tags_file)
+    if tags is None:
+        return False
+    parser = ParserRegistry.get_parser(parser_type, **({"arn_field": arn_field} if arn_field else {}))
+    parsed = list(parser.iter_parse(input_file))
+    arns = [str(arn) for arn in parsed]
+    # Accounts the parser knows for ARNs without one (e.g., from the account column of a Wiz export)
+    accounts = {
+        arn.arn: arn.account_id for arn in parsed
+        if isinstance(arn, ParsedArn) and arn.account_id and not AWSArnParser.parse(arn.arn).account_id
+    }
+
+    connection = _connect(socket_path, port)
+    try:
+        headers = {"Content-Type": "application/json", **_auth_headers(port, token_file)}
+        job = {"arns": arns, "tags": tags, **({"accounts": accounts} if accounts else {})}
+        connection.request("POST", JOBS_PATH, json.dumps(job).encode(), headers)
+        response = connection.getresponse()
+    except OSError as e:
+        print(f"Error connecting to the daemon: {e}")
+        return False
+    if response.status != 200:
+        print(f"Error submitting the job: {response.status} {response.reason}")
+        return False
+
+    summary = None
+    with open(output, "w") if output else open(os.devnull, "w") as results:
+        for line in response:
+            result = json.loads(line)
+            results.write(line.decode())
+            if "summary" in result:
+                summary = result
+            elif result["status"] != TagStatus.SUCCESS:
+                print(f"Error tagging {result['arn']}: {result['error']}")
+    connection.close()
+    if summary is None:
+        print("Error: the daemon closed the connection before the job was finished.")
+        return False
+
+    counts = summary["summary"]
+    print(f"{counts[TagStatus.SUCCESS]} resources tagged, {counts[TagStatus.FAILED]} failed and "
+          f"{counts[TagStatus.RETRYABLE]} to retry in {summary['seconds']:.2f}s.")
+    return counts[TagStatus.SUCCESS] == len(arns)
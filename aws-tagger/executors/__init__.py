@@ -0,0 +1 @@
+# Executor modules are imported on demand by ExecutorRegistry, from the EXECUTOR_MODULES manifest in registry.py
@@ -0,0 +1,78 @@
+import asyncio
+
+from taggers.async_registry import AsyncTaggerRegistry
+from utils.scheduler import WorkScheduler
+from .base import BaseExecutor
+from .registry import ExecutorRegistry
+
+
+@ExecutorRegistry.register("async")
+class AsyncExecutor(BaseExecutor):
+    """
+    Runs the tagging calls of every tagger on a single asyncio event loop.
+
+    Each in-flight call only costs a coroutine instead of an OS thread, so `workers` can be
+    set to thousands of concurrent calls. Batches wait in the per-(service, region, account)
+    queues of the scheduler, which starts them in a fair order within the bounds of `workers`
+    and `limits`, so a saturated or throttled queue never starves the others.
+    Reading the input stops while `max_pending` batches are waiting, which keeps memory flat.
+
+    Reading the input and recording the outcomes in the journal block, so both run in threads
+    and never hold up the calls in flight on the event loop.
+    """
+
+    def __init__(self, workers: int = 1, limits=None, journal=None, max_pending: int = None):
+        super().__init__(workers, limits, journal)
+        self.max_pending = max_pending or self.workers * 4
+
+    def run(self, batches, tags: list, progress) -> None:
+        asyncio.run(self._run(batches, tags, progress))
+
+    async def _run(self, batches, tags: list, progress) -> None:
+        condition = asyncio.Condition()
+        scheduler = self.scheduler = WorkScheduler(self.workers, self.limits)
+        tasks = set()
+
+        async with AsyncTaggerRegistry() as registry:
+
+            def dispatch():
+                batch = scheduler.next()
+                while batch is not None:
+                    task = asyncio.create_task(tag(batch))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    batch = scheduler.next()
+
+            async def tag(batch):
+                try:
+                    try:
+                        tagger = await registry.get_tagger(batch.service, batch.region, batch.account)
+                        errors, error = await tagger.tag_resources_async(batch.arns, tags), None
+                    except Exception as e:
+                        print(f"Error tagging {', '.join(map(str, batch.arns))}: {e}")
+                        errors, error = None, e
+                    # The journal writes to SQLite, so the outcome is recorded off the event loop.
+                    await asyncio.to_thread(self.record, batch, errors, error)
+                except Exception as e:
+                    print(f"Error recording the outcome of {', '.join(map(str, batch.arns))}: {e}")
+                finally:
+                    scheduler.done(batch)
+                    progress.update(len(batch.arns))
+                    dispatch()
+                    async with condition:
+                        condition.notify_all()
+
+            batches = iter(batches)
+            while True:
+                async with condition:
+                    await condition.wait_for(lambda: scheduler.pending < self.max_pending)
+                # Reading the next batch may parse the input, wait for the prefetch thread or call AWS
+                # (--diff), so it happens in a thread while the calls in flight go on.
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                scheduler.put(batch)
+                dispatch()
+
+            async with condition:
+                await condition.wait_for(lambda: scheduler.idle)
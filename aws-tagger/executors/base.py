@@ -0,0 +1,77 @@
+from abc import ABC, abstractmethod
+
+from taggers.registry import TaggerRegistry
+from utils.batching import TagBatch
+from utils.concurrency import ConcurrencyLimits
+from utils.journal import Journal
+from utils.metrics import MetricsRegistry
+from utils.scheduler import WorkScheduler
+
+
+class BaseExecutor(ABC):
+    """
+    Abstract base class for the strategies used to run tagging tasks.
+
+    An executor receives the batches of resources to tag and the tags to apply, and decides
+    how the tagging calls are run (one after another, in a thread pool, on an event loop, ...).
+    Executors are responsible for keeping the progress bar up to date, and for recording
+    the outcome of every finished batch with `record`. They take the batches to run from
+    `scheduler`, which queues them per (service, region, account) and tracks their statistics.
+
+    Attributes:
+        workers (int): The maximum number of tasks running at the same time.
+        limits (ConcurrencyLimits): The maximum number of tasks running at the same time
+            for each (service, region) pair.
+        journal (Journal): Where the outcome of every resource is recorded, or None.
+        scheduler (WorkScheduler): The queues of batches of the current or last run.
+    """
+
+    def __init__(self, workers: int = 1, limits: ConcurrencyLimits = None, journal: Journal = None):
+        self.workers = max(1, workers)
+        self.limits = limits or ConcurrencyLimits()
+        self.journal = journal
+        self.scheduler = WorkScheduler(self.workers, self.limits)
+
+    @staticmethod
+    def tag_batch(batch: TagBatch, tags: list) -> dict:
+        """Tag a batch of AWS resources with their service, region and account tagger, and return errors by ARN."""
+        tagger = TaggerRegistry.get_tagger(batch.service, batch.region, batch.account)
+        return tagger.tag_resources(batch.arns, tags)
+
+    @staticmethod
+    def api_name(service: str) -> str:
+        """Returns the AWS API the resources of a service are tagged with (e.g., 'resourcegroupstaggingapi')."""
+        try:
+            return TaggerRegistry.get_tagger_class(service).service_name
+        except ValueError:
+            return service
+
+    def record(self, batch: TagBatch, errors: dict = None, error: Exception = None) -> None:
+        """
+        Records the outcome of a finished batch in the journal and the metrics.
+
+        Args:
+            batch (TagBatch): The batch of resources.
+            errors (dict): The errors of the resources that could not be tagged, keyed by ARN.
+            error (Exception): An error that failed the whole batch.
+        """
+        if error is not None:
+            errors = {arn: error for arn in batch.arns}
+        if MetricsRegistry.enabled:
+            failed = len(errors) if errors else 0
+            MetricsRegistry.record_resources(self.api_name(batch.service), batch.region, len(batch.arns) - failed,
+                                             failed)
+        if self.journal is not None:
+            self.journal.record(batch.arns, errors)
+
+    @abstractmethod
+    def run(self, batches, tags: list, progress) -> None:
+        """
+        Tags every batch of resources and waits until all of them are finished.
+
+        Args:
+            batches (Iterable[TagBatch]): The batches of AWS resources to process.
+            tags (list): A list of key-value pairs representing the tags to be applied.
+            progress (tqdm): The progress bar, updated with the number of resources of each finished batch.
+        """
+        pass
@@ -0,0 +1,223 @@
+import itertools
+import math
+import multiprocessing
+import queue
+import threading
+from typing import NamedTuple
+
+from utils.clients import ClientFactory
+from utils.inventory import TagInventory
+from utils.journal import ClassifiedError, TagStatus, classify_error
+from utils.metrics import MetricsRegistry
+from utils.rate_limiter import RateLimiterRegistry
+from utils.scheduler import WorkScheduler
+from .base import BaseExecutor
+from .registry import ExecutorRegistry
+from .thread_executor import ThreadExecutor
+
+# Keys the batches are sharded by across the worker processes
+SHARD_KEYS = {
+    "region": lambda batch: batch.region,
+    "service-region": lambda batch: (batch.service, batch.region),
+}
+
+# Seconds between two checks that the worker processes are still alive
+WORKER_CHECK_INTERVAL = 1.0
+
+
+class ShardBatch(NamedTuple):
+    """
+    A batch of resources sent to a worker process, with the identifier its outcome is reported under.
+
+    It has the attributes of a `TagBatch`, so it goes through the scheduler and the executors unchanged.
+    """
+
+    service: str
+    region: str
+    arns: list
+    account: str = None
+    id: int = None
+
+
+class _Uncounted:
+    # Progress of the worker processes, which the parent process counts instead.
+    def update(self, count: int = 1) -> None:
+        pass
+
+
+class _ShardWorker(ThreadExecutor):
+    # Runs the batches of a worker process, and sends the outcome of every batch to the parent process.
+
+    def __init__(self, outbox, workers: int = 1, limits=None):
+        super().__init__(workers, limits)
+        self.outbox = outbox
+
+    def record(self, batch: ShardBatch, errors: dict = None, error: Exception = None) -> None:
+        if error is not None:
+            errors = {arn: error for arn in batch.arns}
+        # Exceptions are classified here, as botocore exceptions cannot always be pickled.
+        errors = {str(arn): (classify_error(e), str(e)) for arn, e in (errors or {}).items()}
+        self.outbox.put(("result", batch.id, errors))
+
+
+def _work(index: int, settings: dict, tags: list, workers: int, limits, inbox, outbox) -> None:
+    # Entry point of a worker process: its registries start empty, with the settings of the parent.
+    ClientFactory.import_settings(settings["clients"])
+    RateLimiterRegistry.import_settings(settings["rate_limiters"])
+    MetricsRegistry.configure(enabled=settings["metrics"])
+    if settings["inventory"]:
+        TagInventory.configure(*settings["inventory"])
+
+    executor = _ShardWorker(outbox, workers, limits)
+    try:
+        executor.run(iter(inbox.get, None), tags, _Uncounted())
+    finally:
+        TagInventory.close()
+        metrics = MetricsRegistry.snapshot() if MetricsRegistry.enabled else {}
+        outbox.put(("done", index, metrics, executor.scheduler.queues))
+
+
+@ExecutorRegistry.register("processes")
+class ProcessExecutor(BaseExecutor):
+    """
+    Runs the tagging tasks in a pool of processes, each one tagging the resources of its own regions.
+
+    Building, signing and parsing the botocore requests takes CPU time, and a single interpreter
+    runs it on one core at a time whatever the number of threads, which caps the calls per
+    second of a run well below what the APIs allow. This executor spreads the batches over
+    `processes` worker processes, each running a `ThreadExecutor` with its share of the workers,
+    and its own taggers, clients and rate limiters.
+
+    Batches are sharded by region (or by service and region): every new shard key goes to the
+    process with the fewest resources so far, and all its batches follow it. Each region then
+    has a single process sending its calls, so the adaptive rate limiter of every API, region
+    and account still sees all of its calls. With `--bulk`, sharding by region also keeps the
+    calls of the Resource Groups Tagging API and of its fallback taggers in the same process.
+
+    The parent process parses the input, feeds the workers through bounded queues, and
+    aggregates their outcomes: it updates the progress bar, records every batch in the journal
+    and the metrics, and merges the call metrics and queue statistics of the workers once they
+    are finished. Errors are classified in the workers and recorded with their message.
+
+    Attributes:
+        processes (int): The number of worker processes.
+        shard_by (str): The key the batches are sharded by, "region" or "service-region".
+        max_pending (int): The maximum number of batches queued for every worker process.
+    """
+
+    def __init__(self, workers: int = 1, limits=None, journal=None, processes: int = None, shard_by: str = "region",
+                 max_pending: int = None):
+        super().__init__(workers, limits, journal)
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"Unknown shard key: {shard_by}. Use one of: {', '.join(SHARD_KEYS)}")
+        self.processes = max(1, processes or multiprocessing.cpu_count())
+        self.shard_by = shard_by
+        self.max_pending = max_pending or max(4, self.workers * 4 // self.processes)
+
+    def run(self, batches, tags: list, progress) -> None:
+        self.scheduler = WorkScheduler(self.workers, self.limits)
+        context = multiprocessing.get_context("spawn")
+        settings = {
+            "clients": ClientFactory.export_settings(),
+            "rate_limiters": RateLimiterRegistry.export_settings(),
+            "metrics": MetricsRegistry.enabled,
+            "inventory": (TagInventory.path, TagInventory.ttl) if TagInventory.enabled else None,
+        }
+        threads = math.ceil(self.workers / self.processes)
+        outbox = context.Queue()
+        inboxes = [context.Queue(self.max_pending) for _ in range(self.processes)]
+        workers = [
+            context.Process(target=_work, args=(index, settings, tags, threads, self.limits, inboxes[index], outbox),
+                            name=f"tagger-{index}", daemon=True)
+            for index in range(self.processes)
+        ]
+        for worker in workers:
+            worker.start()
+
+        pending = {}  # Batches sent to the workers and not finished, keyed by identifier
+        lock = threading.Lock()
+        collector = threading.Thread(target=self._collect, args=(workers, outbox, pending, lock, progress),
+                                     name="collector", daemon=True)
+        collector.start()
+
+        shards = {}
+        assigned = [0] * self.processes
+        ids = itertools.count()
+        for batch in batches:
+            key = SHARD_KEYS[self.shard_by](batch)
+            if key not in shards:
+                shards[key] = min(range(self.processes), key=assigned.__getitem__)
+            index = shards[key]
+            assigned[index] += len(batch.arns)
+            batch = ShardBatch(batch.service, batch.region, batch.arns, batch.account, next(ids))
+            with lock:
+                pending[batch.id] = (index, batch)
+            if not self._send(inboxes[index], batch, workers[index]):
+                self._fail(pending, lock, progress, index, workers[index])
+
+        for index, inbox in enumerate(inboxes):
+            self._send(inbox, None, workers[index])
+        collector.join()
+        for worker in workers:
+            worker.join()
+
+    def _collect(self, workers: list, outbox, pending: dict, lock, progress) -> None:
+        # Records the outcomes sent by the workers, until every worker is done or exited.
+        finished = set()
+        while len(finished) < len(workers):
+            try:
+                message = outbox.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                for index, worker in enumerate(workers):
+                    if index not in finished and not worker.is_alive():
+                        finished.add(index)
+                        print(f"Error: worker process {worker.name} exited with code {worker.exitcode}, its "
+                              f"resources are recorded to retry with --retry-failed.")
+                        self._fail(pending, lock, progress, index, worker)
+                continue
+
+            if message[0] == "result":
+                _, batch_id, errors = message
+                with lock:
+                    _, batch = pending.pop(batch_id, (None, None))
+                if batch is None:
+                    # Already recorded as lost, when its worker was found dead before its result was read.
+                    continue
+                try:
+                    self.record(batch, {arn: ClassifiedError(*error) for arn, error in errors.items()})
+                except Exception as e:
+                    print(f"Error recording the outcome of {', '.join(map(str, batch.arns))}: {e}")
+                finally:
+                    progress.update(len(batch.arns))
+            else:
+                _, index, metrics, queues = message
+                finished.add(index)
+                if metrics:
+                    MetricsRegistry.merge(metrics)
+                self.scheduler.queues.update(queues)
+
+    def _fail(self, pending: dict, lock, progress, index: int, worker) -> None:
+        # Records the batches of a worker that exited before finishing them as retryable failures.
+        with lock:
+            lost = [batch for shard, batch in pending.values() if shard == index]
+            for batch in lost:
+                del pending[batch.id]
+        error = ClassifiedError(TagStatus.RETRYABLE, f"Worker process {worker.name} exited with code {worker.exitcode}")
+        for batch in lost:
+            try:
+                self.record(batch, error=error)
+            except Exception as e:
+                print(f"Error recording the outcome of {', '.join(map(str, batch.arns))}: {e}")
+            finally:
+                progress.update(len(batch.arns))
+
+    @staticmethod
+    def _send(inbox, batch: ShardBatch, worker) -> bool:
+        # Waits for room in the queue of a worker, unless the worker exited.
+        while worker.is_alive():
+            try:
+                inbox.put(batch, timeout=WORKER_CHECK_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -0,0 +1,84 @@
+import importlib
+import os
+
+from .base import BaseExecutor
+
+# Module defining each executor, imported the first time the executor is requested
+EXECUTOR_MODULES = {
+    "sequential": "executors.sequential_executor",
+    "threads": "executors.thread_executor",
+    "async": "executors.async_executor",
+    "processes": "executors.process_executor",
+}
+
+
+class ExecutorRegistry:
+    """
+    A registry class to manage and retrieve executor classes by name.
+    This class uses a decorator-based approach to register executor classes.
+
+    Executor modules are imported lazily, from `EXECUTOR_MODULES`, the first time their
+    executor is requested, so a run does not import asyncio or multiprocessing for executors
+    it does not use. Names missing from the manifest make every module of the package be
+    imported once, so executors added without a manifest entry are still found.
+
+    Attributes:
+        _executors (dict): A private dictionary to store registered executors with their names as keys.
+    """
+
+    _executors = {}
+    _scanned = False
+
+    @classmethod
+    def register(cls, name: str) -> callable:
+        """
+        Registers an executor class under a given name.
+
+        Args:
+            name (str): The name under which the executor class should be registered.
+
+        Returns:
+            Callable: A decorator that registers the given class in the registry.
+        """
+
+        def wrapper(executor_class):
+            cls._executors[name] = executor_class
+            return executor_class
+
+        return wrapper
+
+    @classmethod
+    def get_executor(cls, name: str, **options) -> BaseExecutor:
+        """
+        Retrieves an instance of an executor class by its registered name.
+
+        Args:
+            name (str): The name of the executor class to retrieve.
+            **options: Keyword arguments forwarded to the executor constructor.
+
+        Returns:
+            BaseExecutor: An instance of the executor class if found.
+
+        Raises:
+            ValueError: If no executor is registered under the given name.
+        """
+        executor_cls = cls._find(name)
+        if not executor_cls:
+            raise ValueError(f"Executor for {name} not found!")
+        return executor_cls(**options)
+
+    @classmethod
+    def _find(cls, name: str) -> type:
+        executor_cls = cls._executors.get(name)
+        if executor_cls is not None:
+            return executor_cls
+
+        module = EXECUTOR_MODULES.get(name)
+        if module:
+            importlib.import_module(module)
+        elif not cls._scanned:
+            cls._scanned = True
+            for file_name in os.listdir(os.path.dirname(__file__)):
+                if file_name.endswith(".py") and file_name not in ("__init__.py", "base.py", "registry.py"):
+                    importlib.import_module(f"executors.{file_name[:-3]}")
+        return cls._executors.get(name)
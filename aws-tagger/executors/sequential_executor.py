@@ -0,0 +1,26 @@
+from utils.scheduler import WorkScheduler
+from .base import BaseExecutor
+from .registry import ExecutorRegistry
+
+
+# Runs the tagging tasks one after another in the calling thread
+@ExecutorRegistry.register("sequential")
+class SequentialExecutor(BaseExecutor):
+    def run(self, batches, tags: list, progress) -> None:
+        scheduler = self.scheduler = WorkScheduler(1, self.limits)
+        for batch in batches:
+            # With a single worker, every batch is dispatched as soon as it is read.
+            scheduler.put(batch)
+            batch = scheduler.next()
+            try:
+                errors, error = self.tag_batch(batch, tags), None
+            except Exception as e:
+                print(f"Error tagging {', '.join(map(str, batch.arns))}: {e}")
+                errors, error = None, e
+            # Recorded outside of the tagging call, so a failing journal is not mistaken for a failed batch.
+            try:
+                self.record(batch, errors, error)
+            except Exception as e:
+                print(f"Error recording the outcome of {', '.join(map(str, batch.arns))}: {e}")
+            scheduler.done(batch)
+            progress.update(len(batch.arns))
@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.scheduler import WorkScheduler
+from .base import BaseExecutor
+from .registry import ExecutorRegistry
+
+
+@ExecutorRegistry.register("threads")
+class ThreadExecutor(BaseExecutor):
+    """
+    Runs the tagging tasks concurrently in a pool of threads.
+
+    Boto3 calls spend most of their time waiting for the network, so sending the calls
+    for different resources at the same time hides that latency. The number of tasks
+    running at the same time is bounded by `workers` globally and by `limits` for each
+    (service, region) pair.
+
+    Batches wait in the per-(service, region, account) queues of the scheduler, which hands
+    them to the worker threads in a fair order, so a saturated or throttled queue never blocks
+    the worker threads or the batches of other queues. The number of queued batches is bounded
+    by `max_pending`, which keeps memory flat regardless of the size of the input.
+    """
+
+    def __init__(self, workers: int = 1, limits=None, journal=None, max_pending: int = None):
+        super().__init__(workers, limits, journal)
+        self.max_pending = max_pending or self.workers * 4
+
+    def run(self, batches, tags: list, progress) -> None:
+        condition = threading.Condition()
+        scheduler = self.scheduler = WorkScheduler(self.workers, self.limits)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+
+            def dispatch():
+                # Must be called while holding the condition.
+                batch = scheduler.next()
+                while batch is not None:
+                    future = pool.submit(self.tag_batch, batch, tags)
+                    future.add_done_callback(lambda f, b=batch: done(f, b))
+                    batch = scheduler.next()
+
+            def done(future, batch):
+                # Exceptions raised by a callback are swallowed, so the batch must be released whatever happens.
+                try:
+                    error = future.exception()
+                    if error:
+                        print(f"Error tagging {', '.join(map(str, batch.arns))}: {error}")
+                        self.record(batch, error=error)
+                    else:
+                        self.record(batch, future.result())
+                except Exception as e:
+                    print(f"Error recording the outcome of {', '.join(map(str, batch.arns))}: {e}")
+                finally:
+                    with condition:
+                        scheduler.done(batch)
+                        progress.update(len(batch.arns))
+                        dispatch()
+                        condition.notify_all()
+
+            for batch in batches:
+                with condition:
+                    condition.wait_for(lambda: scheduler.pending < self.max_pending)
+                    scheduler.put(batch)
+                    dispatch()
+
+            with condition:
+                condition.wait_for(lambda: scheduler.idle)
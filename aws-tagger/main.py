@@ -1,11 +1,24 @@
+import importlib.util
+from typing import List
+
 import typer
 
-from cli import tag_resources
+from cli import DEFAULT_JOURNAL_DIR, tag_resources, verify_tags
+from utils.clients import AIOBOTOCORE_REQUIREMENT
+from utils.concurrency import ConcurrencyLimits
 
 # Initialize a Typer application
 app = typer.Typer()
 
 
+def _check_limits(limits: List[str]) -> None:
+    """Rejects the malformed `--limit` specifications with a usage error."""
+    try:
+        ConcurrencyLimits.from_specs(limits)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="'--limit'") from e
+
+
 @app.command()
 def tag(
         input_file: str = typer.Argument(..., help="Path to the input file containing AWS resource ARNs."),
@@ -13,7 +26,152 @@ def tag(
             ..., help="Path to the file containing a list of tags to apply, provided in JSON format. "
                       "(e.g., [{\"Key\": \"Environment\", \"Value\": \"Production\"}])"
         ),
-        parser_type: str = typer.Option("wiz", "--parser", help="Type of parser to use (e.g., csv, json)."),
+        parser_type: str = typer.Option("wiz", "--parser", help="Type of parser to use (wiz, arns or ndjson)."),
+        workers: int = typer.Option(1, "--workers", min=1, help="Number of resources tagged concurrently."),
+        max_per_service_region: int = typer.Option(
+            None, "--max-per-service-region", min=1,
+            help="Maximum number of concurrent tagging calls for each (service, region) pair."
+        ),
+        limits: List[str] = typer.Option(
+            None, "--limit",
+            help="Concurrency limit override for a service or a service in a region "
+                 "(e.g., --limit ec2=8 --limit lambda:eu-west-1=2). Can be repeated. With --bulk, a limited service "
+                 "is tagged with its own API, and --limit tagging=N limits the bulk calls."
+        ),
+        executor_type: str = typer.Option(
+            None, "--executor",
+            help="How tagging calls are run: sequential, threads, async (requires aiobotocore) or processes. "
+                 "Defaults to threads when --workers is greater than 1."
+        ),
+        bulk: bool = typer.Option(
+            False, "--bulk",
+            help="Tag resources in batches of 20 through the Resource Groups Tagging API, falling back to "
+                 "the service tagger for resources the API cannot tag."
+        ),
+        initial_rate: float = typer.Option(
+            None, "--initial-rate", min=0.1,
+            help="Calls per second each (service, region, account) starts at. The rate then adapts: "
+                 "it ramps up on sustained success and backs off on throttling."
+        ),
+        max_rate: float = typer.Option(
+            None, "--max-rate", min=0.1, help="Highest calls per second each (service, region, account) may reach."
+        ),
+        diff: bool = typer.Option(
+            False, "--diff",
+            help="Read the current tags in bulk first and only tag resources missing a key or having a different value."
+        ),
+        resume: bool = typer.Option(
+            False, "--resume",
+            help="Continue an interrupted run, skipping the resources already tagged or failed permanently."
+        ),
+        retry_failed: bool = typer.Option(
+            False, "--retry-failed", help="Only tag again the resources that failed in the previous run."
+        ),
+        journal_dir: str = typer.Option(
+            DEFAULT_JOURNAL_DIR, "--journal-dir",
+            help="Directory of the journals recording the outcome of every resource of a run."
+        ),
+        queue_stats: bool = typer.Option(
+            False, "--queue-stats",
+            help="Print the throughput and peak depth of every (service, region, account) queue at the end."
+        ),
+        max_pool_connections: int = typer.Option(
+            None, "--max-pool-connections", min=1,
+            help="Connections kept open by each AWS client. Defaults to the number of workers (at least 10)."
+        ),
+        retry_mode: str = typer.Option(
+            None, "--retry-mode", help="Retry mode of the AWS clients on network and server errors: "
+                                       "standard (default), adaptive or legacy."
+        ),
+        connect_timeout: float = typer.Option(
+            None, "--connect-timeout", min=0.1, help="Seconds to wait for a connection to AWS (default: 10)."
+        ),
+        read_timeout: float = typer.Option(
+            None, "--read-timeout", min=0.1, help="Seconds to wait for an AWS response (default: 60)."
+        ),
+        endpoint_url: str = typer.Option(
+            None, "--endpoint-url", help="Send every call to this endpoint instead of AWS (e.g., a local test server)."
+        ),
+        prewarm: bool = typer.Option(
+            False, "--prewarm",
+            help="Create the AWS client of every (service, region) in the background as soon as it appears in the input "
+                 "rather than on its first call."
+        ),
+        metrics_file: str = typer.Option(
+            None, "--metrics",
+            help="Write the calls, latencies, errors, throttles, retries and bytes sent of every (service, region) "
+                 "to this JSON file at the end, and print the busiest services."
+        ),
+        prometheus_file: str = typer.Option(
+            None, "--prometheus-file", help="Write the same measures to this file in the Prometheus text format."
+        ),
+        live_rates: bool = typer.Option(
+            False, "--live-rates", help="Show the calls per second of the busiest services under the progress bar."
+        ),
+        profile: str = typer.Option(
+            None, "--profile",
+            help="Profile the parse and tag phases and write the profiles to files starting with this prefix "
+                 "(e.g., --profile profile/run): cProfile stats per phase, collapsed stacks and timings."
+        ),
+        role_arn: str = typer.Option(
+            None, "--role-arn",
+            help="IAM role assumed in the account of every resource, with {account} replaced by the account ID "
+                 "(e.g., arn:aws:iam::{account}:role/Tagger)."
+        ),
+        accounts_file: str = typer.Option(
+            None, "--accounts-file",
+            help="JSON file mapping account IDs to the role ARN assumed in them, or null for the default credentials."
+        ),
+        external_id: str = typer.Option(None, "--external-id", help="External ID passed when assuming the roles."),
+        role_session_name: str = typer.Option(
+            None, "--role-session-name", help="Session name of the assumed roles (default: aws-tagger)."
+        ),
+        columnar: bool = typer.Option(
+            False, "--columnar",
+            help="Read the whole input at once and split its ARNs column-wise (faster on very large inputs, "
+                 "uses pyarrow when installed)."
+        ),
+        arn_field: str = typer.Option(
+            None, "--arn-field",
+            help="Dot-separated path of the ARN in every line of the ndjson parser (default: arn)."
+        ),
+        parse_processes: int = typer.Option(
+            None, "--parse-processes",
+            help="Number of processes parsing the wiz input in parallel, by byte ranges aligned to its records."
+        ),
+        unordered: bool = typer.Option(
+            False, "--unordered",
+            help="With --parse-processes, tag the resources of every range as soon as it is parsed, not in file order."
+        ),
+        inventory: str = typer.Option(
+            None, "--inventory", metavar="FILE",
+            help="SQLite file caching the tags of every resource across runs; with --diff, skips the resources "
+                 "known to carry the tags without reading them."
+        ),
+        inventory_ttl: float = typer.Option(
+            None, "--inventory-ttl", metavar="SECONDS",
+            help="Seconds after which the cached tags of a resource are read again (default: a day)."
+        ),
+        verify: bool = typer.Option(
+            False, "--verify",
+            help="Read back the tags of the resources tagged by the run in bulk, and report the ones missing a key "
+                 "or having a different value."
+        ),
+        retag: bool = typer.Option(
+            False, "--retag", help="With --verify, tag the mismatched resources again and verify them once more."
+        ),
+        verify_output: str = typer.Option(
+            None, "--verify-output", help="With --verify, write the mismatched keys of every resource to this JSON file."
+        ),
+        processes: int = typer.Option(
+            None, "--processes", min=1,
+            help="Tag in this number of worker processes, sharded by region, each with its own AWS clients "
+                 "(selects --executor processes, which defaults to one process per core; other executors are rejected)."
+        ),
+        shard_by: str = typer.Option(
+            None, "--shard-by", help="Key the resources are sharded by across processes: region (default) or "
+                                     "service-region."
+        ),
 ):
     """
     Tags AWS resources based on an input file.
@@ -22,17 +180,318 @@ def tag(
         input_file (str): Path to the file with AWS resource ARNs.
         tags_file (str): Path to the file containing tags to apply, provided in JSON format.
         parser_type (str): Type of parser used for processing the file (default: "wiz").
+        workers (int): Number of resources tagged concurrently (default: 1).
+        max_per_service_region (int): Maximum number of concurrent calls per (service, region) pair.
+        limits (List[str]): Per service or per (service, region) overrides of `max_per_service_region`.
+        executor_type (str): The executor used to run the tagging calls (e.g., "threads", "async").
+        bulk (bool): Whether to tag resources through the Resource Groups Tagging API.
+        initial_rate (float): Starting calls per second of the adaptive rate limiter.
+        max_rate (float): Highest calls per second of the adaptive rate limiter.
+        diff (bool): Whether to skip the resources that already carry the requested tags.
+        resume (bool): Whether to skip the resources completed by a previous attempt of the run.
+        retry_failed (bool): Whether to only tag the resources that failed in the previous attempt.
+        journal_dir (str): Directory of the journals recording the outcome of every resource.
+        queue_stats (bool): Whether to print the statistics of every (service, region, account) queue.
+        max_pool_connections (int): Connections kept open by each AWS client.
+        retry_mode (str): Retry mode of the AWS clients (e.g., "standard", "adaptive").
+        connect_timeout (float): Seconds to wait for a connection to AWS.
+        read_timeout (float): Seconds to wait for an AWS response.
+        endpoint_url (str): Endpoint receiving every call instead of AWS.
+        prewarm (bool): Whether to create the AWS clients in the background ahead of their first use.
+        metrics_file (str): Path of the JSON file the metrics of every (service, region) are written to.
+        prometheus_file (str): Path of the file the metrics are written to in the Prometheus text format.
+        live_rates (bool): Whether to show the calls per second of the busiest services while tagging.
+        profile (str): Prefix of the profile files of the parse and tag phases, or None to not profile.
+        role_arn (str): ARN template of the IAM role assumed in the account of every resource.
+        accounts_file (str): Path of the JSON file mapping account IDs to the role assumed in them.
+        external_id (str): External ID passed when assuming the roles.
+        role_session_name (str): Session name of the assumed roles.
+        columnar (bool): Whether to parse and group the ARNs of the whole input at once.
+        arn_field (str): Path of the ARN in every line of the ndjson parser.
+        parse_processes (int): Number of processes parsing the input in parallel.
+        unordered (bool): Whether the resources parsed in parallel are tagged in the order their ranges finish.
+        inventory (str): Path of the SQLite file caching the tags of every resource across runs.
+        inventory_ttl (float): Seconds after which the cached tags of a resource are read again.
+        verify (bool): Whether to read back the tags of the tagged resources and report the mismatched ones.
+        retag (bool): Whether to tag the mismatched resources again.
+        verify_output (str): Path of the JSON file the mismatched keys of every resource are written to.
+        processes (int): Number of worker processes tagging the resources, sharded by region.
+        shard_by (str): Key the resources are sharded by across processes ("region" or "service-region").
 
     Example Usage:
         ```sh
         python main.py tag resources.csv tags.json --parser csv
+        python main.py tag resources.csv tags.json --workers 32 --max-per-service-region 8 --limit ec2=16
+        python main.py tag resources.csv tags.json --executor async --workers 2000 --max-per-service-region 50
+        python main.py tag resources.csv tags.json --workers 32 --resume
+        python main.py tag resources.csv tags.json --workers 32 --metrics metrics.json --live-rates
+        python main.py tag resources.csv tags.json --workers 32 --profile profile/run
+        python main.py tag resources.csv tags.json --workers 64 --role-arn "arn:aws:iam::{account}:role/Tagger"
+        python main.py tag resources.csv tags.json --workers 64 --columnar
+        python main.py tag arns.txt.gz tags.json --parser arns --workers 32
+        python main.py tag config.ndjson.zst tags.json --parser ndjson --arn-field configurationItem.ARN
+        python main.py tag resources.csv tags.json --workers 64 --parse-processes 8 --unordered
+        python main.py tag resources.csv tags.json --workers 32 --diff --inventory ~/.aws-tagger/inventory.db
+        python main.py tag resources.csv tags.json --workers 32 --verify --retag
+        python main.py tag resources.csv tags.json --workers 256 --processes 8
         ```
 
     Notes:
         - The `parser_type` should be registered in the application's parser registry.
         - Ensure the tags_file are properly formatted JSON strings.
     """
-    tag_resources(input_file, tags_file, parser_type)
+    if processes and executor_type not in (None, "processes"):
+        raise typer.BadParameter(f"cannot be used with --executor {executor_type}.", param_hint="'--processes'")
+    _check_limits(limits)
+    if executor_type == "async" and importlib.util.find_spec("aiobotocore") is None:
+        raise typer.BadParameter(f"async requires aiobotocore: pip install '{AIOBOTOCORE_REQUIREMENT}'",
+                                 param_hint="'--executor'")
+    tag_resources(
+        input_file, tags_file, parser_type,
+        workers=workers, max_per_service_region=max_per_service_region, limits=limits, executor_type=executor_type,
+        bulk=bulk, initial_rate=initial_rate, max_rate=max_rate, diff=diff, resume=resume, retry_failed=retry_failed,
+        journal_dir=journal_dir, queue_stats=queue_stats, max_pool_connections=max_pool_connections,
+        retry_mode=retry_mode, connect_timeout=connect_timeout, read_timeout=read_timeout, endpoint_url=endpoint_url,
+        prewarm=prewarm, metrics_file=metrics_file, prometheus_file=prometheus_file, live_rates=live_rates,
+        profile=profile, role_arn=role_arn, accounts_file=accounts_file, external_id=external_id,
+        role_session_name=role_session_name, columnar=columnar, arn_field=arn_field, parse_processes=parse_processes,
+        unordered=unordered, inventory=inventory, inventory_ttl=inventory_ttl, verify=verify, retag=retag,
+        verify_output=verify_output, processes=processes, shard_by=shard_by,
+    )
+
+
+@app.command("verify")
+def verify_command(
+        input_file: str = typer.Argument(..., help="Path to the input file containing AWS resource ARNs."),
+        tags_file: str = typer.Argument(..., help="Path to the file containing the list of tags that should be applied."),
+        parser_type: str = typer.Option("wiz", "--parser", help="Type of parser to use (wiz, arns or ndjson)."),
+        workers: int = typer.Option(8, "--workers", min=1, help="Number of calls sent concurrently, across regions."),
+        retag: bool = typer.Option(
+            False, "--retag", help="Tag the mismatched resources again, then verify them once more."
+        ),
+        journal_dir: str = typer.Option(
+            DEFAULT_JOURNAL_DIR, "--journal-dir", help="Directory of the journals recording the outcome of every run."
+        ),
+        output: str = typer.Option(
+            None, "--output", help="Write the mismatched keys of every resource to this JSON file."
+        ),
+        bulk: bool = typer.Option(
+            False, "--bulk", help="With --retag, tag resources through the Resource Groups Tagging API."
+        ),
+        initial_rate: float = typer.Option(
+            None, "--initial-rate", min=0.1, help="Calls per second each (service, region, account) starts at."
+        ),
+        max_rate: float = typer.Option(
+            None, "--max-rate", min=0.1, help="Highest calls per second each (service, region, account) may reach."
+        ),
+        endpoint_url: str = typer.Option(
+            None, "--endpoint-url", help="Send every call to this endpoint instead of AWS (e.g., a local test server)."
+        ),
+        role_arn: str = typer.Option(
+            None, "--role-arn", help="IAM role assumed in the account of every resource, with {account} replaced."
+        ),
+        accounts_file: str = typer.Option(
+            None, "--accounts-file", help="JSON file mapping account IDs to the role ARN assumed in them."
+        ),
+        external_id: str = typer.Option(None, "--external-id", help="External ID passed when assuming the roles."),
+        role_session_name: str = typer.Option(
+            None, "--role-session-name", help="Session name of the assumed roles (default: aws-tagger)."
+        ),
+        arn_field: str = typer.Option(
+            None, "--arn-field", help="Dot-separated path of the ARN in every line of the ndjson parser (default: arn)."
+        ),
+):
+    """
+    Verifies that the resources of a run carry the requested tags, reading them back in bulk.
+
+    The resources recorded as tagged in the journal of the run are verified, or every resource of the input
+    file when there is no journal. The command exits with code 1 when a resource is missing a tag.
+
+    Args:
+        input_file (str): Path to the file with AWS resource ARNs.
+        tags_file (str): Path to the file containing the tags that should be applied, in JSON format.
+        parser_type (str): Type of parser used for processing the file (default: "wiz").
+        workers (int): Number of calls sent concurrently, across regions (default: 8).
+        retag (bool): Whether to tag the mismatched resources again.
+        journal_dir (str): Directory of the journals recording the outcome of every resource.
+        output (str): Path of the JSON file the mismatched keys of every resource are written to.
+        bulk (bool): Whether to tag the mismatched resources through the Resource Groups Tagging API.
+        initial_rate (float): Starting calls per second of the adaptive rate limiter.
+        max_rate (float): Highest calls per second of the adaptive rate limiter.
+        endpoint_url (str): Endpoint receiving every call instead of AWS.
+        role_arn (str): ARN template of the IAM role assumed in the account of every resource.
+        accounts_file (str): Path of the JSON file mapping account IDs to the role assumed in them.
+        external_id (str): External ID passed when assuming the roles.
+        role_session_name (str): Session name of the assumed roles.
+        arn_field (str): Path of the ARN in every line of the ndjson parser.
+
+    Example Usage:
+        ```sh
+        python main.py verify resources.csv tags.json --workers 16 --output mismatches.json
+        python main.py verify resources.csv tags.json --workers 16 --retag
+        ```
+    """
+    if not verify_tags(
+        input_file, tags_file, parser_type,
+        workers=workers, retag=retag, journal_dir=journal_dir, output=output, bulk=bulk, initial_rate=initial_rate,
+        max_rate=max_rate, endpoint_url=endpoint_url, role_arn=role_arn, accounts_file=accounts_file,
+        external_id=external_id, role_session_name=role_session_name, arn_field=arn_field,
+    ):
+        raise typer.Exit(1)
+
+
+@app.command()
+def serve(
+        socket_path: str = typer.Option(
+            None, "--socket", help="Unix socket the daemon listens on (default: .aws-tagger/daemon.sock)."
+        ),
+        port: int = typer.Option(
+            None, "--port", help="Listen on this TCP port of 127.0.0.1 instead of a Unix socket."
+        ),
+        workers: int = typer.Option(1, "--workers", min=1, help="Number of resources tagged concurrently."),
+        max_per_service_region: int = typer.Option(
+            None, "--max-per-service-region", min=1,
+            help="Maximum number of concurrent tagging calls for each (service, region) pair."
+        ),
+        limits: List[str] = typer.Option(
+            None, "--limit", help="Concurrency limit override for a service or a service in a region. Can be repeated."
+        ),
+        bulk: bool = typer.Option(
+            False, "--bulk", help="Tag resources in batches of 20 through the Resource Groups Tagging API."
+        ),
+        linger_ms: float = typer.Option(
+            50, "--linger-ms", min=0,
+            help="Milliseconds a partial batch waits for the resources of other jobs before it is tagged."
+        ),
+        initial_rate: float = typer.Option(
+            None, "--initial-rate", min=0.1, help="Calls per second each (service, region, account) starts at."
+        ),
+        max_rate: float = typer.Option(
+            None, "--max-rate", min=0.1, help="Highest calls per second each (service, region, account) may reach."
+        ),
+        max_pool_connections: int = typer.Option(
+            None, "--max-pool-connections", min=1, help="Connections kept open by each AWS client."
+        ),
+        retry_mode: str = typer.Option(None, "--retry-mode", help="Retry mode of the AWS clients."),
+        endpoint_url: str = typer.Option(
+            None, "--endpoint-url", help="Send every call to this endpoint instead of AWS (e.g., a local test server)."
+        ),
+        role_arn: str = typer.Option(
+            None, "--role-arn", help="IAM role assumed in the account of every resource, with {account} replaced."
+        ),
+        accounts_file: str = typer.Option(
+            None, "--accounts-file", help="JSON file mapping account IDs to the role ARN assumed in them."
+        ),
+        external_id: str = typer.Option(None, "--external-id", help="External ID passed when assuming the roles."),
+        role_session_name: str = typer.Option(
+            None, "--role-session-name", help="Session name of the assumed roles (default: aws-tagger)."
+        ),
+        warm: List[str] = typer.Option(
+            None, "--warm", metavar="SERVICE:REGION",
+            help="Create the client of a service and region at startup (e.g., --warm ec2:us-east-1). Can be repeated."
+        ),
+        inventory: str = typer.Option(
+            None, "--inventory", metavar="FILE", help="SQLite file the tags written by the daemon are recorded in."
+        ),
+        inventory_ttl: float = typer.Option(
+            None, "--inventory-ttl", metavar="SECONDS",
+            help="Seconds after which the cached tags of a resource are read again (default: a day)."
+        ),
+        token_file: str = typer.Option(
+            None, "--token-file",
+            help="File the token required on --port is written to (default: .aws-tagger/daemon.token)."
+        ),
+):
+    """
+    Runs a tagging daemon that keeps its AWS clients warm and shares batches between jobs.
+
+    Args:
+        socket_path (str): Path of the Unix socket the daemon listens on.
+        port (int): TCP port of 127.0.0.1 the daemon listens on instead, or None.
+        workers (int): Number of resources tagged concurrently, across every job.
+        max_per_service_region (int): Maximum number of concurrent calls per (service, region) pair.
+        limits (List[str]): Per service or per (service, region) overrides of `max_per_service_region`.
+        bulk (bool): Whether to tag resources through the Resource Groups Tagging API.
+        linger_ms (float): Milliseconds a partial batch waits for the resources of other jobs.
+        initial_rate (float): Starting calls per second of the adaptive rate limiter.
+        max_rate (float): Highest calls per second of the adaptive rate limiter.
+        max_pool_connections (int): Connections kept open by each AWS client.
+        retry_mode (str): Retry mode of the AWS clients (e.g., "standard", "adaptive").
+        endpoint_url (str): Endpoint receiving every call instead of AWS.
+        role_arn (str): ARN template of the IAM role assumed in the account of every resource.
+        accounts_file (str): Path of the JSON file mapping account IDs to the role assumed in them.
+        external_id (str): External ID passed when assuming the roles.
+        role_session_name (str): Session name of the assumed roles.
+        warm (List[str]): The (service, region) pairs whose client is created at startup.
+        inventory (str): Path of the SQLite file the tags written by the daemon are recorded in.
+        inventory_ttl (float): Seconds after which the cached tags of a resource are read again.
+        token_file (str): Path of the file the token required on a TCP port is written to.
+
+    Example Usage:
+        ```sh
+        python main.py serve --workers 64 --bulk --warm ec2:us-east-1 &
+        python main.py submit resources.csv tags.json
+        ```
+    """
+    _check_limits(limits)
+    from daemon import serve as serve_daemon  # Only the daemon commands need its HTTP server
+
+    serve_daemon(
+        socket_path=socket_path, port=port, workers=workers, max_per_service_region=max_per_service_region,
+        limits=limits, bulk=bulk, linger=linger_ms / 1000, initial_rate=initial_rate, max_rate=max_rate,
+        max_pool_connections=max_pool_connections, retry_mode=retry_mode, endpoint_url=endpoint_url, role_arn=role_arn,
+        accounts_file=accounts_file, external_id=external_id, role_session_name=role_session_name, warm=warm,
+        inventory=inventory, inventory_ttl=inventory_ttl, token_file=token_file,
+    )
+
+
+@app.command()
+def submit(
+        input_file: str = typer.Argument(..., help="Path to the input file containing AWS resource ARNs."),
+        tags_file: str = typer.Argument(..., help="Path to the file containing a list of tags to apply, in JSON."),
+        parser_type: str = typer.Option("wiz", "--parser", help="Type of parser to use (wiz, arns or ndjson)."),
+        socket_path: str = typer.Option(
+            None, "--socket", help="Unix socket the daemon listens on (default: .aws-tagger/daemon.sock)."
+        ),
+        port: int = typer.Option(None, "--port", help="Connect to the daemon on this TCP port of 127.0.0.1 instead."),
+        arn_field: str = typer.Option(
+            None, "--arn-field", help="Dot-separated path of the ARN in every line of the ndjson parser (default: arn)."
+        ),
+        output: str = typer.Option(
+            None, "--output", help="Write the outcome of every resource to this file, one JSON object per line."
+        ),
+        token_file: str = typer.Option(
+            None, "--token-file",
+            help="File holding the token of a daemon listening on --port (default: .aws-tagger/daemon.token)."
+        ),
+):
+    """
+    Sends the resources of an input file to a running daemon and waits until they are tagged.
+
+    The command exits with code 1 when a resource could not be tagged.
+
+    Args:
+        input_file (str): Path to the file with AWS resource ARNs.
+        tags_file (str): Path to the file containing tags to apply, provided in JSON format.
+        parser_type (str): Type of parser used for processing the file (default: "wiz").
+        socket_path (str): Path of the Unix socket the daemon listens on.
+        port (int): TCP port of 127.0.0.1 the daemon listens on instead, or None.
+        arn_field (str): Path of the ARN in every line of the ndjson parser.
+        output (str): Path of the file the outcome of every resource is written to, or None.
+        token_file (str): Path of the file holding the token of a daemon listening on a TCP port.
+
+    Example Usage:
+        ```sh
+        python main.py submit arns.txt tags.json --parser arns --output results.ndjson
+        ```
+    """
+    from daemon import submit as submit_job
+
+    if not submit_job(
+        input_file, tags_file, parser_type,
+        socket_path=socket_path, port=port, arn_field=arn_field, output=output, token_file=token_file,
+    ):
+        raise typer.Exit(1)
 
 
 if __name__ == "__main__":
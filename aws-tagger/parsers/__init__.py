@@ -1,7 +1 @@
-import os
-import importlib
-
-# Gets all files in the parsers folder
-for module in os.listdir(os.path.dirname(__file__)):
-    if module.endswith(".py") and module != "__init__.py":
-        importlib.import_module(f"parsers.{module[:-3]}")
\ No newline at end of file
+# Parser modules are imported on demand by ParserRegistry, from the PARSER_MODULES manifest in registry.py
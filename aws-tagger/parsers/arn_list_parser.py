@@ -0,0 +1,94 @@
+import mmap
+
+from utils.arn_columns import ArnColumns, gc_paused
+from utils.arn_parser import AWSArnParser
+from utils.file_reader import InputFile
+from .base import BaseParser
+from .registry import ParserRegistry
+
+
+@ParserRegistry.register("arns")
+class ArnListParser(BaseParser):
+    """
+    A parser class for plain lists of AWS resource ARNs, one per line.
+
+    This class extends the `BaseParser` class and is registered in the `ParserRegistry` under the name "arns".
+    Blank lines and lines starting with "#" are skipped, and surrounding whitespace is removed.
+
+    Uncompressed files are memory-mapped and their lines are read directly from the page cache,
+    without going through a text stream. Compressed files are decompressed as they are read.
+
+    Methods:
+        parse(file_path: str) -> list:
+            Parses a file listing AWS resource ARNs.
+        iter_parse(file_path: str) -> Iterator[ParsedArn]:
+            Yields the AWS resource ARNs of the file as its lines are read.
+        parse_columns(file_path: str) -> ArnColumns:
+            Reads every line of the file at once and splits the AWS resource ARNs.
+    """
+
+    def parse(self, file_path: str) -> list:
+        """
+        Parses a file listing AWS resource ARNs, one per line.
+
+        Args:
+            file_path (str): The path to the file.
+
+        Returns:
+            list: The AWS resource ARNs of the file, as `ParsedArn` objects.
+
+        Raises:
+            ValueError: If a line is not a valid ARN.
+        """
+        return list(self.iter_parse(file_path))
+
+    def iter_parse(self, file_path: str):
+        """
+        Yields the AWS resource ARNs of a file as its lines are read.
+
+        Args:
+            file_path (str): The path to the file.
+
+        Yields:
+            ParsedArn: The AWS resource ARNs, in the order of the file.
+
+        Raises:
+            ValueError: If a line is not a valid ARN.
+        """
+        input_file = InputFile(file_path)
+        self.size = input_file.size
+        if input_file.compression:
+            with input_file:
+                for line in input_file.stream:
+                    self.position = input_file.position
+                    arn = line.strip()
+                    if arn and not arn.startswith("#"):
+                        yield AWSArnParser.parse(arn)
+        elif self.size:
+            # Empty files cannot be memory-mapped.
+            with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, "madvise"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                for line in iter(mapped.readline, b""):
+                    self.position = mapped.tell()
+                    arn = line.strip()
+                    if arn and not arn.startswith(b"#"):
+                        yield AWSArnParser.parse(arn.decode())
+        self.position = self.size
+
+    def parse_columns(self, file_path: str) -> ArnColumns:
+        """
+        Reads every line of a file listing AWS resource ARNs at once and splits the ARNs.
+
+        Args:
+            file_path (str): The path to the file.
+
+        Returns:
+            ArnColumns: The AWS resource ARNs of the file, split into their components.
+        """
+        with InputFile(file_path) as input_file, gc_paused():
+            self.size = input_file.size
+            lines = [line.strip() for line in input_file.stream]
+            arns = [arn for arn in lines if arn and not arn.startswith("#")]
+        self.position = self.size
+        return ArnColumns.split(arns)
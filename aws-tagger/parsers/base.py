@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+from utils.arn_columns import ArnColumns
+
 class BaseParser(ABC):
     """
     Abstract base class for implementing a parsing strategy in the Strategy Pattern.
@@ -11,8 +13,28 @@ class BaseParser(ABC):
     The purpose of this interface is to support multiple file formats (e.g., CSV, JSON,
     plain text) by allowing different parser implementations to handle various input structures
     while maintaining a consistent API.
+
+    Parsers can also implement `iter_parse` to yield the ARNs as the file is read, so tagging
+    starts before the whole file is parsed and memory stays flat on large inputs. Streaming
+    parsers keep `position` and `size` up to date, so progress can be reported from the byte
+    offset in the file when the number of resources is not known in advance.
+
+    Parsers can also implement `parse_columns` to read the ARN column of the whole file at once
+    and split it with `ArnColumns`, which is cheaper per resource on very large inputs.
+
+    Attributes:
+        position (int): The number of bytes of the input file read so far by `iter_parse`.
+        size (int): The size of the input file in bytes, or None if the parser does not stream.
     """
 
+    position = 0
+    size = None
+
+    @classmethod
+    def streams(cls) -> bool:
+        """Returns whether the parser yields the ARNs as the file is read."""
+        return cls.iter_parse is not BaseParser.iter_parse
+
     @staticmethod
     @abstractmethod
     def parse(file_path: str) -> list:
@@ -32,3 +54,33 @@ class BaseParser(ABC):
             NotImplementedError: If the method is not implemented in a subclass.
         """
         pass
+
+    def iter_parse(self, file_path: str):
+        """
+        Parses a given file and yields the extracted AWS resource ARNs as they are read.
+
+        The default implementation parses the whole file with `parse` first; streaming parsers
+        override it to yield each ARN as soon as it is read.
+
+        Args:
+            file_path (str): The path to the file that needs to be parsed.
+
+        Yields:
+            str: The AWS Resource ARNs extracted from the input file.
+        """
+        yield from self.parse(file_path)
+
+    def parse_columns(self, file_path: str) -> ArnColumns:
+        """
+        Parses a given file and splits all of its AWS resource ARNs at once.
+
+        The default implementation splits the ARNs returned by `parse`; parsers override it to
+        read the ARN column of the file directly.
+
+        Args:
+            file_path (str): The path to the file that needs to be parsed.
+
+        Returns:
+            ArnColumns: The AWS Resource ARNs extracted from the input file, split into their components.
+        """
+        return ArnColumns.split([str(arn) for arn in self.parse(file_path)])
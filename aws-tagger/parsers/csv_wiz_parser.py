@@ -1,10 +1,28 @@
+import contextlib
 import csv
+import io
+import multiprocessing
+import operator
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-from utils.arn_parser import AWSArnParser
+from utils.arn_columns import ArnColumns, gc_paused
+from utils.arn_parser import AWSArnParser, ParsedArn
+from utils.file_chunks import next_boundary, read_range, record_ranges
+from utils.file_reader import InputFile, detect_compression
+from utils.pipeline import pool_map
 from .base import BaseParser
 from .registry import ParserRegistry
 
 
+# Suffixes of the headers of the columns read from a Wiz export: ARN, region, resource type, name and account
+COLUMN_SUFFIXES = ("providerUniqueId", "region", "nativeType", "Name", "subscriptionExternalId")
+
+# Largest and smallest byte ranges parsed by a worker process in the parallel mode
+MAX_CHUNK_SIZE = 32 << 20
+MIN_CHUNK_SIZE = 1 << 20
+
+
 @ParserRegistry.register("wiz")
 class CSVWizParser(BaseParser):
     """
@@ -14,11 +32,28 @@ class CSVWizParser(BaseParser):
     It reads a CSV file, identifies AWS resource ARNs using a column ending with "providerUniqueId",
     and returns a list of these resource ARNs after applying necessary corrections.
 
+    With more than one process, the file is split into byte ranges aligned to record boundaries
+    (see `record_ranges`), which are parsed and fixed in a pool of worker processes. The ARNs
+    of the ranges are yielded in file order, or as soon as each range is parsed when `ordered`
+    is False. Compressed files are always parsed in a single process, as they cannot be split.
+
     Methods:
         parse(file_path: str) -> list:
             Parses a Wiz-generated CSV file and extracts AWS resource ARNs.
+        iter_parse(file_path: str) -> Iterator[str]:
+            Yields the AWS resource ARNs of a Wiz-generated CSV file as its rows are read.
+        parse_columns(file_path: str) -> ArnColumns:
+            Reads the columns of a Wiz-generated CSV file at once and splits its AWS resource ARNs.
+
+    Attributes:
+        processes (int): The number of worker processes parsing the file.
+        ordered (bool): Whether the ARNs of the parallel mode are yielded in file order.
     """
 
+    def __init__(self, processes: int = None, ordered: bool = True):
+        self.processes = max(1, processes or 1)
+        self.ordered = ordered
+
     @staticmethod
     def parse(file_path: str) -> list:
         """
@@ -32,28 +67,252 @@ class CSVWizParser(BaseParser):
             file_path (str): The file path to the Wiz-generated CSV file.
 
         Returns:
-            list: A list of AWS resource ARNs extracted from the file.
+            list: A list of AWS resource ARNs extracted from the file, as `ParsedArn` objects.
 
         Raises:
             KeyError: If a necessary column (determined by a suffix such as "providerUniqueId") is not found.
         """
-        resources = []
-        with open(file_path, 'r') as file:
-            reader = csv.DictReader(file)
+        return list(CSVWizParser().iter_parse(file_path))
+
+    def iter_parse(self, file_path: str):
+        """
+        Parses a Wiz-generated CSV file and yields its AWS resource ARNs as the rows are read.
+
+        Args:
+            file_path (str): The file path to the Wiz-generated CSV file.
+
+        Yields:
+            ParsedArn: The AWS resource ARNs, after applying the same corrections as `parse`.
+
+        Raises:
+            KeyError: If a necessary column (determined by a suffix such as "providerUniqueId") is not found.
+        """
+        if self.__parallel(file_path):
+            for columns in self.__parse_ranges(file_path):
+                yield from columns.parsed()
+            return
+
+        with InputFile(file_path) as input_file:
+            self.size = input_file.size
+            reader = csv.reader(input_file.stream)
+            header = next(reader, None)
+            if header is None:
+                return
+
+            # Columns are resolved once from the header, then rows are read by position.
+            arn_index = CSVWizParser.__get_column_index(header, "providerUniqueId")
+            region_index = CSVWizParser.__get_column_index(header, "region")
+            type_index = CSVWizParser.__get_column_index(header, "nativeType")
+            name_index = CSVWizParser.__get_column_index(header, "Name")
+            account_index = CSVWizParser.__get_column_index(header, "subscriptionExternalId")
+            width = len(header)
+
             for row in reader:
-                resource_arn = CSVWizParser.__get_column_value(row, "providerUniqueId")
-                region = CSVWizParser.__get_column_value(row, "region")
-                resource_type = CSVWizParser.__get_column_value(row, "nativeType")
-                name = CSVWizParser.__get_column_value(row, "Name")
-                account_id = CSVWizParser.__get_column_value(row, "subscriptionExternalId")
+                if not row:
+                    # Blank lines are skipped, as csv.DictReader does.
+                    continue
+                if len(row) < width:
+                    row += [''] * (width - len(row))
 
                 # Fix the ARN if necessary based on the resource type and other attributes.
-                resource_arn = CSVWizParser.__fix_arn(resource_arn, region, resource_type, name, account_id)
-                resources.append(resource_arn)
-        return resources
+                self.position = input_file.position
+                yield CSVWizParser.__fix_arn(
+                    row[arn_index], row[region_index], row[type_index], row[name_index], row[account_index]
+                )
+            self.position = input_file.size
+
+    def parse_columns(self, file_path: str) -> ArnColumns:
+        """
+        Reads the columns of a Wiz-generated CSV file at once and splits its AWS resource ARNs.
+
+        With pyarrow installed, the columns are read by its multi-threaded CSV reader, otherwise
+        by the csv module. The ARN column is split by `ArnColumns.split`, and only the rows that
+        `__fix_arn` rewrites (ECR repositories, EC2 key pairs and route tables, SES identities and
+        ARNs without an account) are fixed one by one.
+
+        Args:
+            file_path (str): The file path to the Wiz-generated CSV file.
+
+        Returns:
+            ArnColumns: The AWS resource ARNs, after applying the same corrections as `parse`.
+
+        Raises:
+            KeyError: If a necessary column (determined by a suffix such as "providerUniqueId") is not found.
+        """
+        if self.__parallel(file_path):
+            parts = [[], [], [], [], [], []]
+            with gc_paused():
+                for columns in self.__parse_ranges(file_path):
+                    for part, column in zip(parts, (columns.arns, columns.partitions, columns.services,
+                                                    columns.regions, columns.accounts, columns.resources)):
+                        part.extend(column)
+            return ArnColumns(*parts)
+
+        with InputFile(file_path) as input_file:
+            self.size = input_file.size
+            header = next(csv.reader(input_file.stream), None)
+        if header is None:
+            return ArnColumns.split([])
+
+        indices = [CSVWizParser.__get_column_index(header, suffix) for suffix in COLUMN_SUFFIXES]
+        columns = CSVWizParser.__fix_columns(*CSVWizParser.__read_columns(file_path, header, indices))
+        self.position = self.size
+        return columns
+
+    def __parallel(self, file_path: str) -> bool:
+        return self.processes > 1 and detect_compression(file_path) is None
+
+    def __parse_ranges(self, file_path: str):
+        """
+        Parses the byte ranges of a Wiz-generated CSV file in a pool of worker processes.
+
+        Args:
+            file_path (str): The file path to the Wiz-generated CSV file.
+
+        Yields:
+            ArnColumns: The fixed AWS resource ARNs of every range, in file order if `ordered`.
+        """
+        self.size = os.path.getsize(file_path)
+        with open(file_path, "rb") as file:
+            start = next_boundary(file, 0, 0, self.size)
+        header = next(csv.reader(io.StringIO(read_range(file_path, 0, start), newline="")), None)
+        if header is None:
+            return
+        indices = [CSVWizParser.__get_column_index(header, suffix) for suffix in COLUMN_SUFFIXES]
+
+        # Several ranges per process, so that processes finishing early take the next ones.
+        chunk_size = min(MAX_CHUNK_SIZE, max(MIN_CHUNK_SIZE, (self.size - start) // (self.processes * 4)))
+        # Worker processes are spawned rather than forked, as the parser runs next to other threads.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.processes, mp_context=context) as pool:
+            ranges = record_ranges(file_path, start, chunk_size, pool)
+            calls = [(file_path, range_start, range_end, indices, len(header)) for range_start, range_end in ranges]
+            position = start
+            for (_, range_start, range_end, _, _), columns in pool_map(
+                    pool, CSVWizParser._parse_range, calls, self.processes * 2, self.ordered):
+                position += range_end - range_start
+                self.position = position
+                yield ArnColumns(*columns)
+        self.position = self.size
+
+    @staticmethod
+    def _parse_range(file_path: str, start: int, end: int, indices: list, width: int) -> tuple:
+        """
+        Parses and fixes the rows of a byte range of a Wiz-generated CSV file.
+
+        Runs in the worker processes of the parallel mode, which look it up by name.
+
+        Args:
+            file_path (str): The file path to the Wiz-generated CSV file.
+            start (int): The offset of the first record of the range.
+            end (int): The offset after the last record of the range.
+            indices (list): The positions of the columns of `COLUMN_SUFFIXES`.
+            width (int): The number of columns of the header.
+
+        Returns:
+            tuple: The ARN, partition, service, region, account and resource columns of the fixed ARNs.
+        """
+        with gc_paused():
+            reader = csv.reader(io.StringIO(read_range(file_path, start, end), newline=""))
+            columns = CSVWizParser.__fix_columns(*CSVWizParser.__read_rows(reader, indices, width))
+        return columns.arns, columns.partitions, columns.services, columns.regions, columns.accounts, columns.resources
+
+    @staticmethod
+    def __fix_columns(arns, regions: list, types: list, names: list, accounts: list) -> ArnColumns:
+        """
+        Splits the ARN column of a Wiz-generated CSV file, and fixes the rows `__fix_arn` rewrites.
+
+        Only these rows (ECR repositories, EC2 key pairs and route tables, SES identities and
+        ARNs without an account) are fixed one by one.
+
+        Returns:
+            ArnColumns: The fixed AWS resource ARNs.
+        """
+        columns = ArnColumns.split(arns)
+        fixed = set(columns.invalid)
+        fixed.update(index for index, resource_type in enumerate(types) if resource_type == 'repository')
+        fixed.update(index for index, service in enumerate(columns.services) if service == 'workspaces')
+        fixed.update(index for index, account in enumerate(columns.accounts) if not account and accounts[index])
+        for index in sorted(fixed):
+            columns.set(index, CSVWizParser.__fix_arn(
+                columns.arns[index], regions[index], types[index], names[index], accounts[index]
+            ))
+        return columns
+
+    @staticmethod
+    def __read_columns(file_path: str, header: list, indices: list) -> list:
+        """
+        Reads some columns of a CSV file.
+
+        Files pyarrow cannot read (e.g., rows shorter than the header) are read by the csv module.
+        Compressed files are decompressed as they are read, as in `iter_parse`.
+
+        Args:
+            file_path (str): The path of the CSV file.
+            header (list): The column headers of the CSV file, in order.
+            indices (list): The positions of the columns to read.
+
+        Returns:
+            list: One list of strings per column, in the order of `indices`. With pyarrow, the
+                first column is a `pyarrow.ChunkedArray`, to be split without converting it.
+        """
+        try:
+            import pyarrow
+            import pyarrow.csv
+        except ImportError:
+            pyarrow = None
+
+        if pyarrow is not None:
+            # Columns are read by position, as headers may repeat.
+            names = [f"column{index}" for index in range(len(header))]
+            # Compressed files are read through their decompressed stream, whatever their extension.
+            source = InputFile(file_path)
+            try:
+                with source if source.compression else contextlib.nullcontext():
+                    table = pyarrow.csv.read_csv(
+                        source.binary if source.compression else file_path,
+                        read_options=pyarrow.csv.ReadOptions(column_names=names, skip_rows=1),
+                        parse_options=pyarrow.csv.ParseOptions(newlines_in_values=True),
+                        convert_options=pyarrow.csv.ConvertOptions(
+                            include_columns=[names[index] for index in indices],
+                            column_types={names[index]: pyarrow.string() for index in indices},
+                            strings_can_be_null=False, quoted_strings_can_be_null=False,
+                        ),
+                    )
+            except pyarrow.ArrowInvalid:
+                pass
+            else:
+                first, *others = [table.column(names[index]) for index in indices]
+                return [first, *(column.to_pylist() for column in others)]
+
+        with InputFile(file_path) as input_file, gc_paused():
+            reader = csv.reader(input_file.stream)
+            next(reader, None)
+            return CSVWizParser.__read_rows(reader, indices, len(header))
+
+    @staticmethod
+    def __read_rows(reader, indices: list, width: int) -> list:
+        """
+        Reads some columns of the rows of a CSV reader, as lists of strings.
+
+        Blank lines are skipped and short rows padded, as in `iter_parse`.
+
+        Args:
+            reader (Iterable[list]): The rows.
+            indices (list): The positions of the columns to read.
+            width (int): The number of columns of the header.
+
+        Returns:
+            list: One list of values per column, in the order of `indices`.
+        """
+        pick = operator.itemgetter(*indices)
+        rows = [pick(row) if len(row) >= width else pick(row + [''] * (width - len(row))) for row in reader if row]
+        if not rows:
+            return [[] for _ in indices]
+        return [list(column) for column in zip(*rows)]
 
     @staticmethod
-    def __fix_arn(arn: str, region: str, resource_type: str, name: str, account_id: str) -> str:
+    def __fix_arn(arn: str, region: str, resource_type: str, name: str, account_id: str) -> ParsedArn:
         """
         Parses and corrects the ARN based on the resource type and other attributes.
 
@@ -61,6 +320,9 @@ class CSVWizParser(BaseParser):
         the correct ARN string for the resource. For example, it handles ECR repositories,
         EC2 key pairs, EC2 route tables, and adjustments for SES Email Identities.
 
+        ARNs built from the row attributes are assembled directly from their components, so
+        each ARN goes through the regular expression at most once.
+
         Args:
             arn (str): The original ARN string.
             region (str): The AWS region of the resource.
@@ -69,48 +331,57 @@ class CSVWizParser(BaseParser):
             account_id (str): The AWS account ID associated with the resource.
 
         Returns:
-            str: The corrected ARN string.
+            ParsedArn: The corrected and parsed ARN.
         """
         if resource_type == 'repository':
             # This is an ECR Repository
-            return f'arn:aws:ecr:{region}:{account_id}:repository/{name}'
+            resource = f'repository/{name}'
+            return ParsedArn(f'arn:aws:ecr:{region}:{account_id}:{resource}', 'aws', 'ecr', region, account_id, resource)
 
         if arn.startswith('key-'):
             # This is an EC2 Key Pair
-            return f'arn:aws:ec2:{region}:{account_id}:key-pair/{arn}'
+            resource = f'key-pair/{arn}'
+            return ParsedArn(f'arn:aws:ec2:{region}:{account_id}:{resource}', 'aws', 'ec2', region, account_id, resource)
 
         if arn.startswith('rtb-'):
             # This is a Route Table
-            return f'arn:aws:ec2:{region}:{account_id}:route-table/{arn}'
+            resource = f'route-table/{arn}'
+            return ParsedArn(f'arn:aws:ec2:{region}:{account_id}:{resource}', 'aws', 'ec2', region, account_id, resource)
 
-        if AWSArnParser.get_service(arn) == 'workspaces' and AWSArnParser.get_resource_type(arn) == 'ses':
+        parsed = AWSArnParser.parse(arn)
+        if parsed.service == 'workspaces' and parsed.resource_type == 'ses':
             # This is a SES Email Identity; adjust the ARN accordingly.
             arn = arn.replace('ses', 'identity')
             arn = arn.replace('workspaces', 'ses')
-            return arn
+            return AWSArnParser.parse(arn)
+
+        if parsed.account_id is None and account_id:
+            # Some ARNs have no account (e.g., S3 buckets). The account of the row is kept, so the
+            # resource is tagged with the credentials of its account.
+            return ParsedArn(parsed.arn, parsed.partition, parsed.service, parsed.region, account_id, parsed.resource)
 
-        return arn
+        return parsed
 
     @staticmethod
-    def __get_column_value(row: dict, suffix: str) -> str:
+    def __get_column_index(header: list, suffix: str) -> int:
         """
-        Retrieves the value from a CSV row for the column whose header ends with the specified suffix.
+        Retrieves the position of the column whose header ends with the specified suffix.
 
-        This helper method iterates through the keys in the given CSV row (a dictionary)
-        and returns the value of the first column name that ends with the provided suffix.
-        If no matching column is found, it raises a KeyError.
+        This helper method iterates through the column headers of the CSV file and returns the
+        position of the first one that ends with the provided suffix. If no matching column is
+        found, it raises a KeyError.
 
         Args:
-            row (dict): A dictionary representing a row from the CSV file, where keys are column headers.
+            header (list): The column headers of the CSV file, in order.
             suffix (str): The suffix to match in the column header.
 
         Returns:
-            str: The value corresponding to the column with a header ending in the specified suffix.
+            int: The position of the column with a header ending in the specified suffix.
 
         Raises:
             KeyError: If no column with a header ending in the specified suffix is found.
         """
-        column_name = next((col for col in row if col.endswith(suffix)), None)
-        if not column_name:
-            raise KeyError(f"Column ending with '{suffix}' not found in row: {row}")
-        return row[column_name]
+        index = next((i for i, col in enumerate(header) if col.endswith(suffix)), None)
+        if index is None:
+            raise KeyError(f"Column ending with '{suffix}' not found in header: {header}")
+        return index
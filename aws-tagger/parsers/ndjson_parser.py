@@ -0,0 +1,100 @@
+import json
+
+from utils.arn_parser import AWSArnParser
+from utils.file_reader import InputFile
+from .base import BaseParser
+from .registry import ParserRegistry
+
+# Field holding the ARN in AWS Config and Steampipe exports
+DEFAULT_ARN_FIELD = "arn"
+
+
+@ParserRegistry.register("ndjson")
+class NDJSONParser(BaseParser):
+    """
+    A parser class for newline-delimited JSON files holding one AWS resource per line.
+
+    This class extends the `BaseParser` class and is registered in the `ParserRegistry` under the name "ndjson".
+    The ARN of every line is read from `arn_field`, a dot-separated path into the JSON object
+    (e.g., "arn", "configurationItem.ARN" or "resources.0.arn"), where numbers index lists.
+    A path leading to a list of ARNs yields each of them. Lines without the field are skipped,
+    and counted in `skipped`.
+
+    Methods:
+        parse(file_path: str) -> list:
+            Parses an NDJSON file and extracts AWS resource ARNs.
+        iter_parse(file_path: str) -> Iterator[ParsedArn]:
+            Yields the AWS resource ARNs of an NDJSON file as its lines are read.
+
+    Attributes:
+        arn_field (str): The path of the ARN in every JSON object.
+        skipped (int): The number of lines without the field read so far.
+    """
+
+    def __init__(self, arn_field: str = None):
+        self.arn_field = arn_field or DEFAULT_ARN_FIELD
+        self.skipped = 0
+        self._path = [int(key) if key.isdigit() else key for key in self.arn_field.split(".")]
+
+    def parse(self, file_path: str) -> list:
+        """
+        Parses an NDJSON file and extracts AWS resource ARNs.
+
+        Args:
+            file_path (str): The path to the NDJSON file.
+
+        Returns:
+            list: The AWS resource ARNs of the file, as `ParsedArn` objects.
+
+        Raises:
+            ValueError: If a line is not valid JSON, or its field is not a valid ARN.
+        """
+        return list(self.iter_parse(file_path))
+
+    def iter_parse(self, file_path: str):
+        """
+        Yields the AWS resource ARNs of an NDJSON file as its lines are read.
+
+        Args:
+            file_path (str): The path to the NDJSON file.
+
+        Yields:
+            ParsedArn: The AWS resource ARNs, in the order of the file.
+
+        Raises:
+            ValueError: If a line is not valid JSON, or its field is not a valid ARN.
+        """
+        self.skipped = 0
+        with InputFile(file_path) as input_file:
+            self.size = input_file.size
+            for number, line in enumerate(input_file.stream, start=1):
+                self.position = input_file.position
+                if not line.strip():
+                    continue
+                try:
+                    value = self._resolve(json.loads(line))
+                except ValueError as e:
+                    raise ValueError(f"Invalid JSON on line {number} of {file_path}: {e}") from e
+
+                if isinstance(value, str):
+                    yield AWSArnParser.parse(value)
+                elif isinstance(value, list) and value and all(isinstance(arn, str) for arn in value):
+                    for arn in value:
+                        yield AWSArnParser.parse(arn)
+                else:
+                    self.skipped += 1
+            self.position = input_file.size
+
+        if self.skipped:
+            print(f"Skipped {self.skipped} lines of {file_path} without an ARN in '{self.arn_field}'.")
+
+    def _resolve(self, value):
+        # Follows the path of the ARN field, or returns None if a key or index is missing.
+        for key in self._path:
+            if isinstance(key, int) and isinstance(value, list):
+                value = value[key] if key < len(value) else None
+            elif isinstance(value, dict):
+                value = value.get(str(key))
+            else:
+                return None
+        return value
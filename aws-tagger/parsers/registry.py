@@ -1,11 +1,25 @@
+import importlib
+import os
+
 from .base import BaseParser
 
+# Module defining each parser, imported the first time the parser is requested
+PARSER_MODULES = {
+    "wiz": "parsers.csv_wiz_parser",
+    "arns": "parsers.arn_list_parser",
+    "ndjson": "parsers.ndjson_parser",
+}
+
 
 class ParserRegistry:
     """
     A registry class to manage and retrieve parser classes by name.
     This class uses a decorator-based approach to register parser classes.
 
+    Parser modules are imported lazily, from `PARSER_MODULES`, the first time their parser
+    is requested. Names missing from the manifest make every module of the package be
+    imported once, so parsers added without a manifest entry are still found.
+
     Attributes:
         _parsers (dict): A private dictionary to store registered parsers with their names as keys.
 
@@ -18,6 +32,7 @@ class ParserRegistry:
     """
 
     _parsers = {}
+    _scanned = False
 
     @classmethod
     def register(cls, name) -> callable:
@@ -43,26 +58,46 @@ class ParserRegistry:
         return wrapper
 
     @classmethod
-    def get_parser(cls, name: str) -> BaseParser:
+    def get_parser(cls, name: str, **options) -> BaseParser:
         """
         Retrieves an instance of a parser class by its registered name.
 
         Args:
             name (str): The name of the parser class to retrieve.
+            **options: Settings passed to the parser class (e.g., `arn_field` for "ndjson").
 
         Returns:
             BaseParser: An instance of the parser class if found.
 
         Raises:
-            ValueError: If no parser is registered under the given name.
+            ValueError: If no parser is registered under the given name, or it does not accept the options.
 
         Example:
             # Assuming a parser named "json" is registered
             json_parser = ParserRegistry.get_parser("json")
             result = json_parser.parse("data.json")
         """
-        parser_cls = cls._parsers.get(name)
+        parser_cls = cls._find(name)
         if not parser_cls:
             raise ValueError(f"Parser for {name} not found!")
-        return parser_cls()
+        try:
+            return parser_cls(**options)
+        except TypeError as e:
+            raise ValueError(f"Invalid options for parser {name}: {', '.join(options)}") from e
+
+    @classmethod
+    def _find(cls, name: str) -> type:
+        parser_cls = cls._parsers.get(name)
+        if parser_cls is not None:
+            return parser_cls
+
+        module = PARSER_MODULES.get(name)
+        if module:
+            importlib.import_module(module)
+        elif not cls._scanned:
+            cls._scanned = True
+            for file_name in os.listdir(os.path.dirname(__file__)):
+                if file_name.endswith(".py") and file_name not in ("__init__.py", "base.py", "registry.py"):
+                    importlib.import_module(f"parsers.{file_name[:-3]}")
+        return cls._parsers.get(name)
 
@@ -1,7 +1 @@
-import os
-import importlib
-
-# Gets all files in the taggers folder
-for module in os.listdir(os.path.dirname(__file__)):
-    if module.endswith(".py") and module != "__init__.py":
-        importlib.import_module(f"taggers.{module[:-3]}")
\ No newline at end of file
+# Tagger modules are imported on demand by TaggerRegistry, from the TAGGER_MODULES manifest in registry.py
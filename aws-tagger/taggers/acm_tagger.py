@@ -1,15 +1,11 @@
-import boto3
 from .base import AwsResourceTagger
 from .registry import TaggerRegistry
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging ACM Certificates
 @TaggerRegistry.register("acm")
 class ACMTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.acm = boto3.client('acm', region_name=region)
+    service_name = 'acm'
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.acm.add_tags_to_certificate(CertificateArn=arn, Tags=tags)
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'add_tags_to_certificate', {'CertificateArn': arn.arn, 'Tags': tags}
\ No newline at end of file
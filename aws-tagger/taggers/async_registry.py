@@ -0,0 +1,132 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
+from .base import AwsResourceTagger
+from .registry import TaggerRegistry
+from utils.clients import AIOBOTOCORE_REQUIREMENT, ClientFactory, leave_throttles_to_limiter
+from utils.metrics import MetricsRegistry
+
+
+class AsyncTaggerRegistry:
+    """
+    Asyncio-aware counterpart of `TaggerRegistry`.
+
+    Taggers are looked up in `TaggerRegistry`, but the instances returned by this registry
+    are bound to aiobotocore clients, so their `tag_resource_async` method sends the requests
+    on the running event loop instead of blocking a thread. Taggers that do not implement
+    `tag_request` are taken from `TaggerRegistry` and run in a thread.
+
+    Unlike `TaggerRegistry`, instances are tied to the event loop that created their clients,
+    so a registry is created for every run and must be closed when the run is finished:
+
+        async with AsyncTaggerRegistry() as registry:
+            tagger = await registry.get_tagger("ec2", "eu-west-1")
+            await tagger.tag_resource_async(arn, tags)
+
+    Attributes:
+        _instances (dict): A dictionary to cache tagger instances, keyed by (account, resource type, region).
+            Accounts without a role share the instances, and clients, of the default credentials, keyed by None.
+        _lock (asyncio.Lock): A lock that prevents creating the same client twice.
+        _exit_stack (AsyncExitStack): Closes the aiobotocore clients when the registry is closed.
+        _sessions (dict): The aiobotocore session of every account whose role is assumed, None being
+            the session of the default credentials.
+    """
+
+    def __init__(self):
+        self._instances = {}
+        self._lock = asyncio.Lock()
+        self._exit_stack = AsyncExitStack()
+        self._sessions = {}
+
+    async def __aenter__(self) -> "AsyncTaggerRegistry":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes every client created by the registry."""
+        await self._exit_stack.aclose()
+        self._instances.clear()
+
+    async def get_tagger(self, resource_type: str, region: str, account: str = None) -> AwsResourceTagger:
+        """
+        Retrieves the tagger instance for a given AWS resource type, region and account.
+
+        Args:
+            resource_type (str): The type of AWS resource (e.g., "ec2", "s3").
+            region (str): The AWS region for which the tagger should be used.
+            account (str): The AWS account ID of the resources, or None for the default credentials.
+
+        Returns:
+            AwsResourceTagger: An instance of the registered tagger class, unique per account, resource type
+                and region.
+
+        Raises:
+            ValueError: If no tagger is registered for the given resource type.
+            ImportError: If aiobotocore is not installed.
+        """
+        key = (ClientFactory.account_key(account), resource_type, region)
+        instance = self._instances.get(key)
+        if instance:
+            return instance
+
+        tagger_cls = TaggerRegistry.get_tagger_class(resource_type)
+        async with self._lock:
+            if key not in self._instances:
+                if tagger_cls.supports_async():
+                    start = time.perf_counter()
+                    client = await self._exit_stack.enter_async_context(
+                        self._create_client(tagger_cls.service_name, region, key[0])
+                    )
+                    leave_throttles_to_limiter(client, asynchronous=True)
+                    self._instances[key] = tagger_cls(region, client=client, account=key[0])
+                    MetricsRegistry.record_setup(tagger_cls.service_name, region, time.perf_counter() - start)
+                else:
+                    self._instances[key] = TaggerRegistry.get_tagger(resource_type, region, account)
+            return self._instances[key]
+
+    def _create_client(self, service: str, region: str, account: str = None):
+        session = self._get_session(account)  # Raises the ImportError explaining how to install aiobotocore
+        from aiobotocore.config import AioConfig
+
+        return session.create_client(
+            service, region_name=region, config=ClientFactory.build_config(AioConfig),
+            endpoint_url=ClientFactory.endpoint_url(service),
+        )
+
+    def _get_session(self, account: str = None):
+        account = ClientFactory.account_key(account)
+        if account not in self._sessions:
+            try:
+                from aiobotocore.session import get_session
+            except ImportError as e:
+                raise ImportError(f'The asyncio backend requires aiobotocore: pip install "{AIOBOTOCORE_REQUIREMENT}"') from e
+            session = get_session()
+            if account is not None:
+                session.register_component("credential_provider", _AssumedRoleProvider(account))
+            self._sessions[account] = session
+        return self._sessions[account]
+
+
+class _AssumedRoleProvider:
+    """
+    An aiobotocore credential provider returning the refreshable credentials of an assumed role.
+
+    The credentials are fetched by the `AssumeRole` fetcher of `ClientFactory` in a thread, so
+    both backends share the same cached credentials of every account.
+    """
+
+    def __init__(self, account: str):
+        self.account = account
+
+    async def load_credentials(self):
+        from aiobotocore.credentials import AioDeferredRefreshableCredentials
+
+        fetcher = await asyncio.to_thread(ClientFactory.credential_fetcher, self.account)
+
+        async def refresh():
+            return await asyncio.to_thread(fetcher.fetch_credentials)
+
+        return AioDeferredRefreshableCredentials(refresh_using=refresh, method="assume-role")
@@ -1,18 +1,11 @@
-import boto3
 from .base import AwsResourceTagger
 from .registry import TaggerRegistry
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging Athena Resources
 @TaggerRegistry.register("athena")
 class AthenaTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.athena = boto3.client('athena', region_name=region)
+    service_name = 'athena'
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.athena.tag_resource(
-                ResourceARN=arn,
-                Tags=tags
-            )
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'tag_resource', {'ResourceARN': arn.arn, 'Tags': tags}
\ No newline at end of file
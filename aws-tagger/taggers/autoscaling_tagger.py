@@ -1,21 +1,25 @@
-import boto3
 from .base import AwsResourceTagger
 from utils.tag_formatter import adapt_autoscaling_tags
 from .registry import TaggerRegistry
-from utils.arn_parser import AWSArnParser
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging Autoscaling Resources
 @TaggerRegistry.register("autoscaling")
 class AutoscalingTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.autoscaling = boto3.client('autoscaling', region_name=region)
+    service_name = 'autoscaling'
+    max_batch_size = 20  # Keeps the tag list of each CreateOrUpdateTags call small
 
-    def tag_resource(self, arn: str, tags: list):
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
         # The only supported value for resource_type is `auto-scaling-group`.
-        try:
-            self.autoscaling.create_or_update_tags(
-                Tags=adapt_autoscaling_tags(tags, AWSArnParser.get_resource_id(arn),
-                                            'auto-scaling-group')
-            )
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+        return 'create_or_update_tags', {
+            'Tags': adapt_autoscaling_tags(tags, arn.resource_id, 'auto-scaling-group')
+        }
+
+    def tag_batch_request(self, arns: list, tags: list) -> tuple:
+        return 'create_or_update_tags', {
+            'Tags': [
+                tag
+                for arn in arns
+                for tag in adapt_autoscaling_tags(tags, arn.resource_id, 'auto-scaling-group')
+            ]
+        }
\ No newline at end of file
@@ -1,30 +1,325 @@
-from abc import ABC, abstractmethod
+import asyncio
+import time
+from abc import ABC
+
+from utils.arn_parser import AWSArnParser, ParsedArn
+from utils.clients import ClientFactory
+from utils.inventory import TagInventory
+from utils.metrics import MetricsRegistry
+from utils.rate_limiter import RateLimiterRegistry, is_throttling_error
+
+# Error codes of batch calls rejected because of one of their resources (e.g., a deleted or malformed resource)
+RESOURCE_ERROR_CODES = {
+    'ValidationError', 'ValidationException', 'InvalidParameter', 'InvalidParameterValue', 'InvalidParameterException',
+    'InvalidParameterCombination', 'InvalidInput', 'InvalidInputException', 'InvalidID', 'ResourceNotFoundException',
+}
+
+
+def is_resource_error(error: Exception) -> bool:
+    """
+    Returns whether a batch call was rejected because of some of its resources, rather than its
+    credentials, rate or endpoint, so tagging the resources in smaller batches may succeed.
+
+    Args:
+        error (Exception): The exception raised by the call.
+
+    Returns:
+        bool: True if the error code is one of `RESOURCE_ERROR_CODES`, or reports a resource
+            that is missing or malformed (e.g., `InvalidInstanceID.NotFound`).
+    """
+    response = getattr(error, 'response', None) or {}
+    code = response.get('Error', {}).get('Code') or ''
+    return code in RESOURCE_ERROR_CODES or code.endswith(('.NotFound', '.Malformed'))
+
 
 class AwsResourceTagger(ABC):
     """
     Abstract base class to handle tagging of AWS resources.
 
-    Subclasses must implement a constructor that accepts a `region` parameter,
-    even if it is not used internally.
+    Subclasses declare the boto3 service they talk to in `service_name` and implement
+    `tag_request`, which describes the API call that tags a resource. The same description
+    is run with a boto3 client by `tag_resource` and with an aiobotocore client by
+    `tag_resource_async`, so every tagger works with both the threaded and the asyncio backends.
+
+    Subclasses that override `tag_resource` instead of implementing `tag_request` are still
+    supported; the asyncio backend runs them in a thread.
+
+    Services whose tagging API accepts many resources in a single call can also set
+    `max_batch_size` and implement `tag_batch_request`, which `tag_resources` uses to tag
+    up to `max_batch_size` resources per call.
+
+    Every call goes through `send` (or `send_async`), which paces it with the adaptive rate
+    limiter shared by all the calls to the same API, region and account, and sends throttled
+    calls again after a jittered backoff instead of dropping them. When metrics are enabled,
+    `send` also records the latency and outcome of every call in `MetricsRegistry`. The tags
+    of the resources tagged successfully are recorded in the `TagInventory`, when enabled.
+
+    Attributes:
+        service_name (str): The name of the boto3 service used to tag the resources (e.g., 'ec2').
+        max_batch_size (int): The maximum number of resources tagged in a single call.
     """
 
-    @abstractmethod
-    def __init__(self, region: str):
+    service_name = None
+    max_batch_size = 1
+
+    def __init__(self, region: str, client=None, account: str = None):
         """
-        Constructor that must be implemented by all subclasses.
+        Creates the tagger and its client.
 
         Args:
             region (str): The AWS region where the resource is located.
+            client: The client used to send the requests. The boto3 client of `service_name`
+                shared through `ClientFactory` is used when it is not provided.
+            account (str): The AWS account ID of the resources, whose role the client assumes
+                when one is configured, or None for the default credentials.
+        """
+        self.region = region
+        self.account = account
+        if client is None:
+            client = ClientFactory.get_client(self.service_name, region, account)
+        self.client = client
+        MetricsRegistry.instrument(self.client, self.service_name, region)
+
+    @classmethod
+    def supports_async(cls) -> bool:
+        """
+        Returns whether the tagger describes its requests through `tag_request`, which is
+        required to send them with an asynchronous client.
+        """
+        return cls.tag_request is not AwsResourceTagger.tag_request
+
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        """
+        Describes the API call that adds tags to a resource.
+
+        Args:
+            arn (ParsedArn): The unique identifier of the AWS resource. `arn.arn` is the ARN string.
+            tags (list): A list of key-value pairs representing the tags to be applied.
+
+        Returns:
+            tuple: The client method name and the keyword arguments to call it with.
+        """
+        raise NotImplementedError
+
+    def tag_batch_request(self, arns: list, tags: list) -> tuple:
+        """
+        Describes the API call that adds tags to several resources at once.
+
+        Only called when `max_batch_size` is greater than 1.
+
+        Args:
+            arns (list): The unique identifiers of the AWS resources as `ParsedArn`, at most `max_batch_size`.
+            tags (list): A list of key-value pairs representing the tags to be applied.
+
+        Returns:
+            tuple: The client method name and the keyword arguments to call it with.
+        """
+        raise NotImplementedError
+
+    def send(self, operation: str, params: dict, arn: str):
+        """
+        Sends a call with the client, paced by the rate limiter of its API, region and account.
+
+        Throttled calls slow the limiter down and are sent again after a jittered backoff,
+        up to `RateLimiterRegistry.max_attempts` times.
+
+        Args:
+            operation (str): The client method name.
+            params (dict): The keyword arguments of the call.
+            arn (str | ParsedArn): The ARN of a resource the call is about, used to find its account.
+
+        Returns:
+            dict: The response of the call.
+        """
+        limiter = RateLimiterRegistry.get(self.service_name, self.region, AWSArnParser.parse(arn).account_id)
+        metrics = MetricsRegistry.get(self.service_name, self.region) if MetricsRegistry.enabled else None
+        attempt = 0
+        while True:
+            attempt += 1
+            wait = limiter.reserve()
+            time.sleep(wait)
+            start = time.perf_counter()
+            try:
+                response = getattr(self.client, operation)(**params)
+            except Exception as e:
+                if metrics:
+                    metrics.record_call(time.perf_counter() - start, wait, e)
+                if not is_throttling_error(e) or attempt >= RateLimiterRegistry.max_attempts:
+                    raise
+                limiter.on_throttle()
+                if metrics:
+                    metrics.record_resend()
+                time.sleep(RateLimiterRegistry.backoff(attempt))
+                continue
+            if metrics:
+                metrics.record_call(time.perf_counter() - start, wait)
+            limiter.on_success()
+            return response
+
+    async def send_async(self, operation: str, params: dict, arn: str):
+        """
+        Asynchronous counterpart of `send`, to be used with an aiobotocore client.
+
+        Args:
+            operation (str): The client method name.
+            params (dict): The keyword arguments of the call.
+            arn (str | ParsedArn): The ARN of a resource the call is about, used to find its account.
+
+        Returns:
+            dict: The response of the call.
+        """
+        limiter = RateLimiterRegistry.get(self.service_name, self.region, AWSArnParser.parse(arn).account_id)
+        metrics = MetricsRegistry.get(self.service_name, self.region) if MetricsRegistry.enabled else None
+        attempt = 0
+        while True:
+            attempt += 1
+            wait = limiter.reserve()
+            await asyncio.sleep(wait)
+            start = time.perf_counter()
+            try:
+                response = await getattr(self.client, operation)(**params)
+            except Exception as e:
+                if metrics:
+                    metrics.record_call(time.perf_counter() - start, wait, e)
+                if not is_throttling_error(e) or attempt >= RateLimiterRegistry.max_attempts:
+                    raise
+                limiter.on_throttle()
+                if metrics:
+                    metrics.record_resend()
+                await asyncio.sleep(RateLimiterRegistry.backoff(attempt))
+                continue
+            if metrics:
+                metrics.record_call(time.perf_counter() - start, wait)
+            limiter.on_success()
+            return response
+
+    def tag_resource(self, arn, tags: list):
+        """
+        Adds tags to a resource.
+
+        Args:
+            arn (str | ParsedArn): The unique identifier of the AWS resource.
+            tags (list): A list of key-value pairs representing the tags to be applied.
+
+        Returns:
+            Exception: The error that prevented tagging the resource, or None if it was tagged.
+        """
+        try:
+            arn = AWSArnParser.parse(arn)
+            operation, params = self.tag_request(arn, tags)
+            self.send(operation, params, arn)
+        except Exception as e:
+            print(f"Error tagging {arn}: {e}")
+            return e
+        TagInventory.record_written([arn], tags)
+        return None
+
+    def tag_resources(self, arns: list, tags: list) -> dict:
         """
-        pass
+        Adds tags to several resources, using as few calls as the service allows.
 
-    @abstractmethod
-    def tag_resource(self, arn: str, tags: list) -> None:
+        A batch call fails as a whole when any of its resources is rejected (e.g., a deleted
+        instance), so a batch rejected because of its resources is split in halves that are
+        tried again, until the failure is narrowed down to the resources that caused it. Other
+        failures (denied access, expired credentials, throttling, unreachable endpoint) would
+        fail every half the same way, so they are returned for every resource of the batch.
+
+        Args:
+            arns (list): The unique identifiers of the AWS resources, as strings or `ParsedArn`.
+            tags (list): A list of key-value pairs representing the tags to be applied.
+
+        Returns:
+            dict: The errors of the resources that could not be tagged, keyed by `ParsedArn`.
+        """
+        errors = {}
+        batches = list(self._batches(arns))
+        while batches:
+            batch = batches.pop()
+            if len(batch) == 1:
+                error = self.tag_resource(batch[0], tags)
+                if error is not None:
+                    errors[batch[0]] = error
+                continue
+            try:
+                operation, params = self.tag_batch_request(batch, tags)
+                self.send(operation, params, batch[0])
+            except Exception as e:
+                if is_resource_error(e):
+                    batches.extend(self._split(batch))
+                else:
+                    print(f"Error tagging a batch of {len(batch)} resources: {e}")
+                    errors.update(dict.fromkeys(batch, e))
+                continue
+            TagInventory.record_written(batch, tags)
+        return errors
+
+    async def tag_resource_async(self, arn, tags: list):
+        """
+        Asynchronous counterpart of `tag_resource`, to be used with an aiobotocore client.
+
+        Args:
+            arn (str | ParsedArn): The unique identifier of the AWS resource.
+            tags (list): A list of key-value pairs representing the tags to be applied.
+
+        Returns:
+            Exception: The error that prevented tagging the resource, or None if it was tagged.
+        """
+        if not self.supports_async():
+            return await asyncio.to_thread(self.tag_resource, arn, tags)
+
+        try:
+            arn = AWSArnParser.parse(arn)
+            operation, params = self.tag_request(arn, tags)
+            await self.send_async(operation, params, arn)
+        except Exception as e:
+            print(f"Error tagging {arn}: {e}")
+            return e
+        TagInventory.record_written([arn], tags)
+        return None
+
+    async def tag_resources_async(self, arns: list, tags: list) -> dict:
         """
-        Abstract method to add tags to a resource.
+        Asynchronous counterpart of `tag_resources`, to be used with an aiobotocore client.
 
         Args:
-            arn (str): The unique identifier of the AWS resource.
+            arns (list): The unique identifiers of the AWS resources, as strings or `ParsedArn`.
             tags (list): A list of key-value pairs representing the tags to be applied.
+
+        Returns:
+            dict: The errors of the resources that could not be tagged, keyed by `ParsedArn`.
         """
-        pass
+        if not self.supports_async():
+            return await asyncio.to_thread(self.tag_resources, arns, tags)
+
+        errors = {}
+        batches = list(self._batches(arns))
+        while batches:
+            batch = batches.pop()
+            if len(batch) == 1:
+                error = await self.tag_resource_async(batch[0], tags)
+                if error is not None:
+                    errors[batch[0]] = error
+                continue
+            try:
+                operation, params = self.tag_batch_request(batch, tags)
+                await self.send_async(operation, params, batch[0])
+            except Exception as e:
+                if is_resource_error(e):
+                    batches.extend(self._split(batch))
+                else:
+                    print(f"Error tagging a batch of {len(batch)} resources: {e}")
+                    errors.update(dict.fromkeys(batch, e))
+                continue
+            TagInventory.record_written(batch, tags)
+        return errors
+
+    def _batches(self, arns: list):
+        arns = [AWSArnParser.parse(arn) for arn in arns]
+        size = max(1, self.max_batch_size)
+        for start in range(0, len(arns), size):
+            yield arns[start:start + size]
+
+    @staticmethod
+    def _split(batch: list) -> list:
+        middle = len(batch) // 2
+        return [batch[middle:], batch[:middle]]
@@ -1,15 +1,11 @@
-import boto3
 from .base import AwsResourceTagger
 from .registry import TaggerRegistry
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging CloudFront Resources
 @TaggerRegistry.register("cloudfront")
 class CloudfrontTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.cloudfront = boto3.client('cloudfront', region_name=region)
+    service_name = 'cloudfront'
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.cloudfront.tag_resource(Resource=f'{arn}', Tags={"Items": tags})
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'tag_resource', {'Resource': arn.arn, 'Tags': {'Items': tags}}
\ No newline at end of file
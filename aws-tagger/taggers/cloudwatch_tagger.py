@@ -1,15 +1,11 @@
-import boto3
 from .base import AwsResourceTagger
 from .registry import TaggerRegistry
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging Cloudwatch resources
 @TaggerRegistry.register("cloudwatch")
 class CloudwatchTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.cloudwatch = boto3.client('cloudwatch', region_name=region)
+    service_name = 'cloudwatch'
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.cloudwatch.tag_resource(ResourceARN=arn, Tags=tags)
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'tag_resource', {'ResourceARN': arn.arn, 'Tags': tags}
\ No newline at end of file
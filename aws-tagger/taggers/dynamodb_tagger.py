@@ -1,15 +1,11 @@
-import boto3
 from .base import AwsResourceTagger
 from .registry import TaggerRegistry
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging ECS Resources
 @TaggerRegistry.register("dynamodb")
 class DynamoDBTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.dynamodb = boto3.client('dynamodb', region_name=region)
+    service_name = 'dynamodb'
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.dynamodb.tag_resource(ResourceArn=arn, Tags=tags)
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'tag_resource', {'ResourceArn': arn.arn, 'Tags': tags}
\ No newline at end of file
@@ -1,16 +1,15 @@
-import boto3
 from .base import AwsResourceTagger
 from .registry import TaggerRegistry
-from utils.arn_parser import AWSArnParser
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging EC2 Resources
 @TaggerRegistry.register("ec2")
 class EC2Tagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.ec2 = boto3.client('ec2', region_name=region)
+    service_name = 'ec2'
+    max_batch_size = 1000  # CreateTags accepts up to 1000 resource IDs per call
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.ec2.create_tags(Resources=[AWSArnParser.get_resource_id(arn)], Tags=tags)
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'create_tags', {'Resources': [arn.resource_id], 'Tags': tags}
+
+    def tag_batch_request(self, arns: list, tags: list) -> tuple:
+        return 'create_tags', {'Resources': [arn.resource_id for arn in arns], 'Tags': tags}
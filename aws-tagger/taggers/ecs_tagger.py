@@ -1,16 +1,12 @@
-import boto3
 from .base import AwsResourceTagger
 from utils.tag_formatter import adapt_ecs_tags
 from .registry import TaggerRegistry
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging ECS Resources
 @TaggerRegistry.register("ecs")
 class ECSTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.ecs = boto3.client('ecs', region_name=region)
+    service_name = 'ecs'
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.ecs.tag_resource(resourceArn=arn, tags=adapt_ecs_tags(tags))
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'tag_resource', {'resourceArn': arn.arn, 'tags': adapt_ecs_tags(tags)}
\ No newline at end of file
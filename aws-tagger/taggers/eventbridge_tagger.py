@@ -1,15 +1,11 @@
-import boto3
 from .base import AwsResourceTagger
 from .registry import TaggerRegistry
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging Event Bridge resources
 @TaggerRegistry.register("events")
 class EventBridgeTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.events = boto3.client('events', region_name=region)
+    service_name = 'events'
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.events.tag_resource(ResourceARN=arn, Tags=tags)
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'tag_resource', {'ResourceARN': arn.arn, 'Tags': tags}
\ No newline at end of file
@@ -1,16 +1,12 @@
-import boto3
 from .base import AwsResourceTagger
 from utils.tag_formatter import adapt_tags
 from .registry import TaggerRegistry
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging CloudWatch resources
 @TaggerRegistry.register("logs")
 class LogsTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.logs = boto3.client('logs', region_name=region)
+    service_name = 'logs'
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.logs.tag_resource(resourceArn=f'{arn}', tags=adapt_tags(tags))
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'tag_resource', {'resourceArn': arn.arn, 'tags': adapt_tags(tags)}
\ No newline at end of file
@@ -1,15 +1,11 @@
-import boto3
 from .base import AwsResourceTagger
 from .registry import TaggerRegistry
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging RDS resources
 @TaggerRegistry.register("rds")
 class RdsTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.rds = boto3.client('rds', region_name=region)
+    service_name = 'rds'
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.rds.add_tags_to_resource(ResourceName=arn, Tags=tags)
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'add_tags_to_resource', {'ResourceName': arn.arn, 'Tags': tags}
\ No newline at end of file
@@ -1,4 +1,36 @@
+import importlib
+import os
+import threading
+import time
+
 from .base import AwsResourceTagger
+from utils.metrics import MetricsRegistry
+
+# Module defining the tagger of each resource type, imported the first time the type is looked up
+TAGGER_MODULES = {
+    "acm": "taggers.acm_tagger",
+    "apigateway": "taggers.apigateway_tagger",
+    "athena": "taggers.athena_tagger",
+    "autoscaling": "taggers.autoscaling_tagger",
+    "cloudfront": "taggers.cloudfront_tagger",
+    "cloudwatch": "taggers.cloudwatch_tagger",
+    "dynamodb": "taggers.dynamodb_tagger",
+    "ec2": "taggers.ec2_tagger",
+    "ecr": "taggers.ecr_tagger",
+    "ecs": "taggers.ecs_tagger",
+    "events": "taggers.eventbridge_tagger",
+    "lambda": "taggers.lambda_tagger",
+    "logs": "taggers.logs_tagger",
+    "mediaconvert": "taggers.mediaconvert_tagger",
+    "rds": "taggers.rds_tagger",
+    "route53": "taggers.route53_tagger",
+    "route53domains": "taggers.route53domains_tagger",
+    "s3": "taggers.s3_tagger",
+    "ses": "taggers.ses_tagger",
+    "sns": "taggers.sns_tagger",
+    "sqs": "taggers.sqs_tagger",
+    "tagging": "taggers.tagging_api_tagger",
+}
 
 
 class TaggerRegistry:
@@ -9,13 +41,23 @@ class TaggerRegistry:
     tagging different types of AWS resources. It follows the **Registry Pattern**
     to ensure that taggers can be registered and retrieved efficiently.
 
+    Tagger modules are imported lazily: the module of a resource type is looked up in
+    `TAGGER_MODULES` and imported the first time the type is requested, so a run only
+    imports the taggers of the services it meets. Types missing from the manifest make
+    every module of the package be imported once, so taggers added without a manifest
+    entry are still found.
+
     Attributes:
         _taggers (dict): A dictionary mapping resource types (str) to their respective tagger classes.
-        _instances (dict): A dictionary to cache singleton instances for each tagger, keyed by resource type and region.
+        _instances (dict): A dictionary to cache singleton instances for each tagger, keyed by
+            (account, resource type, region).
+        _lock (threading.Lock): A lock that makes the instance cache safe to use from many threads.
     """
 
     _taggers = {}
     _instances = {}  # Dictionary for caching tagger instances
+    _lock = threading.Lock()
+    _scanned = False
 
     @classmethod
     def register(cls, name: str) -> callable:
@@ -30,33 +72,91 @@ class TaggerRegistry:
         return wrapper
 
     @classmethod
-    def get_tagger(cls, resource_type: str, region: str) -> AwsResourceTagger:
+    def get_tagger_class(cls, resource_type: str) -> type:
+        """
+        Retrieves the tagger class registered for a given AWS resource type.
+
+        Args:
+            resource_type (str): The type of AWS resource (e.g., "ec2", "s3").
+
+        Returns:
+            type: The registered subclass of AwsResourceTagger.
+
+        Raises:
+            ValueError: If no tagger is registered for the given resource type.
+        """
+        tagger_cls = cls._find(resource_type)
+        if not tagger_cls:
+            raise ValueError(f"No tagger found for resource type: {resource_type}")
+        return tagger_cls
+
+    @classmethod
+    def get_batch_size(cls, resource_type: str) -> int:
         """
-        Retrieves the tagger instance for a given AWS resource type and region.
+        Returns the maximum number of resources of a given type that are tagged in a single call.
+
+        Unknown resource types are reported as not batchable, so the error is raised when they are tagged.
+
+        Args:
+            resource_type (str): The type of AWS resource (e.g., "ec2", "s3").
+
+        Returns:
+            int: The `max_batch_size` of the registered tagger class, or 1 if there is none.
+        """
+        tagger_cls = cls._find(resource_type)
+        return tagger_cls.max_batch_size if tagger_cls else 1
+
+    @classmethod
+    def get_tagger(cls, resource_type: str, region: str, account: str = None) -> AwsResourceTagger:
+        """
+        Retrieves the tagger instance for a given AWS resource type, region and account.
 
         Args:
             resource_type (str): The type of AWS resource (e.g., "ec2", "s3").
             region (str): The AWS region for which the tagger should be used.
+            account (str): The AWS account ID of the resources, or None for the default credentials.
 
         Returns:
-            AwsResourceTagger: An instance of the registered tagger class, unique per resource type and region.
+            AwsResourceTagger: An instance of the registered tagger class, unique per account, resource type
+                and region.
 
         Raises:
             ValueError: If no tagger is registered for the given resource type.
         """
-        # Build a key combining resource type and region
-        key = f"{resource_type}-{region}"
+        # Build a key combining account, resource type and region
+        key = (account, resource_type, region)
 
         # Check if an instance for this resource type and region already exists
-        if key in cls._instances:
-            return cls._instances[key]
+        instance = cls._instances.get(key)
+        if instance:
+            return instance
 
         # Retrieve the corresponding tagger class
+        tagger_cls = cls.get_tagger_class(resource_type)
+
+        # The instance is created outside of the lock, so that clients of other accounts and regions,
+        # whose creation `ClientFactory` serializes itself, are not held up by this one. When two
+        # threads create the same instance, the first one stored is kept; both share their client.
+        start = time.perf_counter()
+        instance = tagger_cls(region, account=account)
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = instance
+                MetricsRegistry.record_setup(tagger_cls.service_name, region, time.perf_counter() - start)
+            return cls._instances[key]
+
+    @classmethod
+    def _find(cls, resource_type: str) -> type:
         tagger_cls = cls._taggers.get(resource_type)
-        if not tagger_cls:
-            raise ValueError(f"No tagger found for resource type: {resource_type}")
+        if tagger_cls is not None:
+            return tagger_cls
 
-        # Create a new instance passing the region and cache it
-        instance = tagger_cls(region)
-        cls._instances[key] = instance
-        return instance
+        module = TAGGER_MODULES.get(resource_type)
+        if module:
+            importlib.import_module(module)
+        elif not cls._scanned:
+            cls._scanned = True
+            for name in os.listdir(os.path.dirname(__file__)):
+                if name.endswith("_tagger.py"):
+                    importlib.import_module(f"taggers.{name[:-3]}")
+        return cls._taggers.get(resource_type)
@@ -1,15 +1,11 @@
-import boto3
 from .base import AwsResourceTagger
 from .registry import TaggerRegistry
+from utils.arn_parser import ParsedArn
 
 # Concrete class for tagging SNS Resouces
 @TaggerRegistry.register("sns")
 class SNSTagger(AwsResourceTagger):
-    def __init__(self, region: str):
-        self.sns = boto3.client('sns', region_name=region)
+    service_name = 'sns'
 
-    def tag_resource(self, arn: str, tags: list):
-        try:
-            self.sns.tag_resource(ResourceArn=arn, Tags=tags)
-        except Exception as e:
-            print(f"Error tagging {arn}: {e}")
\ No newline at end of file
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return 'tag_resource', {'ResourceArn': arn.arn, 'Tags': tags}
\ No newline at end of file
@@ -0,0 +1,137 @@
+import asyncio
+
+from .base import AwsResourceTagger
+from .registry import TaggerRegistry
+from utils.arn_parser import AWSArnParser, ParsedArn
+from utils.inventory import TagInventory
+from utils.tag_formatter import adapt_tags
+
+
+# Generic tagger that tags resources of any service through the Resource Groups Tagging API
+@TaggerRegistry.register("tagging")
+class TaggingApiTagger(AwsResourceTagger):
+    """
+    Tags resources of most services in bulk with `resourcegroupstaggingapi.tag_resources`.
+
+    The API accepts up to 20 ARNs of any service per call and reports the resources it
+    could not tag in `FailedResourcesMap`. Those resources, and the ones of services the
+    API does not handle, are tagged with the tagger registered for their own service.
+
+    Attributes:
+        unsupported_services (set): Services that are always tagged with their own tagger.
+    """
+
+    service_name = 'resourcegroupstaggingapi'
+    max_batch_size = 20  # TagResources accepts up to 20 ARNs per call
+    max_read_batch_size = 100  # GetResources accepts up to 100 ARNs per call
+    unsupported_services = {'autoscaling', 'route53domains'}
+
+    @classmethod
+    def supports(cls, service: str, region: str) -> bool:
+        """
+        Returns whether resources of a service and region should be tagged through the API.
+
+        The API is regional, so global resources (S3 buckets, CloudFront, Route 53) whose ARN
+        has no region are left to their own tagger. So are services whose own tagger already
+        sends larger batches.
+
+        Args:
+            service (str): The AWS service name (e.g., 'ec2', 's3').
+            region (str): The AWS region, or None for global resources.
+
+        Returns:
+            bool: True if the resources can be tagged in bulk through the API.
+        """
+        return (
+            bool(region)
+            and service not in cls.unsupported_services
+            and TaggerRegistry.get_batch_size(service) < cls.max_batch_size
+        )
+
+    def tag_request(self, arn: ParsedArn, tags: list) -> tuple:
+        return self.tag_batch_request([arn], tags)
+
+    def tag_batch_request(self, arns: list, tags: list) -> tuple:
+        return 'tag_resources', {'ResourceARNList': [arn.arn for arn in arns], 'Tags': adapt_tags(tags)}
+
+    def tag_resource(self, arn, tags: list):
+        return self.tag_resources([arn], tags).get(arn)
+
+    def tag_resources(self, arns: list, tags: list) -> dict:
+        errors = {}
+        for batch in self._batches(arns):
+            try:
+                operation, params = self.tag_batch_request(batch, tags)
+                response = self.send(operation, params, batch[0])
+                failed = list(response.get('FailedResourcesMap', {}))
+            except Exception as e:
+                print(f"Error tagging a batch of {len(batch)} resources with the tagging API: {e}")
+                failed = batch
+            self._record_written(batch, failed, tags)
+
+            for arn in failed:
+                error = self._fallback_tagger(arn).tag_resource(arn, tags)
+                if error is not None:
+                    errors[AWSArnParser.parse(arn)] = error
+        return errors
+
+    async def tag_resource_async(self, arn, tags: list):
+        return (await self.tag_resources_async([arn], tags)).get(arn)
+
+    async def tag_resources_async(self, arns: list, tags: list) -> dict:
+        errors = {}
+        for batch in self._batches(arns):
+            try:
+                operation, params = self.tag_batch_request(batch, tags)
+                response = await self.send_async(operation, params, batch[0])
+                failed = list(response.get('FailedResourcesMap', {}))
+            except Exception as e:
+                print(f"Error tagging a batch of {len(batch)} resources with the tagging API: {e}")
+                failed = batch
+            self._record_written(batch, failed, tags)
+
+            # Failures are expected to be rare, so they go through the boto3 taggers in a thread.
+            for arn in failed:
+                error = await asyncio.to_thread(lambda a=arn: self._fallback_tagger(a).tag_resource(a, tags))
+                if error is not None:
+                    errors[AWSArnParser.parse(arn)] = error
+        return errors
+
+    def get_tags(self, arns: list) -> dict:
+        """
+        Reads the current tags of resources of this tagger's region in bulk with `get_resources`.
+
+        Resources that have never been tagged may be missing from the response, so they are
+        missing from the result too. The tags read are recorded in the `TagInventory`, when enabled.
+
+        Args:
+            arns (list): The ARNs of the resources, all of them in this tagger's region.
+
+        Returns:
+            dict: A dictionary mapping each ARN string found to a dictionary of its tag keys and values.
+        """
+        arns = [str(arn) for arn in arns]
+        current = {}
+        for start in range(0, len(arns), self.max_read_batch_size):
+            params = {'ResourceARNList': arns[start:start + self.max_read_batch_size]}
+            while True:
+                response = self.send('get_resources', params, arns[start])
+                for mapping in response.get('ResourceTagMappingList', []):
+                    current[mapping['ResourceARN']] = adapt_tags(mapping.get('Tags', []))
+                if not response.get('PaginationToken'):
+                    break
+                params['PaginationToken'] = response['PaginationToken']
+        TagInventory.record_read(arns, current)
+        return current
+
+    @staticmethod
+    def _record_written(batch: list, failed: list, tags: list) -> None:
+        # The resources of the batch the API did not report as failed are tagged.
+        if TagInventory.enabled:
+            failed = {str(arn) for arn in failed}
+            TagInventory.record_written([arn for arn in batch if arn.arn not in failed], tags)
+
+    @staticmethod
+    def _fallback_tagger(arn) -> AwsResourceTagger:
+        arn = AWSArnParser.parse(arn)
+        return TaggerRegistry.get_tagger(arn.service, arn.region, arn.account_id)
@@ -0,0 +1,285 @@
+import gc
+from collections import deque
+from contextlib import contextmanager
+
+from utils.arn_parser import AWSArnParser, ParsedArn
+from utils.batching import TagBatch
+
+
+def _arrow():
+    # pyarrow is optional: its string and group-by kernels are used when it is installed.
+    try:
+        import pyarrow
+        import pyarrow.compute
+    except ImportError:
+        return None
+    return pyarrow
+
+
+@contextmanager
+def gc_paused():
+    """
+    Pauses the garbage collector while the `with` block builds large columns.
+
+    Columns hold millions of strings and tuples, and the collections their allocation triggers
+    would scan them again and again, although they cannot form reference cycles.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class ArnColumns:
+    """
+    A column of ARNs split into partition, service, region, account and resource columns at once.
+
+    Parsing ARNs one by one through `AWSArnParser.parse` runs the regular expression and builds
+    a `ParsedArn` per ARN as it is read, which is the CPU ceiling of a run on inputs of millions
+    of resources. `split` splits the whole column instead: with pyarrow installed, through its
+    vectorized regular expression kernel, otherwise with `str.split`, which is several times
+    cheaper than the regular expression. The `ParsedArn` of every row is then built from the
+    columns in a single pass.
+
+    `groups` gives the positions of the rows of every (service, region, account), so batches
+    are built from index arrays instead of buffering the resources one by one, and `batches`
+    yields them in round-robin order across the groups, as the scheduler drains its queues.
+
+    Rows whose ARN does not match the ARN format are listed in `invalid`. Parsers may replace
+    them, or any other row, with `set` (e.g., the rows `CSVWizParser` rebuilds from their
+    other columns).
+
+    Attributes:
+        arns (list): The ARN strings.
+        partitions (list): The partition of every ARN (e.g., 'aws').
+        services (list): The AWS service name of every ARN (e.g., 's3', 'ec2').
+        regions (list): The region of every ARN, empty for global resources.
+        accounts (list): The account ID of every ARN, empty for resources without one.
+        resources (list): The resource part of every ARN (e.g., 'instance/i-0123').
+        invalid (list): The positions of the ARNs not matching the ARN format.
+    """
+
+    def __init__(self, arns: list, partitions: list, services: list, regions: list, accounts: list,
+                 resources: list, invalid: list = None):
+        self.arns = arns
+        self.partitions = partitions
+        self.services = services
+        self.regions = regions
+        self.accounts = accounts
+        self.resources = resources
+        self.invalid = invalid or []
+        self._fixed = {}
+        self._parsed = None
+
+    @classmethod
+    def split(cls, arns) -> "ArnColumns":
+        """
+        Splits a column of ARN strings into their components.
+
+        Args:
+            arns (list | pyarrow.Array | pyarrow.ChunkedArray): The ARN strings.
+
+        Returns:
+            ArnColumns: The components of every ARN, in the order of the input.
+        """
+        pyarrow = _arrow()
+        with gc_paused():
+            if pyarrow is not None:
+                return cls._split_arrow(pyarrow, arns)
+            if not isinstance(arns, list):
+                arns = arns.to_pylist()
+            return cls._split_python(arns)
+
+    @classmethod
+    def from_parsed(cls, arns: list) -> "ArnColumns":
+        """
+        Builds the columns of ARNs already parsed, e.g. the resources left by the journal or `TagDiff`.
+
+        Args:
+            arns (list[str | ParsedArn]): The ARNs.
+
+        Returns:
+            ArnColumns: The components of every ARN, in the order of the input.
+        """
+        arns = [AWSArnParser.parse(arn) for arn in arns]
+        columns = cls(
+            [arn.arn for arn in arns], [arn.partition for arn in arns], [arn.service for arn in arns],
+            [arn.region for arn in arns], [arn.account_id for arn in arns], [arn.resource for arn in arns],
+        )
+        columns._parsed = arns
+        return columns
+
+    @classmethod
+    def _split_python(cls, arns: list) -> "ArnColumns":
+        parts = [arn.split(":", 5) for arn in arns]
+        # Same rules as AWSArnParser.ARN_REGEX: six parts, 'arn' first, and a partition, service and resource.
+        invalid = [
+            index for index, part in enumerate(parts)
+            if len(part) != 6 or part[0] != "arn" or not part[1] or not part[2] or not part[5]
+        ]
+        if invalid:
+            blank = ("", "", "", "", "", "")
+            for index in invalid:
+                parts[index] = blank
+        if not parts:
+            return cls([], [], [], [], [], [], [])
+        _, partitions, services, regions, accounts, resources = map(list, zip(*parts))
+        return cls(list(arns), partitions, services, regions, accounts, resources, invalid)
+
+    @classmethod
+    def _split_arrow(cls, pyarrow, arns) -> "ArnColumns":
+        compute = pyarrow.compute
+        if isinstance(arns, list):
+            arns = pyarrow.array(arns, pyarrow.string())
+        elif isinstance(arns, pyarrow.ChunkedArray):
+            arns = arns.combine_chunks()
+        # The named groups of the regular expression become the fields of a struct, null when it does not match.
+        parts = compute.extract_regex(arns, AWSArnParser.ARN_REGEX.pattern)
+        invalid = compute.indices_nonzero(compute.is_null(parts)).to_pylist()
+
+        def column(name):
+            return compute.fill_null(parts.field(name), "").to_pylist()
+
+        return cls(
+            arns.to_pylist(), column("partition"), column("service"), column("region"), column("account_id"),
+            column("resource"), invalid,
+        )
+
+    def __len__(self) -> int:
+        return len(self.arns)
+
+    def __iter__(self):
+        return iter(self.parsed())
+
+    def set(self, index: int, arn: ParsedArn) -> None:
+        """Replaces the ARN of a row, e.g. with an ARN rebuilt from the other columns of the input."""
+        self.arns[index] = arn.arn
+        self.partitions[index] = arn.partition
+        self.services[index] = arn.service
+        self.regions[index] = arn.region
+        self.accounts[index] = arn.account_id
+        self.resources[index] = arn.resource
+        self._fixed[index] = arn
+        if self._parsed is not None:
+            self._parsed[index] = arn
+
+    def parsed(self) -> list:
+        """
+        Returns the ARN of every row as a `ParsedArn`, built from the columns without the regular expression.
+
+        The objects are built once, in a single pass in input order, which is far cheaper than
+        building them one by one in the order of their groups.
+
+        Raises:
+            ValueError: If an ARN does not match the expected format.
+        """
+        if self._parsed is None:
+            self._check()
+            with gc_paused():
+                parsed = list(map(ParsedArn, self.arns, self.partitions, self.services, self.regions,
+                                  self.accounts, self.resources))
+            for index, arn in self._fixed.items():
+                parsed[index] = arn
+            self._parsed = parsed
+        return self._parsed
+
+    def _check(self) -> None:
+        # Raises the error of AWSArnParser for the first invalid ARN that was not replaced.
+        for index in self.invalid:
+            if index not in self._fixed:
+                AWSArnParser.parse_arn(self.arns[index])
+
+    def groups(self, route: callable = None) -> dict:
+        """
+        Groups the rows by service, region and account.
+
+        Args:
+            route (callable): Returns the name of the tagger used for a given service and region,
+                which the rows are grouped by instead of their service.
+
+        Returns:
+            dict: The positions of the rows, in input order, keyed by (service, region, account).
+                Empty regions and accounts are None, as in `ParsedArn`.
+
+        Raises:
+            ValueError: If an ARN does not match the expected format.
+        """
+        self._check()
+        pyarrow = _arrow()
+        groups = self._group_arrow(pyarrow) if pyarrow is not None else self._group_python()
+        # Keys differing only by empty or missing values, or routed to the same tagger, are merged.
+        merged = {}
+        for (service, region, account), indices in groups.items():
+            region, account = region or None, account or None
+            if route:
+                service = route(service, region)
+            if (service, region, account) in merged:
+                merged[(service, region, account)] = sorted(merged[(service, region, account)] + indices)
+            else:
+                merged[(service, region, account)] = indices
+        return merged
+
+    def counts(self, route: callable = None) -> dict:
+        """Returns the number of rows of every (service, region, account). See `groups`."""
+        return {key: len(indices) for key, indices in self.groups(route).items()}
+
+    def _group_python(self) -> dict:
+        groups = {}
+        for index, key in enumerate(zip(self.services, self.regions, self.accounts)):
+            indices = groups.get(key)
+            if indices is None:
+                groups[key] = [index]
+            else:
+                indices.append(index)
+        return groups
+
+    def _group_arrow(self, pyarrow) -> dict:
+        string = pyarrow.string()
+        table = pyarrow.table({
+            "service": pyarrow.array(self.services, string),
+            "region": pyarrow.array(self.regions, string),
+            "account": pyarrow.array(self.accounts, string),
+            "index": pyarrow.array(range(len(self.arns)), pyarrow.int64()),
+        })
+        # Without threads, the positions of every group keep the order of the input.
+        grouped = table.group_by(["service", "region", "account"], use_threads=False).aggregate([("index", "list")])
+        return {
+            (row["service"], row["region"], row["account"]): row["index_list"]
+            for row in grouped.to_pylist()
+        }
+
+    def batches(self, batch_size_for: callable, route: callable = None):
+        """
+        Yields the rows as batches of resources sharing the same service, region and account.
+
+        Batches are yielded in round-robin order across the (service, region, account) groups,
+        so every queue of the scheduler is fed from the start, whatever the order of the input.
+
+        Args:
+            batch_size_for (callable): Returns the maximum batch size for a given tagger name.
+            route (callable): Returns the name of the tagger used for a given service and region.
+                By default, resources are tagged with the tagger of their own service.
+
+        Yields:
+            TagBatch: The batches of resources, each one holding at most the batch size of its service.
+        """
+        parsed = self.parsed()
+        streams = deque(
+            self._group_batches(parsed, key, indices, max(1, batch_size_for(key[0])))
+            for key, indices in self.groups(route).items()
+        )
+        while streams:
+            stream = streams.popleft()
+            batch = next(stream, None)
+            if batch is not None:
+                yield batch
+                streams.append(stream)
+
+    @staticmethod
+    def _group_batches(parsed: list, key: tuple, indices: list, size: int):
+        service, region, account = key
+        for start in range(0, len(indices), size):
+            yield TagBatch(service, region, [parsed[index] for index in indices[start:start + size]], account)
@@ -1,6 +1,90 @@
 import re
+from functools import lru_cache
 
-import boto3
+
+class ParsedArn:
+    """
+    An AWS ARN split into its components, produced once per ARN by `AWSArnParser.parse`.
+
+    The resource type and ID are only split from the resource part when they are first read.
+    A parsed ARN compares and hashes like its ARN string, so it can be used to look up
+    dictionaries keyed by ARN strings, and `str()` returns the ARN string to send to AWS.
+
+    Attributes:
+        arn (str): The full ARN string.
+        partition (str): The partition (e.g., 'aws').
+        service (str): The AWS service name (e.g., 's3', 'ec2', 'lambda').
+        region (str): The AWS region, or None for global resources.
+        account_id (str): The AWS account ID, or None for resources without one. Parsers may set the
+            account of resources whose ARN has none (e.g., S3 buckets), when their input tells it.
+        resource (str): The resource part of the ARN (e.g., 'instance/i-0123').
+    """
+
+    __slots__ = ("arn", "partition", "service", "region", "account_id", "resource", "_resource_type", "_resource_id")
+
+    def __init__(self, arn: str, partition: str, service: str, region: str, account_id: str, resource: str):
+        self.arn = arn
+        self.partition = partition
+        self.service = service or None
+        self.region = region or None
+        self.account_id = account_id or None
+        self.resource = resource
+        self._resource_type = None
+        self._resource_id = None
+
+    @property
+    def resource_type(self) -> str:
+        """The resource type (e.g., 'instance', 'function', 'bucket'). See `AWSArnParser.get_resource_type`."""
+        if self._resource_type is None:
+            self._split_resource()
+        return self._resource_type
+
+    @property
+    def resource_id(self) -> str:
+        """The resource ID (e.g., an EC2 instance ID). See `AWSArnParser.get_resource_id`."""
+        if self._resource_id is None:
+            self._split_resource()
+        return self._resource_id
+
+    def _split_resource(self) -> None:
+        resource = self.resource
+        separator = "/" if "/" in resource else ":" if ":" in resource else None
+        if separator is None:
+            self._resource_type = self._resource_id = resource
+        else:
+            parts = resource.split(separator)
+            self._resource_type, self._resource_id = parts[0], parts[1]
+
+    def with_account(self, account_id: str) -> "ParsedArn":
+        """
+        Returns a copy of the parsed ARN with another account, e.g. the account a parser knows for an ARN without one.
+
+        The ARN string is unchanged, and parsed ARNs returned by `AWSArnParser.parse` are shared, so they are
+        never modified in place.
+
+        Args:
+            account_id (str): The AWS account ID of the resource.
+
+        Returns:
+            ParsedArn: The parsed ARN with `account_id`, or the same object if the account is unchanged.
+        """
+        if (account_id or None) == self.account_id:
+            return self
+        return ParsedArn(self.arn, self.partition, self.service, self.region, account_id, self.resource)
+
+    def __str__(self) -> str:
+        return self.arn
+
+    def __repr__(self) -> str:
+        return f"ParsedArn({self.arn!r})"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ParsedArn):
+            return self.arn == other.arn
+        return self.arn == other
+
+    def __hash__(self) -> int:
+        return hash(self.arn)
 
 
 class AWSArnParser:
@@ -17,6 +101,30 @@ class AWSArnParser:
     )
     """Regular expression pattern to match and extract components from an AWS ARN."""
 
+    CACHE_SIZE = 65536
+    """Maximum number of parsed ARNs kept by `parse`."""
+
+    @staticmethod
+    def parse(arn) -> ParsedArn:
+        """
+        Parses an AWS ARN into a `ParsedArn`, running the regular expression once per ARN.
+
+        Recently parsed ARNs are kept in a bounded LRU cache, so the same ARN string read
+        again is not parsed twice. A `ParsedArn` is returned as is.
+
+        Args:
+            arn (str | ParsedArn): The ARN to be parsed.
+
+        Returns:
+            ParsedArn: The parsed ARN.
+
+        Raises:
+            ValueError: If the ARN does not match the expected format.
+        """
+        if isinstance(arn, ParsedArn):
+            return arn
+        return _parse_cached(arn)
+
     @staticmethod
     def parse_arn(arn: str) -> dict:
         """
@@ -47,12 +155,12 @@ class AWSArnParser:
         Extracts the AWS service name from the ARN.
 
         Args:
-            arn (str): The ARN string to be parsed.
+            arn (str | ParsedArn): The ARN to be parsed.
 
         Returns:
             str: The AWS service name (e.g., 's3', 'ec2', 'lambda').
         """
-        return AWSArnParser.parse_arn(arn).get("service") or None
+        return AWSArnParser.parse(arn).service
 
     @staticmethod
     def get_region(arn: str) -> str:
@@ -60,12 +168,12 @@ class AWSArnParser:
         Extracts the AWS region from the ARN.
 
         Args:
-            arn (str): The ARN string to be parsed.
+            arn (str | ParsedArn): The ARN to be parsed.
 
         Returns:
             str: The AWS region (e.g., 'us-east-1', 'eu-west-1') or None if not applicable.
         """
-        return AWSArnParser.parse_arn(arn).get("region") or None
+        return AWSArnParser.parse(arn).region
 
     @staticmethod
     def get_account_id(arn: str) -> str:
@@ -73,12 +181,12 @@ class AWSArnParser:
         Extracts the AWS account ID from the ARN.
 
         Args:
-            arn (str): The ARN string to be parsed.
+            arn (str | ParsedArn): The ARN to be parsed.
 
         Returns:
             str: The AWS account ID or None if not applicable.
         """
-        return AWSArnParser.parse_arn(arn).get("account_id") or None
+        return AWSArnParser.parse(arn).account_id
 
     @staticmethod
     def get_resource_type(arn: str) -> str:
@@ -89,17 +197,12 @@ class AWSArnParser:
         or `resourceType:resourceId`. This method extracts the `resourceType` part.
 
         Args:
-            arn (str): The ARN string to be parsed.
+            arn (str | ParsedArn): The ARN to be parsed.
 
         Returns:
             str: The resource type (e.g., 'instance', 'function', 'bucket').
         """
-        resource = AWSArnParser.parse_arn(arn).get("resource")
-        if "/" in resource:
-            return resource.split("/")[0]
-        elif ":" in resource:
-            return resource.split(":")[0]
-        return resource
+        return AWSArnParser.parse(arn).resource_type
 
     @staticmethod
     def get_resource_id(arn: str) -> str:
@@ -114,14 +217,14 @@ class AWSArnParser:
         This method extracts the `resourceId` from the ARN.
 
         Args:
-            arn (str): The ARN string to be parsed.
+            arn (str | ParsedArn): The ARN to be parsed.
 
         Returns:
             str: The resource ID (e.g., an EC2 instance ID, Lambda function name, or S3 bucket name).
         """
-        resource = AWSArnParser.parse_arn(arn).get("resource")
-        if "/" in resource:
-            return resource.split("/")[1]
-        elif ":" in resource:
-            return resource.split(":")[1]
-        return resource
\ No newline at end of file
+        return AWSArnParser.parse(arn).resource_id
+
+
+@lru_cache(maxsize=AWSArnParser.CACHE_SIZE)
+def _parse_cached(arn: str) -> ParsedArn:
+    return ParsedArn(arn, **AWSArnParser.parse_arn(arn))
@@ -0,0 +1,63 @@
+from typing import NamedTuple
+
+from utils.arn_parser import AWSArnParser
+
+
+class TagBatch(NamedTuple):
+    """
+    A group of resources of the same service, region and account that are tagged together.
+
+    Attributes:
+        service (str): The name of the tagger used for the resources, usually their AWS service name (e.g., 'ec2').
+        region (str): The AWS region of the resources, or None for global resources.
+        arns (list): The ARNs of the resources, as `ParsedArn`.
+        account (str): The AWS account ID of the resources, or None when their ARN has none.
+    """
+
+    service: str
+    region: str
+    arns: list
+    account: str = None
+
+
+def batch_resources(resources, batch_size_for: callable, route: callable = None):
+    """
+    Groups a stream of ARNs into batches of resources sharing the same service, region and account.
+
+    Resources of services that are tagged one by one are yielded as soon as they are read.
+    The others are buffered per (service, region, account) until a full batch is available, and
+    the remaining partial batches are yielded once the input is exhausted.
+
+    Args:
+        resources (Iterable[str | ParsedArn]): The AWS resource ARNs.
+        batch_size_for (callable): Returns the maximum batch size for a given tagger name.
+        route (callable): Returns the name of the tagger used for a given service and region.
+            By default, resources are tagged with the tagger of their own service.
+
+    Yields:
+        TagBatch: The batches of resources, each one holding at most the batch size of its service.
+    """
+    batch_sizes = {}
+    buffers = {}
+    for arn in resources:
+        arn = AWSArnParser.parse(arn)
+        service, region, account = arn.service, arn.region, arn.account_id
+        if route:
+            service = route(service, region)
+        if service not in batch_sizes:
+            batch_sizes[service] = batch_size_for(service)
+
+        if batch_sizes[service] <= 1:
+            yield TagBatch(service, region, [arn], account)
+            continue
+
+        key = (service, region, account)
+        buffer = buffers.setdefault(key, [])
+        buffer.append(arn)
+        if len(buffer) >= batch_sizes[service]:
+            yield TagBatch(service, region, buffer, account)
+            buffers[key] = []
+
+    for (service, region, account), buffer in buffers.items():
+        if buffer:
+            yield TagBatch(service, region, buffer, account)
@@ -0,0 +1,446 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.rate_limiter import THROTTLING_ERROR_CODES
+
+# Number of threads creating clients ahead of their first use
+PREWARM_WORKERS = 8
+
+# The aiobotocore release supporting the pinned botocore, with the boto3 release it supports
+AIOBOTOCORE_REQUIREMENT = "aiobotocore[boto3]==2.17.0"
+
+
+class AccountRoles:
+    """
+    The IAM role assumed to tag the resources of every AWS account.
+
+    Roles are given as an ARN template, whose `{account}` placeholder is replaced by the account
+    ID, and as per-account overrides read from a JSON file:
+
+        {
+            "111122223333": "arn:aws:iam::111122223333:role/Tagger",
+            "444455556666": {"role_arn": "arn:aws:iam::444455556666:role/Tagger", "external_id": "secret"},
+            "777788889999": null
+        }
+
+    An account mapped to null, or any account when there is neither a template nor an override,
+    is tagged with the default credentials of the session.
+
+    Attributes:
+        role_arn (str): The ARN template of the role assumed in every account, or None.
+        accounts (dict): The role ARN (or settings) of specific accounts, keyed by account ID.
+        external_id (str): The external ID passed to `AssumeRole`, unless an account sets its own.
+        session_name (str): The role session name, which shows in CloudTrail.
+        duration (int): The lifetime of the assumed role credentials, in seconds, or None for the default.
+    """
+
+    def __init__(self, role_arn: str = None, accounts: dict = None, external_id: str = None,
+                 session_name: str = "aws-tagger", duration: int = None):
+        self.role_arn = role_arn
+        self.accounts = accounts or {}
+        self.external_id = external_id
+        self.session_name = session_name
+        self.duration = duration
+
+    @classmethod
+    def from_file(cls, path: str, **settings) -> "AccountRoles":
+        """
+        Reads the per-account roles from a JSON file.
+
+        Args:
+            path (str): Path of the JSON file mapping account IDs to role ARNs.
+            **settings: The other arguments of `AccountRoles` (e.g., role_arn).
+
+        Returns:
+            AccountRoles: The roles.
+        """
+        with open(path) as file:
+            return cls(accounts=json.load(file), **settings)
+
+    def role_for(self, account: str) -> dict:
+        """
+        Returns the `AssumeRole` parameters of an account.
+
+        Args:
+            account (str): The AWS account ID, or None if unknown.
+
+        Returns:
+            dict: The RoleArn and the other parameters of the call, or None to use the default credentials.
+        """
+        if not account:
+            return None
+        role = self.accounts.get(account, self.role_arn and self.role_arn.format(account=account))
+        if not role:
+            return None
+        if isinstance(role, str):
+            role = {"role_arn": role}
+        params = {"RoleArn": role["role_arn"].format(account=account), "RoleSessionName": self.session_name}
+        external_id = role.get("external_id", self.external_id)
+        if external_id:
+            params["ExternalId"] = external_id
+        if self.duration:
+            params["DurationSeconds"] = self.duration
+        return params
+
+
+class _AssumedRoleProvider:
+    """A botocore credential provider returning the refreshable credentials of an assumed role."""
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+
+    def load_credentials(self):
+        return self.credentials
+
+
+class ClientFactory:
+    """
+    Creates and caches the boto3 clients of every tagger, from a single shared session.
+
+    Creating a client through `boto3.client` goes through the default session and gets a
+    pool of 10 connections, which the worker threads sharing the client then compete for.
+    The factory instead creates every client from the same `boto3.Session`, whose loader
+    keeps the service models already read, with a `botocore.config.Config` sized for the
+    number of workers. Clients are cached per (service, region) and shared by every tagger
+    and thread, as boto3 clients are thread-safe once created; creating them is not, so it
+    happens under a lock.
+
+    Throttling is handled by the adaptive rate limiter of the taggers, which must see every
+    throttled call as soon as it happens. The "standard" and "adaptive" botocore retry modes
+    resend throttled calls too, so the retry handler of every client is replaced by one that
+    leaves them to `AwsResourceTagger.send` (see `leave_throttles_to_limiter`), and botocore
+    only resends calls on network, server and other transient errors. The "legacy" mode keeps
+    retrying throttled calls inside botocore.
+
+    Resources of other accounts are tagged by assuming the role given by `AccountRoles` in
+    their account. Every such account gets its own session, sharing the service models of the
+    default one, whose credentials come from `AssumeRole`. The role is only assumed when the
+    first call is sent for the account, by the worker sending it, so accounts start in
+    parallel, and the credentials are kept for the whole run and refreshed by botocore 15
+    minutes before they expire: a run sends one `AssumeRole` call per account and hour,
+    whatever its number of resources.
+
+    Attributes:
+        _settings (dict): Keyword arguments of the `Config` of new clients.
+        _endpoint_urls (dict): Endpoint URL overrides, keyed by service name, or None for every service.
+        _roles (AccountRoles): The role assumed in every account.
+        _session (boto3.Session): The session of the default credentials.
+        _sessions (dict): The sessions of the accounts whose role is assumed, keyed by account ID.
+        _fetchers (dict): The `AssumeRole` credential fetchers of those accounts, keyed by account ID.
+        _sts_session (botocore.session.Session): The session of the STS clients of the fetchers, apart from the
+            others so that refreshing credentials never waits for the factory lock.
+        _clients (dict): The clients created so far, keyed by (account, service, region).
+        _prewarm_pool (ThreadPoolExecutor): The threads creating clients ahead of their first use.
+    """
+
+    _settings = {
+        "max_pool_connections": 10,
+        "retries": {"mode": "standard", "total_max_attempts": 3},
+        "connect_timeout": 10,
+        "read_timeout": 60,
+        "tcp_keepalive": True,
+    }
+    _endpoint_urls = {}
+    _roles = AccountRoles()
+    _session = None
+    _sessions = {}
+    _fetchers = {}
+    _clients = {}
+    _lock = threading.Lock()
+    _sts_session = None
+    _sts_lock = threading.Lock()
+    _prewarm_pool = None
+
+    @classmethod
+    def configure(cls, max_pool_connections: int = None, retry_mode: str = None, max_attempts: int = None,
+                  connect_timeout: float = None, read_timeout: float = None, endpoint_url: str = None,
+                  endpoint_urls: dict = None, roles: AccountRoles = None) -> None:
+        """
+        Changes the settings of the clients created from now on.
+
+        Args:
+            max_pool_connections (int): The maximum number of connections kept open by each client.
+            retry_mode (str): The botocore retry mode ("standard", "adaptive" or "legacy").
+            max_attempts (int): The number of times botocore sends a call, including the first one.
+            connect_timeout (float): Seconds to wait for a connection to be established.
+            read_timeout (float): Seconds to wait for a response once connected.
+            endpoint_url (str): An endpoint URL used for every service (e.g., a local test server).
+            endpoint_urls (dict): Endpoint URLs of specific services, keyed by service name.
+            roles (AccountRoles): The role assumed in every account.
+        """
+        retries = dict(cls._settings["retries"])
+        if retry_mode is not None:
+            retries["mode"] = retry_mode
+        if max_attempts is not None:
+            retries["total_max_attempts"] = max_attempts
+        settings = {
+            "max_pool_connections": max_pool_connections,
+            "connect_timeout": connect_timeout,
+            "read_timeout": read_timeout,
+        }
+        cls._settings = {
+            **cls._settings, "retries": retries,
+            **{name: value for name, value in settings.items() if value is not None},
+        }
+        if endpoint_url is not None:
+            cls._endpoint_urls[None] = endpoint_url
+        cls._endpoint_urls.update(endpoint_urls or {})
+        if cls._endpoint_urls:
+            # Local endpoints cannot resolve bucket names as subdomains
+            cls._settings["s3"] = {"addressing_style": "path"}
+        if roles is not None:
+            cls._roles = roles
+
+    @classmethod
+    def export_settings(cls) -> dict:
+        """Returns the settings given to `configure`, to configure the factory of another process."""
+        return {"settings": cls._settings, "endpoint_urls": cls._endpoint_urls, "roles": cls._roles}
+
+    @classmethod
+    def import_settings(cls, settings: dict) -> None:
+        """Applies settings returned by `export_settings` in another process."""
+        cls._settings = settings["settings"]
+        cls._endpoint_urls = settings["endpoint_urls"]
+        cls._roles = settings["roles"]
+
+    @classmethod
+    def build_config(cls, config_class: type = None):
+        """
+        Builds the client configuration from the current settings.
+
+        Args:
+            config_class (type): The configuration class, `botocore.config.Config` by default.
+                The asyncio backend passes `aiobotocore.config.AioConfig`.
+
+        Returns:
+            Config: The configuration of new clients.
+        """
+        if config_class is None:
+            from botocore.config import Config as config_class
+        return config_class(**cls._settings)
+
+    @classmethod
+    def endpoint_url(cls, service: str) -> str:
+        """Returns the endpoint URL override of a service, or None to use the AWS endpoint."""
+        return cls._endpoint_urls.get(service, cls._endpoint_urls.get(None))
+
+    @classmethod
+    def account_key(cls, account: str) -> str:
+        """Returns the account whose role the clients of `account` use, or None for the default credentials."""
+        return account if cls._roles.role_for(account) else None
+
+    @classmethod
+    def get_client(cls, service: str, region: str, account: str = None):
+        """
+        Retrieves the client of a service in a region and account, creating it on first use.
+
+        Args:
+            service (str): The boto3 service name (e.g., 'ec2').
+            region (str): The AWS region, or None for the default region of the session.
+            account (str): The AWS account ID of the resources. Accounts without a role share
+                the clients of the default credentials.
+
+        Returns:
+            botocore.client.BaseClient: The client, shared by every caller.
+        """
+        key = (cls.account_key(account), service, region)
+        client = cls._clients.get(key)
+        if client is not None:
+            return client
+
+        with cls._lock:
+            if key not in cls._clients:
+                client = cls._get_session(key[0]).client(
+                    service, region_name=region, config=cls.build_config(), endpoint_url=cls.endpoint_url(service),
+                )
+                cls._clients[key] = leave_throttles_to_limiter(client)
+            return cls._clients[key]
+
+    @classmethod
+    def credential_fetcher(cls, account: str):
+        """
+        Returns the fetcher of the assumed role credentials of an account, or None for the default credentials.
+
+        The fetcher calls `AssumeRole` with the default credentials and caches its result until
+        the credentials are about to expire. It is shared by the sessions of the account, and by
+        the asyncio backend.
+        """
+        account = cls.account_key(account)
+        if account is None:
+            return None
+        with cls._lock:
+            return cls._get_fetcher(account)
+
+    @classmethod
+    def _get_fetcher(cls, account: str):
+        # Must be called while holding the lock.
+        if account not in cls._fetchers:
+            from botocore.credentials import AssumeRoleCredentialFetcher
+
+            source = cls._get_session(None)._session
+            params = dict(cls._roles.role_for(account))
+            role_arn = params.pop("RoleArn")
+            cls._fetchers[account] = AssumeRoleCredentialFetcher(
+                cls._create_sts_client, source.get_credentials(), role_arn, extra_args=params,
+            )
+        return cls._fetchers[account]
+
+    @classmethod
+    def _create_sts_client(cls, service: str, **kwargs):
+        # Called by botocore whenever the credentials of an account are refreshed, which may happen in a thread
+        # holding the factory lock or waiting for it. The STS clients therefore come from a session of their own,
+        # under a lock of their own, so a refresh never waits for the factory lock.
+        with cls._sts_lock:
+            if cls._sts_session is None:
+                import botocore.session
+
+                cls._sts_session = botocore.session.get_session()
+            return cls._sts_session.create_client(
+                service, config=cls.build_config(), endpoint_url=cls.endpoint_url(service), **kwargs
+            )
+
+    @classmethod
+    def prewarm(cls, create: callable, *args) -> None:
+        """
+        Runs `create(*args)` in a background thread, to create a client before it is needed.
+
+        Up to `PREWARM_WORKERS` clients are prepared in parallel, while the input is read and
+        the other clients are already in use. Only their creation from the shared session is
+        serialised, by the factory lock; the rest of `create` (e.g., instrumenting the client of
+        a tagger) runs in parallel.
+
+        Args:
+            create (callable): Creates the client, e.g. `TaggerRegistry.get_tagger`.
+            *args: The arguments of `create`.
+        """
+        with cls._lock:
+            if cls._prewarm_pool is None:
+                cls._prewarm_pool = ThreadPoolExecutor(max_workers=PREWARM_WORKERS, thread_name_prefix="prewarm")
+        cls._prewarm_pool.submit(cls._create_quietly, create, *args)
+
+    @staticmethod
+    def _create_quietly(create: callable, *args) -> None:
+        # Failures are reported when the client is used, with the resources it failed to tag.
+        try:
+            create(*args)
+        except Exception:
+            pass
+
+    @classmethod
+    def session(cls, account: str = None):
+        """
+        Returns the session the clients of an account are created from, e.g. to register botocore event handlers.
+
+        Handlers registered on a session only apply to the clients created afterwards.
+
+        Args:
+            account (str): The AWS account ID, or None for the session of the default credentials.
+        """
+        with cls._lock:
+            return cls._get_session(cls.account_key(account))
+
+    @classmethod
+    def _get_session(cls, account: str = None):
+        # Must be called while holding the lock.
+        if cls._session is None:
+            import boto3  # Imported on first use, as it takes a large share of the startup time
+
+            cls._session = boto3.Session()
+        if account is None:
+            return cls._session
+
+        if account not in cls._sessions:
+            import boto3
+            import botocore.session
+            from botocore.credentials import DeferredRefreshableCredentials
+
+            fetcher = cls._get_fetcher(account)
+            core = botocore.session.get_session()
+            # Service models are shared with the default session instead of being read again.
+            core.register_component("data_loader", cls._session._session.get_component("data_loader"))
+            core.register_component("credential_provider", _AssumedRoleProvider(
+                DeferredRefreshableCredentials(refresh_using=fetcher.fetch_credentials, method="assume-role")
+            ))
+            cls._sessions[account] = boto3.Session(botocore_session=core, region_name=cls._session.region_name)
+        return cls._sessions[account]
+
+
+def leave_throttles_to_limiter(client, asynchronous: bool = False):
+    """
+    Replaces the retry handler of a client by one that does not resend throttled calls.
+
+    The handler keeps the conditions, backoff and retry quota of the botocore "standard"
+    mode (also used by the "adaptive" mode), except that throttling errors are raised at
+    once, for the rate limiter of the taggers to slow down and send the call again. Clients
+    in the "legacy" mode are left unchanged.
+
+    Args:
+        client: A boto3 client, or an aiobotocore client when `asynchronous` is True.
+        asynchronous (bool): Whether the client is an aiobotocore client, whose retry handler is a coroutine.
+
+    Returns:
+        The client.
+    """
+    retries = client.meta.config.retries or {}
+    if retries.get("mode", "standard") not in ("standard", "adaptive"):
+        return client
+    if asynchronous:
+        from aiobotocore.retries.standard import (
+            AioRetryHandler as RetryHandler, AioRetryPolicy as RetryPolicy,
+            AioStandardRetryConditions as StandardRetryConditions,
+        )
+    else:
+        from botocore.retries.standard import RetryHandler, RetryPolicy, StandardRetryConditions
+    from botocore.retries import quota
+    from botocore.retries.standard import (
+        DEFAULT_MAX_ATTEMPTS, ExponentialBackoff, RetryEventAdapter, RetryQuotaChecker,
+    )
+
+    class UnthrottledRetryConditions(StandardRetryConditions):
+        def is_retryable(self, context):
+            if context.get_error_code() in THROTTLING_ERROR_CODES:
+                return False
+            return super().is_retryable(context)
+
+    # Same registration as `botocore.retries.standard.register_retry_handler`, under the same unique ID.
+    event_name = client.meta.service_model.service_id.hyphenize()
+    retry_quota = RetryQuotaChecker(quota.RetryQuota())
+    handler = RetryHandler(
+        retry_policy=RetryPolicy(
+            retry_checker=UnthrottledRetryConditions(
+                max_attempts=retries.get("total_max_attempts", DEFAULT_MAX_ATTEMPTS),
+            ),
+            retry_backoff=ExponentialBackoff(),
+        ),
+        retry_event_adapter=RetryEventAdapter(),
+        retry_quota=retry_quota,
+    )
+    unique_id = f"retry-config-{event_name}"
+    client.meta.events.unregister(f"needs-retry.{event_name}", unique_id=unique_id)
+    client.meta.events.register(f"after-call.{event_name}", retry_quota.release_retry_quota)
+    client.meta.events.register(f"needs-retry.{event_name}", handler.needs_retry, unique_id=unique_id)
+    return client
+
+
+def prewarm_clients(batches, get_tagger: callable):
+    """
+    Passes batches through, creating the tagger of every new (service, region, account) in the background.
+
+    Clients are then created while the input is still being read, instead of delaying the
+    first call sent for each (service, region, account).
+
+    Args:
+        batches (Iterable[TagBatch]): The batches of resources to tag.
+        get_tagger (callable): Creates the tagger of a service, region and account, e.g. `TaggerRegistry.get_tagger`.
+
+    Yields:
+        TagBatch: The batches, unchanged.
+    """
+    seen = set()
+    for batch in batches:
+        key = (batch.service, batch.region, batch.account)
+        if key not in seen:
+            seen.add(key)
+            ClientFactory.prewarm(get_tagger, batch.service, batch.region, batch.account)
+        yield batch
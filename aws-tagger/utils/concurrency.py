@@ -0,0 +1,64 @@
+class ConcurrencyLimits:
+    """
+    Holds the maximum number of in-flight tagging calls allowed per (service, region).
+
+    Limits are resolved from the most specific override to the least specific one:
+    `service:region`, then `service`, then the default limit. A limit of `None` means
+    that the (service, region) pair is only bounded by the global number of workers.
+
+    Attributes:
+        default (int): The limit applied when no override matches, or None for no limit.
+        overrides (dict): A dictionary mapping `(service, region)` tuples to limits. A region
+            of None applies the limit to every region of the service.
+    """
+
+    def __init__(self, default: int = None, overrides: dict = None):
+        self.default = default
+        self.overrides = overrides or {}
+
+    @classmethod
+    def from_specs(cls, specs: list, default: int = None) -> "ConcurrencyLimits":
+        """
+        Builds the limits from command line specifications.
+
+        Args:
+            specs (list): A list of strings formatted as `service=N` or `service:region=N`.
+            default (int): The limit applied when no specification matches.
+
+        Returns:
+            ConcurrencyLimits: The resolved limits.
+
+        Raises:
+            ValueError: If a specification is malformed or its limit is not a positive integer.
+
+        Example:
+            limits = ConcurrencyLimits.from_specs(["ec2=8", "lambda:eu-west-1=2"], default=4)
+        """
+        overrides = {}
+        for spec in specs or []:
+            target, _, value = spec.partition("=")
+            service, _, region = target.partition(":")
+            if not service or not value.isdigit() or int(value) < 1:
+                raise ValueError(f"Invalid concurrency limit: {spec}")
+            overrides[(service, region or None)] = int(value)
+        return cls(default, overrides)
+
+    def overrides_service(self, service: str, region: str) -> bool:
+        """Returns whether an override sets the limit of a service, in the given region or in every region."""
+        return (service, region) in self.overrides or (service, None) in self.overrides
+
+    def get(self, service: str, region: str) -> int:
+        """
+        Returns the limit for a given service and region.
+
+        Args:
+            service (str): The AWS service name (e.g., 'ec2', 's3').
+            region (str): The AWS region, or None for global resources.
+
+        Returns:
+            int: The maximum number of in-flight calls, or None if unbounded.
+        """
+        for key in ((service, region), (service, None)):
+            if key in self.overrides:
+                return self.overrides[key]
+        return self.default
@@ -0,0 +1,109 @@
+import os
+
+# Bytes read at once when scanning a range of a file
+READ_SIZE = 1 << 23
+
+
+def count_quotes(path: str, start: int, end: int) -> int:
+    """
+    Counts the double quotes between two byte offsets of a file.
+
+    Args:
+        path (str): The path of the file.
+        start (int): The offset of the first byte.
+        end (int): The offset after the last byte.
+
+    Returns:
+        int: The number of '"' bytes in the range.
+    """
+    count = 0
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = file.read(min(READ_SIZE, remaining))
+            if not block:
+                break
+            count += block.count(b'"')
+            remaining -= len(block)
+    return count
+
+
+def read_range(path: str, start: int, end: int, encoding: str = "utf-8") -> str:
+    """Reads the text between two byte offsets of a file, which must fall on line boundaries."""
+    with open(path, "rb") as file:
+        file.seek(start)
+        return file.read(end - start).decode(encoding)
+
+
+def record_ranges(path: str, start: int, chunk_size: int, pool=None) -> list:
+    """
+    Splits a CSV file into byte ranges that start and end on record boundaries.
+
+    A newline ends a record unless it is inside a quoted field, i.e. unless an odd number of
+    double quotes comes before it in the file (quotes inside quoted fields are doubled, so
+    they keep the parity). The file is first cut at every `chunk_size` bytes, the quotes of
+    every cut are counted (in `pool` when given, as this reads the whole file), and every cut
+    is then moved to the end of the first record ending after it.
+
+    Args:
+        path (str): The path of the CSV file.
+        start (int): The offset the records start at (e.g., after the header), which must be a record boundary.
+        chunk_size (int): The approximate size of a range in bytes.
+        pool (concurrent.futures.Executor): Counts the quotes of the cuts in parallel, if given.
+
+    Returns:
+        list: The (start, end) byte offsets of the ranges, in file order, covering the file from `start`.
+    """
+    size = os.path.getsize(path)
+    cuts = list(range(start, size, max(1, chunk_size))) + [size]
+    spans = list(zip(cuts, cuts[1:]))
+    if pool is not None:
+        counts = list(pool.map(count_quotes, [path] * len(spans), *zip(*spans))) if spans else []
+    else:
+        counts = [count_quotes(path, span_start, span_end) for span_start, span_end in spans]
+
+    boundaries = [start]
+    quotes = 0  # Quotes between `start` and the current cut
+    with open(path, "rb") as file:
+        for (cut, _), count in zip(spans[1:], counts):
+            quotes += count
+            boundary = next_boundary(file, cut, quotes, size)
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def next_boundary(file, offset: int, quotes: int, size: int) -> int:
+    """
+    Finds the end of the first CSV record ending at or after an offset of a file.
+
+    Args:
+        file (io.BufferedReader): The file, opened in binary mode.
+        offset (int): The offset the search starts at.
+        quotes (int): The number of double quotes before `offset`, from a record boundary.
+        size (int): The size of the file.
+
+    Returns:
+        int: The offset after the first newline outside quotes, or `size` if there is none.
+    """
+    file.seek(offset)
+    position = offset
+    while position < size:
+        block = file.read(READ_SIZE)
+        if not block:
+            break
+        index = 0
+        while True:
+            newline = block.find(b"\n", index)
+            if newline < 0:
+                quotes += block.count(b'"', index)
+                break
+            quotes += block.count(b'"', index, newline)
+            if quotes % 2 == 0:
+                return position + newline + 1
+            index = newline + 1
+        position += len(block)
+    return size
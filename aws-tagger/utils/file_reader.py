@@ -0,0 +1,117 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+
+# Leading bytes of the compressed formats recognized by InputFile
+MAGIC_NUMBERS = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+
+def detect_compression(path: str) -> str:
+    """
+    Returns the compression of a file from its leading bytes.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        str: "gzip", "bz2", "xz" or "zstd", or None if the file is not compressed.
+    """
+    with open(path, "rb") as file:
+        head = file.read(6)
+    return next((name for magic, name in MAGIC_NUMBERS.items() if head.startswith(magic)), None)
+
+
+def _decompress(raw, compression: str):
+    # Returns a binary stream of the decompressed content of a binary stream.
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if compression == "bz2":
+        return bz2.BZ2File(raw, mode="rb")
+    if compression == "xz":
+        return lzma.LZMAFile(raw, mode="rb")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Reading zstd-compressed files requires zstandard: pip install zstandard") from e
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return raw
+
+
+class _CountingReader(io.RawIOBase):
+    """A raw binary stream that counts the bytes read from the wrapped file."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self.raw.readinto(buffer)
+        self.bytes_read += count or 0
+        return count
+
+    def close(self) -> None:
+        self.raw.close()
+        super().close()
+
+
+class InputFile:
+    """
+    Opens an input file as a text stream while keeping track of how far it has been read.
+
+    Text streams do not report their position while they are iterated, so the bytes are
+    counted as they are read from the disk. The position therefore moves in steps of the
+    read buffer size, which is precise enough to report progress on large files.
+
+    Files compressed with gzip, bzip2, xz or zstd (zstd requires the zstandard package) are
+    decompressed transparently as they are read, whatever their extension. The position and
+    size are then those of the compressed file, so progress is still reported against its size.
+
+    Example:
+        with InputFile("resources.csv") as input_file:
+            for line in input_file.stream:
+                print(f"{input_file.position} / {input_file.size} bytes read")
+
+    Attributes:
+        path (str): The path of the file.
+        size (int): The size of the file in bytes.
+        compression (str): The compression of the file ("gzip", "bz2", "xz" or "zstd"), or None.
+        binary (io.BufferedIOBase): The decompressed binary stream, only available inside the `with` block.
+        stream (io.TextIOBase): The text stream, only available inside the `with` block.
+    """
+
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.size = os.path.getsize(path)
+        self.compression = detect_compression(path)
+        self.binary = None
+        self.stream = None
+        self._counter = None
+
+    @property
+    def position(self) -> int:
+        """The number of bytes read from the file so far."""
+        return self._counter.bytes_read if self._counter else 0
+
+    def __enter__(self) -> "InputFile":
+        self._counter = _CountingReader(open(self.path, "rb", buffering=0))
+        self.binary = _decompress(io.BufferedReader(self._counter), self.compression)
+        # newline="" keeps the line endings, as expected by the csv module
+        self.stream = io.TextIOWrapper(self.binary, encoding=self.encoding, newline="")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stream.close()
+        # Decompressors do not close the file they read from.
+        self._counter.close()
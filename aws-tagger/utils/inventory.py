@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.tag_formatter import adapt_tags
+
+# Seconds a cached tag set is trusted by default
+DEFAULT_TTL = 24 * 3600
+
+# Maximum number of ARNs looked up in a single query (SQLite limits the number of parameters)
+LOOKUP_BATCH_SIZE = 500
+
+
+def tags_etag(tags: dict) -> str:
+    """
+    Returns a hash identifying a tag set, whatever the order of its keys.
+
+    Args:
+        tags (dict): The tag keys and values.
+
+    Returns:
+        str: A hexadecimal digest, equal for equal tag sets.
+    """
+    return hashlib.sha256(json.dumps(tags, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class TagInventory:
+    """
+    A local cache of the tags of every resource, kept in a SQLite database across runs.
+
+    Every entry holds the last known tag set of an ARN, the time it was learned and an ETag-like
+    hash of the set (see `tags_etag`). Entries are filled from the bulk reads of the Resource
+    Groups Tagging API (`record_read`) and from the successful writes of the taggers
+    (`record_written`), which merge the written tags into the known set. Entries older than
+    `ttl` are ignored by `lookup` and purged when the inventory is opened, so tags changed
+    outside of the tool are read again at least once per TTL.
+
+    With `--diff`, resources whose cached tags already hold the requested ones are skipped
+    without any call, and only the resources missing from the cache are read from AWS.
+
+    Like the journal, writes are buffered and stored in a single transaction once `flush_size`
+    of them are waiting, and the inventory is safe to use from many threads. Nothing is
+    recorded until `configure` is called.
+
+    Attributes:
+        enabled (bool): Whether tags are cached.
+        path (str): The path of the SQLite database.
+        ttl (float): Seconds after which a cached tag set is no longer trusted.
+        flush_size (int): The number of buffered entries that triggers a write.
+    """
+
+    enabled = False
+    path = None
+    ttl = DEFAULT_TTL
+    flush_size = 1000
+    _connection = None
+    _buffer = []
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, path: str, ttl: float = None, flush_size: int = None) -> None:
+        """
+        Opens the inventory, creating it if it does not exist yet, and purges its expired entries.
+
+        Args:
+            path (str): The path of the SQLite database.
+            ttl (float): Seconds after which a cached tag set is no longer trusted.
+            flush_size (int): The number of buffered entries that triggers a write.
+        """
+        cls.close()
+        cls.path = path
+        cls.ttl = DEFAULT_TTL if ttl is None else ttl
+        cls.flush_size = flush_size or cls.flush_size
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS tags ("
+            "arn TEXT PRIMARY KEY, tags TEXT NOT NULL, etag TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        with connection:
+            connection.execute("DELETE FROM tags WHERE fetched_at < ?", (time.time() - cls.ttl,))
+        with cls._lock:
+            cls._connection = connection
+            cls._buffer = []
+            cls.enabled = True
+
+    @classmethod
+    def close(cls) -> None:
+        """Writes the buffered entries and closes the database."""
+        with cls._lock:
+            if cls._connection is None:
+                return
+            cls._flush()
+            cls._connection.close()
+            cls._connection = None
+            cls.enabled = False
+
+    @classmethod
+    def lookup(cls, arns: list) -> dict:
+        """
+        Returns the cached tags of resources, for the entries younger than `ttl`.
+
+        Args:
+            arns (list): The ARNs of the resources, as strings or `ParsedArn`.
+
+        Returns:
+            dict: A dictionary mapping each ARN string found to a dictionary of its tag keys and values.
+        """
+        if not cls.enabled:
+            return {}
+        arns = [str(arn) for arn in arns]
+        found = {}
+        with cls._lock:
+            cls._flush()
+            for start in range(0, len(arns), LOOKUP_BATCH_SIZE):
+                found.update(cls._select(arns[start:start + LOOKUP_BATCH_SIZE]))
+        return found
+
+    @classmethod
+    def record_read(cls, arns: list, current: dict) -> None:
+        """
+        Records the tags of resources read from AWS, replacing their cached tags.
+
+        Args:
+            arns (list): The ARNs of the resources that were read, as strings or `ParsedArn`.
+            current (dict): The tag keys and values of the resources, keyed by ARN string. Resources
+                missing from it are recorded without tags, as `get_resources` omits untagged resources.
+        """
+        if not cls.enabled:
+            return
+        now = time.time()
+        cls._add([(False, str(arn), current.get(str(arn), {}), now) for arn in arns])
+
+    @classmethod
+    def record_written(cls, arns: list, tags: list) -> None:
+        """
+        Records tags successfully written to resources, merged into their cached tags.
+
+        Args:
+            arns (list): The ARNs of the tagged resources, as strings or `ParsedArn`.
+            tags (list): A list of key-value pairs representing the tags applied.
+        """
+        if not cls.enabled:
+            return
+        now = time.time()
+        written = adapt_tags(tags)
+        cls._add([(True, str(arn), written, now) for arn in arns])
+
+    @classmethod
+    def _add(cls, entries: list) -> None:
+        with cls._lock:
+            if cls._connection is None:
+                return
+            cls._buffer.extend(entries)
+            if len(cls._buffer) >= cls.flush_size:
+                cls._flush()
+
+    @classmethod
+    def _flush(cls) -> None:
+        # Must be called while holding the lock.
+        if not cls._buffer or cls._connection is None:
+            return
+        buffer, cls._buffer = cls._buffer, []
+        # Written tags are merged into the tags known before the write.
+        merged = sorted({arn for written, arn, _, _ in buffer if written})
+        known = {}
+        for start in range(0, len(merged), LOOKUP_BATCH_SIZE):
+            known.update(cls._select(merged[start:start + LOOKUP_BATCH_SIZE]))
+
+        rows = {}
+        for written, arn, tags, fetched_at in buffer:
+            if written:
+                tags = {**(rows[arn][0] if arn in rows else known.get(arn, {})), **tags}
+            rows[arn] = (tags, fetched_at)
+        with cls._connection:
+            cls._connection.executemany(
+                "INSERT OR REPLACE INTO tags (arn, tags, etag, fetched_at) VALUES (?, ?, ?, ?)",
+                [(arn, json.dumps(tags), tags_etag(tags), fetched_at) for arn, (tags, fetched_at) in rows.items()],
+            )
+
+    @classmethod
+    def _select(cls, arns: list) -> dict:
+        # Must be called while holding the lock.
+        placeholders = ", ".join("?" for _ in arns)
+        cursor = cls._connection.execute(
+            f"SELECT arn, tags FROM tags WHERE arn IN ({placeholders}) AND fetched_at >= ?",
+            [*arns, time.time() - cls.ttl],
+        )
+        return {arn: json.loads(tags) for arn, tags in cursor}
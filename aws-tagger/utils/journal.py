@@ -0,0 +1,299 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.arn_parser import AWSArnParser
+from utils.rate_limiter import is_throttling_error
+
+
+class TagStatus:
+    """The outcomes recorded for a resource in a `Journal`."""
+
+    SUCCESS = "success"
+    FAILED = "failed"  # Permanent failure: sending the same call again fails the same way
+    RETRYABLE = "retryable"  # Transient failure: the call may succeed later (throttling, network, credentials)
+
+
+# Error codes of transient failures other than throttling (expired credentials, server errors, quotas, conflicts)
+RETRYABLE_ERROR_CODES = {
+    'ExpiredToken', 'ExpiredTokenException', 'RequestExpired', 'InternalError', 'InternalFailure',
+    'ServiceUnavailable', 'ServiceUnavailableException', 'LimitExceededException', 'TransactionInProgressException',
+}
+
+
+class ClassifiedError(Exception):
+    """
+    The failure of a tagging call classified in another process, e.g. by a worker of the "processes" executor.
+
+    Exceptions raised by botocore cannot always be sent between processes, so workers send their
+    status and message instead.
+
+    Attributes:
+        status (str): The `TagStatus` of the failure.
+    """
+
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+    def __reduce__(self):
+        return type(self), (self.status, str(self))
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Returns whether the failure of a tagging call is permanent or may succeed if sent again.
+
+    Args:
+        error (Exception): The exception raised by the call.
+
+    Returns:
+        str: `TagStatus.RETRYABLE` for throttling, server, network and credential errors,
+            `TagStatus.FAILED` otherwise (e.g., a deleted resource or a denied permission).
+    """
+    if isinstance(error, ClassifiedError):
+        return error.status
+    # Only imported once a call has failed, to keep botocore out of the startup time
+    from botocore.exceptions import (
+        ConnectionError, HTTPClientError, NoCredentialsError, SSOTokenLoadError, TokenRetrievalError,
+        UnauthorizedSSOTokenError,
+    )
+
+    retryable_errors = (
+        ConnectionError, HTTPClientError, NoCredentialsError, SSOTokenLoadError, TokenRetrievalError,
+        UnauthorizedSSOTokenError,
+    )
+    if isinstance(error, retryable_errors) or is_throttling_error(error):
+        return TagStatus.RETRYABLE
+    response = getattr(error, 'response', None) or {}
+    if response.get('Error', {}).get('Code') in RETRYABLE_ERROR_CODES:
+        return TagStatus.RETRYABLE
+    if response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0) >= 500:
+        return TagStatus.RETRYABLE
+    return TagStatus.FAILED
+
+
+def run_key(input_file: str, tags_file: str, parser_type: str) -> str:
+    """
+    Returns the key identifying a run, a hash of its input file, tags file and parser.
+
+    The input file is identified by its path, size and modification time rather than its
+    content, so that large inputs are not read twice. The tags file is hashed by content.
+
+    Args:
+        input_file (str): Path to the file containing AWS resource ARNs.
+        tags_file (str): Path to the file containing the tags to apply.
+        parser_type (str): The type of parser used for the input file.
+
+    Returns:
+        str: A hexadecimal digest, stable across runs of the same inputs.
+    """
+    stat = os.stat(input_file)
+    with open(tags_file, "rb") as f:
+        tags_digest = hashlib.sha256(f.read()).hexdigest()
+    identity = [os.path.abspath(input_file), stat.st_size, stat.st_mtime_ns, tags_digest, parser_type]
+    return hashlib.sha256(json.dumps(identity).encode()).hexdigest()[:32]
+
+
+class Journal:
+    """
+    An on-disk record of the outcome of every resource of a run, used to resume it after a crash.
+
+    Outcomes are kept in a SQLite database in WAL mode, one row per ARN. Recording an outcome
+    only appends it to an in-memory buffer; the buffer is written and synced to disk in a single
+    transaction once it holds `flush_size` outcomes or `flush_interval` seconds have passed, so
+    the cost of the fsync is shared by many resources. Outcomes still in the buffer when the
+    process dies are lost, and those resources are tagged again on resume, which is harmless as
+    tagging a resource twice with the same tags has no further effect.
+
+    The account of every resource is recorded with its ARN, so resources whose ARN has no account
+    (e.g., S3 buckets, whose account comes from the input) keep it when they are tagged again.
+
+    The journal is safe to record into from many threads.
+
+    Attributes:
+        path (str): The path of the SQLite database.
+        flush_size (int): The number of buffered outcomes that triggers a write.
+        flush_interval (float): The maximum number of seconds an outcome stays in the buffer.
+    """
+
+    def __init__(self, path: str, flush_size: int = 1000, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS outcomes ("
+            "arn TEXT PRIMARY KEY, status TEXT NOT NULL, error TEXT, updated_at REAL NOT NULL, account TEXT)"
+        )
+        columns = [column for _, column, *_ in self._connection.execute("PRAGMA table_info(outcomes)")]
+        if "account" not in columns:
+            # Journals written before accounts were recorded
+            self._connection.execute("ALTER TABLE outcomes ADD COLUMN account TEXT")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)")
+        self._connection.commit()
+
+    @classmethod
+    def for_run(cls, directory: str, input_file: str, tags_file: str, parser_type: str, **options) -> "Journal":
+        """
+        Opens the journal of a run, creating it if it does not exist yet.
+
+        Args:
+            directory (str): The directory where journals are stored.
+            input_file (str): Path to the file containing AWS resource ARNs.
+            tags_file (str): Path to the file containing the tags to apply.
+            parser_type (str): The type of parser used for the input file.
+            **options: Keyword arguments forwarded to the constructor (e.g., flush_size).
+
+        Returns:
+            Journal: The journal of the run.
+        """
+        key = run_key(input_file, tags_file, parser_type)
+        journal = cls(os.path.join(directory, f"journal-{key}.sqlite"), **options)
+        with journal._lock, journal._connection:
+            journal._connection.executemany(
+                "INSERT OR IGNORE INTO metadata (key, value) VALUES (?, ?)",
+                [("input_file", os.path.abspath(input_file)), ("tags_file", os.path.abspath(tags_file)),
+                 ("parser", parser_type), ("created_at", str(time.time()))],
+            )
+        return journal
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def record(self, arns: list, errors: dict = None) -> None:
+        """
+        Records the outcome of tagging resources.
+
+        Args:
+            arns (list): The ARNs of the resources that were tagged, as strings or `ParsedArn`.
+            errors (dict): The errors of the resources that could not be tagged, keyed by ARN.
+                The other resources are recorded as tagged.
+        """
+        errors = errors or {}
+        now = time.time()
+        rows = []
+        for arn in arns:
+            error = errors.get(arn)
+            account = getattr(arn, "account_id", None)
+            if error is None:
+                rows.append((str(arn), TagStatus.SUCCESS, None, now, account))
+            else:
+                rows.append((str(arn), classify_error(error), str(error), now, account))
+
+        with self._lock:
+            self._buffer.extend(rows)
+            if len(self._buffer) >= self.flush_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self) -> None:
+        """Writes the buffered outcomes and syncs them to disk."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        # Must be called while holding the lock.
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO outcomes (arn, status, error, updated_at, account) VALUES (?, ?, ?, ?, ?)",
+                self._buffer,
+            )
+        self._buffer = []
+
+    def clear(self) -> None:
+        """Forgets every recorded outcome, to start the run over."""
+        with self._lock, self._connection:
+            self._buffer = []
+            self._connection.execute("DELETE FROM outcomes")
+
+    def arns(self, *statuses: str) -> list:
+        """
+        Returns the ARNs recorded with any of the given statuses.
+
+        Args:
+            *statuses (str): The `TagStatus` values to look for.
+
+        Returns:
+            list: The ARN strings, in the order they were first recorded.
+        """
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            self._flush()
+            cursor = self._connection.execute(
+                f"SELECT arn FROM outcomes WHERE status IN ({placeholders}) ORDER BY rowid", statuses
+            )
+            return [arn for (arn,) in cursor]
+
+    def resources(self, *statuses: str) -> list:
+        """
+        Returns the resources recorded with any of the given statuses, with their recorded account.
+
+        Unlike `arns`, the resources keep the account they were tagged in when their ARN has none,
+        so they are tagged or read again with the credentials of the same account.
+
+        Args:
+            *statuses (str): The `TagStatus` values to look for.
+
+        Returns:
+            list: The resources as `ParsedArn`, in the order they were first recorded.
+        """
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            self._flush()
+            cursor = self._connection.execute(
+                f"SELECT arn, account FROM outcomes WHERE status IN ({placeholders}) ORDER BY rowid", statuses
+            )
+            resources = []
+            for arn, account in cursor:
+                arn = AWSArnParser.parse(arn)
+                resources.append(arn.with_account(account) if account else arn)
+            return resources
+
+    def counts(self) -> dict:
+        """Returns the number of resources recorded with each status."""
+        with self._lock:
+            self._flush()
+            return dict(self._connection.execute("SELECT status, COUNT(*) FROM outcomes GROUP BY status").fetchall())
+
+    def skip_completed(self, resources, on_skip: callable = None):
+        """
+        Yields the resources that have not been completed in a previous attempt of the run.
+
+        Resources tagged successfully or that failed permanently are skipped; resources that
+        failed with a retryable error, and the ones never reached, are yielded.
+
+        Args:
+            resources (Iterable[str | ParsedArn]): The AWS resource ARNs.
+            on_skip (callable): Called with 1 for every skipped resource.
+
+        Yields:
+            str | ParsedArn: The resources still to tag.
+        """
+        completed = set(self.arns(TagStatus.SUCCESS, TagStatus.FAILED))
+        for arn in resources:
+            if str(arn) in completed:
+                if on_skip:
+                    on_skip(1)
+                continue
+            yield arn
+
+    def close(self) -> None:
+        """Writes the buffered outcomes and closes the database."""
+        self.flush()
+        self._connection.close()
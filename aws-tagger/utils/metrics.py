@@ -0,0 +1,493 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from utils.rate_limiter import THROTTLING_ERROR_CODES
+
+# Upper bounds of the latency histogram buckets, in seconds (the last bucket is unbounded)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def error_code(error: Exception) -> str:
+    """Returns the AWS error code of a failed call, or the exception class name for other errors."""
+    response = getattr(error, 'response', None) or {}
+    return response.get('Error', {}).get('Code') or type(error).__name__
+
+
+class LatencyHistogram:
+    """
+    Counts call latencies in the fixed buckets of `LATENCY_BUCKETS`.
+
+    Buckets keep the memory flat whatever the number of calls, and are the format Prometheus
+    expects; percentiles are estimated from them by interpolating inside the bucket.
+
+    Attributes:
+        counts (list): The number of latencies in every bucket, the last one being unbounded.
+        total (float): The sum of the latencies, in seconds.
+        count (int): The number of latencies.
+        max (float): The highest latency, in seconds.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Adds the latencies counted by another histogram."""
+        self.counts = [count + more for count, more in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentile(self, share: float) -> float:
+        """
+        Estimates a latency percentile.
+
+        Args:
+            share (float): The percentile, between 0 and 1 (e.g., 0.99).
+
+        Returns:
+            float: The estimated latency in seconds, or 0 if no call was recorded.
+        """
+        if not self.count:
+            return 0.0
+        rank = share * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+
+class ServiceMetrics:
+    """
+    The measures of the calls sent to an AWS API in a region.
+
+    Attributes:
+        calls (int): Calls sent by the taggers, every attempt counted.
+        http_requests (int): HTTP requests sent by the clients, including the retries of botocore.
+        bytes_sent (int): Bytes of the bodies of the HTTP requests.
+        throttles (int): HTTP responses rejecting a request because of the request rate, including
+            the ones retried by botocore.
+        resends (int): Calls sent again by the taggers after being throttled.
+        errors (Counter): Failed calls per error code.
+        latency (LatencyHistogram): The latencies of the calls, botocore retries included.
+        wait_seconds (float): Time spent waiting for the rate limiter before sending the calls.
+        setup_seconds (float): Time spent creating the taggers and their clients.
+        resources (Counter): Resources per outcome ("success", "failed").
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.http_requests = 0
+        self.bytes_sent = 0
+        self.throttles = 0
+        self.resends = 0
+        self.errors = Counter()
+        self.latency = LatencyHistogram()
+        self.wait_seconds = 0.0
+        self.setup_seconds = 0.0
+        self.resources = Counter()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # Measures are sent between processes without their lock.
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def merge(self, other: "ServiceMetrics") -> None:
+        """Adds the measures of another process to these ones."""
+        with self._lock:
+            for name in ("calls", "http_requests", "bytes_sent", "throttles", "resends", "wait_seconds",
+                         "setup_seconds"):
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+            self.errors.update(other.errors)
+            self.resources.update(other.resources)
+            self.latency.merge(other.latency)
+
+    @property
+    def retries(self) -> int:
+        """Calls sent again, by the taggers after throttling or by botocore after network and server errors."""
+        return self.resends + max(0, self.http_requests - self.calls)
+
+    def record_call(self, seconds: float, wait: float = 0.0, error: Exception = None) -> None:
+        """
+        Records a call sent with a client.
+
+        Args:
+            seconds (float): How long the call took.
+            wait (float): How long the call waited for the rate limiter before being sent.
+            error (Exception): The error raised by the call, or None if it succeeded.
+        """
+        with self._lock:
+            self.calls += 1
+            self.wait_seconds += wait
+            self.latency.add(seconds)
+            if error is not None:
+                self.errors[error_code(error)] += 1
+
+    def record_resend(self) -> None:
+        """Records that a throttled call is sent again."""
+        with self._lock:
+            self.resends += 1
+
+    def record_request(self, request) -> None:
+        """Records an HTTP request sent by a client (botocore `before-send` event) and its size."""
+        body = getattr(request, 'body', None)
+        size = len(body) if isinstance(body, (bytes, str)) else 0
+        with self._lock:
+            self.http_requests += 1
+            self.bytes_sent += size
+
+    def record_response(self, parsed_response) -> None:
+        """Records an HTTP response received by a client (botocore `response-received` event)."""
+        if (parsed_response or {}).get('Error', {}).get('Code') in THROTTLING_ERROR_CODES:
+            with self._lock:
+                self.throttles += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            latency = self.latency
+            return {
+                "calls": self.calls,
+                "http_requests": self.http_requests,
+                "retries": self.retries,
+                "throttles": self.throttles,
+                "errors": dict(self.errors),
+                "bytes_sent": self.bytes_sent,
+                "resources": dict(self.resources),
+                "latency_ms": {
+                    "mean": latency.total / latency.count * 1000 if latency.count else 0.0,
+                    "p50": latency.percentile(0.50) * 1000,
+                    "p90": latency.percentile(0.90) * 1000,
+                    "p99": latency.percentile(0.99) * 1000,
+                    "max": latency.max * 1000,
+                },
+                "latency_buckets": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], latency.counts)),
+                "wait_seconds": self.wait_seconds,
+                "setup_seconds": self.setup_seconds,
+            }
+
+
+class MetricsRegistry:
+    """
+    Keeps the `ServiceMetrics` of every (service, region) and the duration of the phases of a run.
+
+    Metrics are only collected once `configure(enabled=True)` was called, so a run without
+    metrics only pays for a check of `enabled` around every call.
+
+    Attributes:
+        enabled (bool): Whether measures are recorded.
+        _metrics (dict): The measures of every AWS API, keyed by (service, region).
+        _phases (dict): The seconds spent in every phase of the run (e.g., "parse").
+        _started (float): When the collection started, as returned by `time.monotonic`.
+    """
+
+    enabled = False
+    _metrics = {}
+    _phases = {}
+    _lock = threading.Lock()
+    _started = None
+
+    @classmethod
+    def configure(cls, enabled: bool) -> None:
+        """Turns the collection on or off, starting from empty measures."""
+        with cls._lock:
+            cls.enabled = enabled
+            cls._metrics = {}
+            cls._phases = {}
+            cls._started = time.monotonic()
+
+    @classmethod
+    def get(cls, service: str, region: str) -> ServiceMetrics:
+        """
+        Retrieves the measures of a service in a region.
+
+        Args:
+            service (str): The AWS API the calls are sent to (e.g., 'ec2', 'resourcegroupstaggingapi').
+            region (str): The AWS region, or None for global APIs.
+
+        Returns:
+            ServiceMetrics: The measures shared by all the calls to that API and region.
+        """
+        key = (service, region)
+        metrics = cls._metrics.get(key)
+        if metrics:
+            return metrics
+
+        with cls._lock:
+            if key not in cls._metrics:
+                cls._metrics[key] = ServiceMetrics()
+            return cls._metrics[key]
+
+    @classmethod
+    def instrument(cls, client, service: str, region: str) -> None:
+        """
+        Counts the HTTP requests sent by a client, their size and the throttled responses, while
+        metrics are enabled.
+
+        Clients shared by several taggers are only instrumented once.
+
+        Args:
+            client: The boto3 or aiobotocore client.
+            service (str): The AWS API of the client.
+            region (str): The region of the client.
+        """
+        events = getattr(getattr(client, 'meta', None), 'events', None)
+        if events is None:
+            return
+
+        def record_request(request=None, **kwargs):
+            if cls.enabled:
+                cls.get(service, region).record_request(request)
+
+        def record_response(parsed_response=None, **kwargs):
+            if cls.enabled:
+                cls.get(service, region).record_response(parsed_response)
+
+        events.register("before-send", record_request, unique_id="aws-tagger-metrics-request")
+        events.register("response-received", record_response, unique_id="aws-tagger-metrics-response")
+
+    @classmethod
+    def record_setup(cls, service: str, region: str, seconds: float) -> None:
+        """Records the time spent creating a tagger and its client, in the "clients" phase of the run."""
+        if cls.enabled:
+            metrics = cls.get(service, region)
+            with metrics._lock:
+                metrics.setup_seconds += seconds
+            cls.add_phase("clients", seconds)
+
+    @classmethod
+    def record_resources(cls, service: str, region: str, tagged: int, failed: int) -> None:
+        """Records the outcome of the resources of a finished batch."""
+        if cls.enabled:
+            metrics = cls.get(service, region)
+            with metrics._lock:
+                metrics.resources.update({"success": tagged, "failed": failed})
+
+    @classmethod
+    def add_phase(cls, phase: str, seconds: float) -> None:
+        with cls._lock:
+            cls._phases[phase] = cls._phases.get(phase, 0.0) + seconds
+
+    @classmethod
+    @contextmanager
+    def phase(cls, phase: str):
+        """Adds the time spent in the `with` block to a phase of the run."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if cls.enabled:
+                cls.add_phase(phase, time.perf_counter() - start)
+
+    @classmethod
+    def timed(cls, items, phase: str):
+        """Yields the items of an iterator, adding the time spent producing them to a phase of the run."""
+        if not cls.enabled:
+            yield from items
+            return
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                cls.add_phase(phase, time.perf_counter() - start)
+                return
+            cls.add_phase(phase, time.perf_counter() - start)
+            yield item
+
+    @classmethod
+    def snapshot(cls) -> dict:
+        """Returns the current measures of every (service, region)."""
+        with cls._lock:
+            return dict(cls._metrics)
+
+    @classmethod
+    def merge(cls, metrics: dict) -> None:
+        """
+        Adds the measures of another process, e.g. a worker of the "processes" executor.
+
+        Args:
+            metrics (dict): The `ServiceMetrics` of every (service, region), as returned by `snapshot`.
+        """
+        for (service, region), other in metrics.items():
+            cls.get(service, region).merge(other)
+
+    @classmethod
+    def summary(cls) -> dict:
+        """
+        Returns every measure of the run, in the format of the JSON summary.
+
+        Returns:
+            dict: The elapsed time, the duration of every phase, totals over every service,
+                and the measures of every (service, region), the busiest first.
+        """
+        services = [
+            {"service": service, "region": region, **metrics.summary()}
+            for (service, region), metrics in cls.snapshot().items()
+        ]
+        services.sort(key=lambda entry: entry["calls"], reverse=True)
+        totals = Counter()
+        for entry in services:
+            for name in ("calls", "http_requests", "retries", "throttles", "bytes_sent"):
+                totals[name] += entry[name]
+            totals["errors"] += sum(entry["errors"].values())
+            totals.update({f"resources_{status}": count for status, count in entry["resources"].items()})
+        return {
+            "elapsed_seconds": time.monotonic() - cls._started if cls._started else 0.0,
+            "phases": dict(cls._phases),
+            "totals": dict(totals),
+            "services": services,
+        }
+
+    @classmethod
+    def report(cls) -> list:
+        """Returns one line per (service, region) describing its calls, the busiest first."""
+        lines = []
+        for entry in cls.summary()["services"]:
+            latency = entry["latency_ms"]
+            errors = ", ".join(f"{code}={count}" for code, count in sorted(entry["errors"].items()))
+            lines.append(
+                f"{entry['service']}/{entry['region'] or 'global'}: {entry['calls']} calls, "
+                f"p50 {latency['p50']:.0f} ms, p99 {latency['p99']:.0f} ms, {entry['throttles']} throttled, "
+                f"{entry['retries']} retried, waited {entry['wait_seconds']:.1f}s"
+                + (f", errors: {errors}" if errors else "")
+            )
+        return lines
+
+    @classmethod
+    def write_json(cls, path: str) -> None:
+        """Writes the summary of the run to a JSON file."""
+        with open(path, "w") as file:
+            json.dump(cls.summary(), file, indent=2)
+
+    @classmethod
+    def write_prometheus(cls, path: str) -> None:
+        """
+        Writes the measures in the Prometheus text format, for the textfile collector of node_exporter.
+
+        The file is written next to its destination and renamed, so the collector never reads a partial file.
+        """
+        summary = cls.summary()
+        families = {
+            "calls_total": ("counter", "API calls sent, every attempt counted.", "calls"),
+            "http_requests_total": ("counter", "HTTP requests sent, botocore retries included.", "http_requests"),
+            "retries_total": ("counter", "API calls sent again after throttling or errors.", "retries"),
+            "throttles_total": ("counter", "API calls rejected because of the request rate.", "throttles"),
+            "request_bytes_total": ("counter", "Bytes of the bodies of the HTTP requests.", "bytes_sent"),
+            "rate_limiter_wait_seconds_total": ("counter", "Time spent waiting for the rate limiter.",
+                                                "wait_seconds"),
+        }
+        lines = []
+        for name, (kind, help_text, field) in families.items():
+            lines += [f"# HELP aws_tagger_{name} {help_text}", f"# TYPE aws_tagger_{name} {kind}"]
+            for entry in summary["services"]:
+                lines.append(f"aws_tagger_{name}{{{_labels(entry)}}} {entry[field]}")
+
+        lines += ["# HELP aws_tagger_errors_total Failed API calls by error code.",
+                  "# TYPE aws_tagger_errors_total counter"]
+        for entry in summary["services"]:
+            for code, count in sorted(entry["errors"].items()):
+                lines.append(f"aws_tagger_errors_total{{{_labels(entry, code=code)}}} {count}")
+
+        lines += ["# HELP aws_tagger_resources_total Resources by outcome.",
+                  "# TYPE aws_tagger_resources_total counter"]
+        for entry in summary["services"]:
+            for status, count in sorted(entry["resources"].items()):
+                lines.append(f"aws_tagger_resources_total{{{_labels(entry, status=status)}}} {count}")
+
+        lines += ["# HELP aws_tagger_call_duration_seconds Latency of the API calls.",
+                  "# TYPE aws_tagger_call_duration_seconds histogram"]
+        for entry in summary["services"]:
+            cumulative = 0
+            for bound, count in entry["latency_buckets"].items():
+                cumulative += count
+                lines.append(f"aws_tagger_call_duration_seconds_bucket{{{_labels(entry, le=bound)}}} {cumulative}")
+            lines.append(f"aws_tagger_call_duration_seconds_sum{{{_labels(entry)}}} "
+                         f"{entry['latency_ms']['mean'] * entry['calls'] / 1000}")
+            lines.append(f"aws_tagger_call_duration_seconds_count{{{_labels(entry)}}} {entry['calls']}")
+
+        lines += ["# HELP aws_tagger_phase_seconds Time spent in every phase of the run.",
+                  "# TYPE aws_tagger_phase_seconds gauge"]
+        for phase, seconds in sorted(summary["phases"].items()):
+            lines.append(f'aws_tagger_phase_seconds{{phase="{phase}"}} {seconds}')
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(temporary, path)
+
+
+def _labels(entry: dict, **extra) -> str:
+    labels = {"service": entry["service"], "region": entry["region"] or "global", **extra}
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+class LiveRates:
+    """
+    Shows the calls per second of the busiest services under the progress bar, while tagging.
+
+    A background thread refreshes the line every `interval` seconds from the measures of
+    `MetricsRegistry`, so the display reveals which API a slow run is waiting for.
+
+    Attributes:
+        interval (float): Seconds between two refreshes.
+        top (int): The number of services shown.
+    """
+
+    def __init__(self, interval: float = 1.0, top: int = 5):
+        self.interval = interval
+        self.top = top
+        self._stop = threading.Event()
+        self._thread = None
+        self._line = None
+
+    def __enter__(self) -> "LiveRates":
+        from tqdm import tqdm
+
+        self._line = tqdm(bar_format="{desc}", position=1, leave=False)
+        self._thread = threading.Thread(target=self._refresh, name="live-rates", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._line.close()
+
+    def _refresh(self) -> None:
+        previous = {}
+        while not self._stop.wait(self.interval):
+            rates = []
+            for key, metrics in MetricsRegistry.snapshot().items():
+                calls, throttles = metrics.calls, metrics.throttles
+                last_calls, last_throttles = previous.get(key, (0, 0))
+                previous[key] = (calls, throttles)
+                rates.append(((calls - last_calls) / self.interval, throttles - last_throttles, key))
+            rates.sort(key=lambda rate: rate[:2], reverse=True)
+            self._line.set_description_str(" | ".join(
+                f"{service}/{region or 'global'} {rate:.0f}/s" + (f" ({throttled} throttled)" if throttled else "")
+                for rate, throttled, (service, region) in rates[:self.top]
+            ))
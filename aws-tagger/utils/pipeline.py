@@ -0,0 +1,115 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+_DONE = object()
+
+
+class _Failure:
+    """Carries an exception raised by the producer to the consumer."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(iterable, maxsize: int = 10000):
+    """
+    Consumes an iterable in a background thread and yields its items through a bounded queue.
+
+    This lets a slow producer (e.g., a parser reading a large file) run while its consumer
+    waits for the network, without ever holding more than `maxsize` items in memory.
+    Exceptions raised by the producer are raised again in the consumer.
+
+    Args:
+        iterable (Iterable): The items to produce.
+        maxsize (int): The maximum number of items produced ahead of the consumer.
+
+    Yields:
+        The items of the iterable, in order.
+    """
+    items = queue.Queue(maxsize)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+
+    threading.Thread(target=produce, name="prefetch", daemon=True).start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        # Lets the producer exit if the consumer stops early.
+        stopped.set()
+
+
+def pool_map(pool, function: callable, items, window: int, ordered: bool = True):
+    """
+    Runs a function on every item in an executor pool, and yields the results as they are ready.
+
+    At most `window` items are submitted ahead of the consumer, which bounds the memory held by
+    results waiting to be consumed. Exceptions raised by the function are raised again in the consumer.
+
+    Args:
+        pool (concurrent.futures.Executor): The pool running the function (e.g., a process pool).
+        function (callable): Called with the arguments of every item; must be picklable for a process pool.
+        items (Iterable[tuple]): The arguments of every call.
+        window (int): The maximum number of calls submitted and not yet consumed.
+        ordered (bool): Yield the results in the order of the items. Otherwise, results are
+            yielded as soon as they are ready, which keeps every worker busy when calls take uneven times.
+
+    Yields:
+        tuple: The arguments of every call and its result.
+    """
+    items = iter(items)
+    pending = deque() if ordered else set()
+
+    def submit() -> bool:
+        arguments = next(items, None)
+        if arguments is None:
+            return False
+        future = pool.submit(function, *arguments)
+        future.arguments = arguments
+        if ordered:
+            pending.append(future)
+        else:
+            pending.add(future)
+        return True
+
+    try:
+        while len(pending) < window and submit():
+            pass
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pending.difference_update(done)
+            for future in done:
+                result = future.result()
+                submit()
+                yield future.arguments, result
+    finally:
+        # Calls not started yet are dropped if the consumer stops early.
+        for future in pending:
+            future.cancel()
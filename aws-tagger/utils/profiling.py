@@ -0,0 +1,240 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class Profiler:
+    """
+    Profiles the phases of a run (parsing, tagging) separately, with cProfile and a stack sampler.
+
+    Every thread gets its own `cProfile.Profile` for every phase, as cProfile only sees the
+    thread it was enabled in. The profiles use the default wall-clock timer, which is far cheaper
+    than a per-thread CPU timer: time a thread spends blocked (network, locks, the GIL held by
+    another thread) is charged to the function it is blocked in. The CPU time of every phase is
+    measured separately, with `time.process_time` and `time.thread_time`.
+
+    Threads started during a phase (e.g., the worker threads) are profiled as part of it
+    through `threading.setprofile`, and `iterate` moves the thread consuming an iterator to
+    another phase while it produces items, so the parser thread counts as "parse" even though
+    it runs during the "tag" phase.
+
+    A background thread also samples the stacks of every thread with `sys._current_frames`,
+    which shows where the wall time goes, network waits included, without instrumenting every
+    call. The samples are written in the collapsed-stack format read by flamegraph.pl, speedscope
+    or inferno, with the phase as the root frame.
+
+    Nothing is recorded until `configure` is called with an output prefix: `phase` then only
+    enters a `with` block, and `iterate` returns its items unchanged.
+
+    Attributes:
+        enabled (bool): Whether the run is profiled.
+        output (str): The prefix of the files written by `finish`.
+        interval (float): Seconds between two stack samples.
+        _profiles (dict): The profilers of every phase, one per thread.
+        _timings (dict): The wall and CPU seconds spent in every phase.
+        _samples (Counter): The number of samples of every collapsed stack.
+    """
+
+    enabled = False
+    output = None
+    interval = 0.005
+    _profiles = {}
+    _timings = {}
+    _samples = Counter()
+    _current = None
+    _thread_phases = {}
+    _nested_cpu = 0.0
+    _local = threading.local()
+    _lock = threading.Lock()
+    _stop = None
+    _sampler = None
+
+    @classmethod
+    def configure(cls, output: str, interval: float = None) -> None:
+        """
+        Starts profiling the phases of the run.
+
+        Args:
+            output (str): The prefix of the output files (e.g., "profile/run" writes "profile/run.tag.pstats").
+            interval (float): Seconds between two stack samples.
+        """
+        cls.enabled = True
+        cls.output = output
+        cls.interval = interval or cls.interval
+        cls._profiles, cls._timings, cls._samples, cls._thread_phases = {}, {}, Counter(), {}
+        cls._nested_cpu = 0.0
+        cls._local = threading.local()
+        threading.setprofile(cls._start_thread)
+        cls._stop = threading.Event()
+        cls._sampler = threading.Thread(target=cls._sample, name="profiler", daemon=True)
+        cls._sampler.start()
+
+    @classmethod
+    @contextmanager
+    def phase(cls, name: str):
+        """
+        Profiles the `with` block and the threads it starts as a phase of the run.
+
+        Args:
+            name (str): The name of the phase (e.g., "parse", "tag").
+        """
+        if not cls.enabled:
+            yield
+            return
+        cls._current = name
+        previous = cls._switch(name)
+        wall, cpu, nested = time.perf_counter(), time.process_time(), cls._nested_cpu
+        try:
+            yield
+        finally:
+            # CPU spent by `iterate` in other phases during the block is counted in those phases.
+            cpu = time.process_time() - cpu - (cls._nested_cpu - nested)
+            cls._add_timing(name, time.perf_counter() - wall, cpu)
+            cls._switch(previous)
+            cls._current = None
+
+    @classmethod
+    def iterate(cls, items, name: str):
+        """
+        Counts the time spent producing the items of an iterator in a phase, whatever thread consumes it.
+
+        Args:
+            items (Iterable): The items, e.g. the resources read by a streaming parser.
+            name (str): The name of the phase.
+
+        Returns:
+            Iterable: The same items.
+        """
+        return cls._iterate(items, name) if cls.enabled else items
+
+    @classmethod
+    def _iterate(cls, items, name: str):
+        iterator = iter(items)
+        while True:
+            previous = cls._switch(name)
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                cpu = time.thread_time() - cpu
+                cls._add_timing(name, time.perf_counter() - wall, cpu)
+                with cls._lock:
+                    cls._nested_cpu += cpu
+                cls._switch(previous)
+            yield item
+
+    @classmethod
+    def finish(cls) -> list:
+        """
+        Stops profiling and writes the profile of every phase.
+
+        Writes `<output>.<phase>.pstats` (read with `python -m pstats` or snakeviz), `<output>.folded`
+        (collapsed stacks) and `<output>.json` (wall and CPU seconds of every phase).
+
+        Returns:
+            list: Lines describing the timings of every phase and the functions it spent the most time in.
+        """
+        if not cls.enabled:
+            return []
+        cls.enabled = False
+        threading.setprofile(None)
+        cls._stop.set()
+        cls._sampler.join()
+        cls._switch(None)
+
+        directory = os.path.dirname(cls.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lines = []
+        for name, profiles in cls._profiles.items():
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            path = f"{cls.output}.{name}.pstats"
+            stats.dump_stats(path)
+            timing = cls._timings.get(name, {"wall": 0.0, "cpu": 0.0})
+            lines.append(f"{name}: {timing['wall']:.2f}s wall, {timing['cpu']:.2f}s CPU ({path})")
+            lines += [f"    {seconds:8.3f}s  {function}" for function, seconds in cls._top_functions(stats)]
+
+        with open(f"{cls.output}.folded", "w") as file:
+            for stack, count in sorted(cls._samples.items()):
+                file.write(f"{stack} {count}\n")
+        with open(f"{cls.output}.json", "w") as file:
+            json.dump({"phases": cls._timings, "samples": sum(cls._samples.values()),
+                       "interval": cls.interval}, file, indent=2)
+        lines.append(f"Stack samples: {cls.output}.folded ({sum(cls._samples.values())} samples)")
+        return lines
+
+    @staticmethod
+    def _top_functions(stats: pstats.Stats, count: int = 5) -> list:
+        # The functions with the most time spent in their own code (excluding the functions they call)
+        own_time = [
+            (f"{function} ({os.path.basename(filename)}:{line})", tottime)
+            for (filename, line, function), (_, _, tottime, _, _) in stats.stats.items()
+        ]
+        return sorted(own_time, key=lambda entry: entry[1], reverse=True)[:count]
+
+    @classmethod
+    def _add_timing(cls, name: str, wall: float, cpu: float) -> None:
+        with cls._lock:
+            timing = cls._timings.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+            timing["wall"] += wall
+            timing["cpu"] += cpu
+
+    @classmethod
+    def _switch(cls, name: str) -> str:
+        # Moves the current thread to the profiler of a phase (or none), and returns its previous phase.
+        local = cls._local
+        previous = getattr(local, "phase", None)
+        if name == previous:
+            return previous
+        profiles = getattr(local, "profiles", None)
+        if profiles is None:
+            profiles = local.profiles = {}
+        if previous is not None:
+            profiles[previous].disable()
+        if name is not None:
+            if name not in profiles:
+                profiles[name] = cProfile.Profile()
+                with cls._lock:
+                    cls._profiles.setdefault(name, []).append(profiles[name])
+            profiles[name].enable()
+        local.phase = name
+        cls._thread_phases[threading.get_ident()] = name
+        return previous
+
+    @classmethod
+    def _start_thread(cls, *args) -> None:
+        # Called by `threading.setprofile` on the first event of every new thread.
+        sys.setprofile(None)
+        cls._thread_phases.pop(threading.get_ident(), None)
+        if cls.enabled and cls._current is not None:
+            cls._switch(cls._current)
+
+    @classmethod
+    def _sample(cls) -> None:
+        sampler = threading.get_ident()
+        while not cls._stop.wait(cls.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                phase = cls._thread_phases.get(ident)
+                if ident == sampler or phase is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    name = getattr(code, "co_qualname", code.co_name)
+                    stack.append(f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                # Worker threads are numbered (e.g., ThreadPoolExecutor-0_12), they are merged into one root.
+                thread = re.sub(r"[-_]\d+$", "", names.get(ident, "thread"))
+                cls._samples[";".join([phase, thread, *reversed(stack)])] += 1
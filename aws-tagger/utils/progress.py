@@ -0,0 +1,79 @@
+import threading
+
+
+class ResourceProgress:
+    """
+    A progress bar counting the processed resources, safe to update from many threads.
+
+    Attributes:
+        bar (tqdm): The underlying progress bar.
+        done (int): The number of resources processed so far.
+    """
+
+    def __init__(self, total: int = None):
+        from tqdm import tqdm
+
+        self.bar = tqdm(total=total)
+        self.done = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ResourceProgress":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def track(self, resources):
+        """Returns the resources to process; subclasses count them as they are read."""
+        return resources
+
+    def update(self, count: int = 1) -> None:
+        """Records that `count` more resources were processed."""
+        with self._lock:
+            self.done += count
+            self.bar.update(count)
+
+    def close(self) -> None:
+        self.bar.close()
+
+
+class StreamProgress(ResourceProgress):
+    """
+    A progress bar for streamed inputs, whose number of resources is not known in advance.
+
+    The bar counts bytes of the input file instead of resources. The bytes shown as done
+    are the bytes parsed so far, scaled by the share of the parsed resources that were
+    processed, so the bar reaches the file size once every resource is processed.
+
+    Attributes:
+        parser (BaseParser): The streaming parser, whose `position` is the byte offset read so far.
+        parsed (int): The number of resources read from the parser so far.
+    """
+
+    def __init__(self, parser, file_size: int):
+        from tqdm import tqdm
+
+        self.bar = tqdm(total=file_size, unit="B", unit_scale=True, unit_divisor=1024)
+        self.done = 0
+        self.parser = parser
+        self.parsed = 0
+        self._lock = threading.Lock()
+
+    def track(self, resources):
+        """Yields the resources read from the parser while counting them."""
+        for arn in resources:
+            self.parsed += 1
+            yield arn
+
+    def update(self, count: int = 1) -> None:
+        with self._lock:
+            self.done += count
+            if self.parsed:
+                position = int(self.parser.position * min(1.0, self.done / self.parsed))
+                self.bar.update(max(0, position - self.bar.n))
+            self.bar.set_postfix_str(f"resources={self.done}", refresh=False)
+
+    def close(self) -> None:
+        if self.parsed and self.done >= self.parsed:
+            self.bar.update(max(0, self.bar.total - self.bar.n))
+        self.bar.close()
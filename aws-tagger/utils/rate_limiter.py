@@ -0,0 +1,171 @@
+import random
+import threading
+import time
+
+# Error codes returned by AWS APIs when a caller exceeds the request rate. Botocore also retries
+# LimitExceededException (a quota) and TransactionInProgressException (a conflict) as throttles,
+# but sending calls more slowly does not clear them, so they are left to botocore's own retries.
+THROTTLING_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'ProvisionedThroughputExceededException', 'RequestLimitExceeded',
+    'BandwidthLimitExceeded', 'RequestThrottled', 'SlowDown', 'PriorRequestNotComplete', 'EC2ThrottledException',
+}
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """
+    Returns whether an exception raised by a boto3 call reports that the request was throttled.
+
+    Args:
+        error (Exception): The exception raised by the call.
+
+    Returns:
+        bool: True if the error code is one of `THROTTLING_ERROR_CODES`.
+    """
+    response = getattr(error, 'response', None) or {}
+    return response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+
+
+class AdaptiveRateLimiter:
+    """
+    A token bucket whose rate adapts to the throttling responses of an AWS API (AIMD).
+
+    Every call takes a token from the bucket, which is refilled at `rate` tokens per second.
+    Sustained success increases the rate additively, by about `increase` calls per second
+    for every second of calls, and every throttling error cuts it multiplicatively by
+    `decrease`. Calls that fail together because of the same burst only cut the rate once,
+    as the rate is cut at most once every `cooldown` seconds.
+
+    The limiter is safe to use from many threads and from an event loop: `reserve` never
+    blocks, it returns how long the caller must wait before sending its call.
+
+    Attributes:
+        rate (float): The current number of calls per second.
+        min_rate (float): The lowest rate the limiter backs off to.
+        max_rate (float): The highest rate the limiter ramps up to.
+        increase (float): Calls per second added after a second of successful calls.
+        decrease (float): Factor applied to the rate after a throttling error.
+        cooldown (float): Minimum number of seconds between two cuts of the rate.
+    """
+
+    def __init__(self, rate: float = 50.0, min_rate: float = 0.5, max_rate: float = 1000.0,
+                 increase: float = 5.0, decrease: float = 0.5, cooldown: float = 1.0):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+        self._last_decrease = 0.0
+
+    def reserve(self) -> float:
+        """
+        Reserves the next call slot.
+
+        Returns:
+            float: The number of seconds to wait before sending the call.
+        """
+        with self._lock:
+            now = time.monotonic()
+            # Allow a burst of up to one second worth of calls after an idle period.
+            slot = max(self._next_slot, now - 1.0)
+            self._next_slot = slot + 1.0 / self.rate
+            return max(0.0, slot - now)
+
+    def on_success(self) -> None:
+        """Ramps the rate up after a successful call."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self) -> None:
+        """Backs the rate off after a throttled call."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+
+
+class RateLimiterRegistry:
+    """
+    Keeps one `AdaptiveRateLimiter` per (service, region, account), shared by every tagger.
+
+    AWS enforces request rates per API, region and account, so all the calls sent to the same
+    API of the same account and region share a single limiter, whatever tagger sends them.
+
+    Attributes:
+        _limiters (dict): The limiters, keyed by (service, region, account).
+        _settings (dict): Keyword arguments used to create new limiters.
+        max_attempts (int): How many times a throttled call is sent before giving up.
+        backoff_base (float): Base delay in seconds of the exponential backoff between attempts.
+        backoff_cap (float): Maximum delay in seconds between attempts.
+    """
+
+    _limiters = {}
+    _settings = {}
+    _lock = threading.Lock()
+    max_attempts = 8
+    backoff_base = 0.5
+    backoff_cap = 30.0
+
+    @classmethod
+    def configure(cls, max_attempts: int = None, **settings) -> None:
+        """
+        Changes the settings of the limiters created from now on.
+
+        Args:
+            max_attempts (int): How many times a throttled call is sent before giving up.
+            **settings: Keyword arguments of `AdaptiveRateLimiter` (e.g., rate, max_rate).
+        """
+        if max_attempts is not None:
+            cls.max_attempts = max_attempts
+        cls._settings.update({name: value for name, value in settings.items() if value is not None})
+
+    @classmethod
+    def export_settings(cls) -> dict:
+        """Returns the settings given to `configure`, to configure the limiters of another process."""
+        return {"max_attempts": cls.max_attempts, **cls._settings}
+
+    @classmethod
+    def import_settings(cls, settings: dict) -> None:
+        """Applies settings returned by `export_settings` in another process."""
+        cls.configure(**settings)
+
+    @classmethod
+    def get(cls, service: str, region: str, account: str) -> AdaptiveRateLimiter:
+        """
+        Retrieves the limiter for a given service, region and account.
+
+        Args:
+            service (str): The AWS API the calls are sent to (e.g., 'ec2', 'resourcegroupstaggingapi').
+            region (str): The AWS region, or None for global APIs.
+            account (str): The AWS account ID, or None if unknown.
+
+        Returns:
+            AdaptiveRateLimiter: The limiter shared by all the calls to that API, region and account.
+        """
+        key = (service, region, account)
+        limiter = cls._limiters.get(key)
+        if limiter:
+            return limiter
+
+        with cls._lock:
+            if key not in cls._limiters:
+                cls._limiters[key] = AdaptiveRateLimiter(**cls._settings)
+            return cls._limiters[key]
+
+    @classmethod
+    def backoff(cls, attempt: int) -> float:
+        """
+        Returns the delay before sending a throttled call again ("full jitter" exponential backoff).
+
+        Args:
+            attempt (int): The number of attempts already made, starting at 1.
+
+        Returns:
+            float: The number of seconds to wait.
+        """
+        return random.uniform(0, min(cls.backoff_cap, cls.backoff_base * 2 ** attempt))
@@ -0,0 +1,166 @@
+import math
+import time
+from collections import deque
+
+from utils.batching import TagBatch
+from utils.concurrency import ConcurrencyLimits
+
+
+class WorkQueue:
+    """
+    The batches waiting to be tagged for one (service, region, account), and their statistics.
+
+    Attributes:
+        key (tuple): The (service, region, account) of the batches.
+        batches (deque): The batches waiting to be dispatched, oldest first.
+        queued (int): The number of resources waiting in `batches`.
+        max_queued (int): The highest number of resources that waited at the same time.
+        in_flight (int): The number of batches being tagged.
+        completed (int): The number of resources whose batch is finished.
+        calls (int): The number of finished batches.
+        started (float): When the first batch was dispatched (monotonic clock), or None.
+        finished (float): When the last batch finished (monotonic clock), or None.
+    """
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.batches = deque()
+        self.queued = 0
+        self.max_queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.calls = 0
+        self.started = None
+        self.finished = None
+
+    @property
+    def throughput(self) -> float:
+        """The number of resources tagged per second since the first batch was dispatched."""
+        if self.started is None or self.finished is None or self.finished <= self.started:
+            return 0.0
+        return self.completed / (self.finished - self.started)
+
+
+class WorkScheduler:
+    """
+    Groups batches into per-(service, region, account) queues and decides which one runs next.
+
+    Input files list resources in arbitrary order, but AWS applies rate limits, and tagging
+    clients keep their connections, per service, region and account. Batches are therefore
+    queued per (service, region, account), and queues are drained in round-robin order, one
+    batch per turn, so every queue makes progress whatever the order of the input.
+
+    The queues of a (service, region) never have more than `limits` batches in flight together,
+    whatever the number of accounts they are spread over. While several queues have
+    work, a queue is also held to its fair share of the workers (the workers divided by the
+    number of queues with work), so a slow or throttled API, whose calls hold their worker
+    longer, cannot end up holding all of them. Workers a queue leaves unused go to the others.
+
+    The scheduler is not thread-safe: callers must serialize `put`, `next` and `done`.
+
+    Attributes:
+        workers (int): The maximum number of batches in flight across every queue.
+        limits (ConcurrencyLimits): The maximum number of batches in flight for each (service, region).
+        queues (dict): The `WorkQueue` of every (service, region, account) seen so far.
+        pending (int): The number of batches waiting in the queues.
+        running (int): The number of batches in flight.
+    """
+
+    def __init__(self, workers: int = 1, limits: ConcurrencyLimits = None):
+        self.workers = max(1, workers)
+        self.limits = limits or ConcurrencyLimits()
+        self.queues = {}
+        self.pending = 0
+        self.running = 0
+        self._ring = deque()  # Keys of the queues holding batches, in round-robin order
+        self._limits = {}  # Limit of every (service, region), shared by the queues of all its accounts
+        self._in_flight = {}  # Batches in flight for every (service, region), across all its accounts
+
+    @property
+    def idle(self) -> bool:
+        """Whether every batch put in the scheduler is finished."""
+        return self.pending == 0 and self.running == 0
+
+    def put(self, batch: TagBatch) -> None:
+        """Adds a batch to the queue of its service, region and account."""
+        key = (batch.service, batch.region, batch.account)
+        queue = self.queues.get(key)
+        if queue is None:
+            queue = self.queues[key] = WorkQueue(key)
+        pool = (batch.service, batch.region)
+        if pool not in self._limits:
+            self._limits[pool] = self.limits.get(batch.service, batch.region)
+            self._in_flight[pool] = 0
+        if not queue.batches:
+            self._ring.append(key)
+        queue.batches.append(batch)
+        queue.queued += len(batch.arns)
+        queue.max_queued = max(queue.max_queued, queue.queued)
+        self.pending += 1
+
+    def next(self) -> TagBatch:
+        """
+        Takes the next batch to tag, and counts it as in flight until `done` is called.
+
+        Returns:
+            TagBatch: The batch, or None if no batch can be dispatched right now.
+        """
+        if not self._ring or self.running >= self.workers:
+            return None
+
+        active = sum(1 for queue in self.queues.values() if queue.batches or queue.in_flight)
+        fair_share = math.ceil(self.workers / active)
+        # Favor the queues below their fair share, then hand the remaining workers to any queue.
+        for share in (fair_share, None):
+            for _ in range(len(self._ring)):
+                key = self._ring[0]
+                self._ring.rotate(-1)
+                queue = self.queues[key]
+                pool = key[:2]
+                limit = self._limits[pool]
+                if limit is not None and self._in_flight[pool] >= limit:
+                    continue
+                if share is not None and queue.in_flight >= share:
+                    continue
+                return self._dispatch(queue)
+        return None
+
+    def _dispatch(self, queue: WorkQueue) -> TagBatch:
+        batch = queue.batches.popleft()
+        if not queue.batches:
+            # The ring was rotated past the key, so it is now the last one.
+            self._ring.pop()
+        queue.queued -= len(batch.arns)
+        queue.in_flight += 1
+        self._in_flight[queue.key[:2]] += 1
+        if queue.started is None:
+            queue.started = time.monotonic()
+        self.pending -= 1
+        self.running += 1
+        return batch
+
+    def done(self, batch: TagBatch) -> None:
+        """Records that a batch returned by `next` is finished."""
+        queue = self.queues[(batch.service, batch.region, batch.account)]
+        queue.in_flight -= 1
+        self._in_flight[queue.key[:2]] -= 1
+        queue.completed += len(batch.arns)
+        queue.calls += 1
+        queue.finished = time.monotonic()
+        self.running -= 1
+
+    def report(self) -> list:
+        """
+        Describes the depth and throughput of every queue, busiest first.
+
+        Returns:
+            list: One line of text per queue.
+        """
+        lines = []
+        for queue in sorted(self.queues.values(), key=lambda q: q.completed + q.queued, reverse=True):
+            service, region, account = queue.key
+            lines.append(
+                f"{service} {region or 'global'} {account or '-'}: {queue.completed} resources in {queue.calls} "
+                f"batches ({queue.throughput:.1f}/s), {queue.queued} queued, peak depth {queue.max_queued}"
+            )
+        return lines
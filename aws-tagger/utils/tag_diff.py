@@ -0,0 +1,104 @@
+from utils.arn_parser import AWSArnParser
+from utils.inventory import TagInventory
+from utils.tag_formatter import adapt_tags
+
+
+def needs_tagging(current: dict, tags: dict) -> bool:
+    """
+    Returns whether a resource is missing any of the requested tags or has a different value.
+
+    Args:
+        current (dict): The current tag keys and values of the resource, or None if unknown.
+        tags (dict): The requested tag keys and values.
+
+    Returns:
+        bool: True if a write is needed to apply the requested tags.
+    """
+    if current is None:
+        return True
+    return any(current.get(key) != value for key, value in tags.items())
+
+
+class TagDiff:
+    """
+    Filters a stream of ARNs down to the resources whose tags differ from the requested ones.
+
+    ARNs are buffered per region and account and their current tags are read in bulk, so only
+    a read call per `batch_size` resources is sent instead of a write per resource. Resources whose
+    tags cannot be read (e.g., global resources whose ARN has no region, or failed reads)
+    are always kept.
+
+    When the `TagInventory` is enabled, the tags it holds for a resource are used instead of
+    reading them, so resources known to be up to date are skipped without any call, and
+    global resources tagged by a previous run are skipped too.
+
+    Attributes:
+        read_tags (callable): Receives a region, a list of ARNs of that region and their account,
+            and returns a dictionary mapping the ARNs to their current tag keys and values.
+        batch_size (int): The number of ARNs buffered per region and account before their tags are read.
+        checked (int): The number of resources whose tags were compared.
+        skipped (int): The number of resources already carrying the requested tags.
+        cached (int): The number of resources compared with their tags in the inventory.
+    """
+
+    def __init__(self, read_tags: callable, batch_size: int = 100):
+        self.read_tags = read_tags
+        self.batch_size = batch_size
+        self.checked = 0
+        self.skipped = 0
+        self.cached = 0
+
+    def filter(self, resources, tags: list, on_skip: callable = None):
+        """
+        Yields the ARNs that still need to be tagged.
+
+        Args:
+            resources (Iterable[str | ParsedArn]): The AWS resource ARNs.
+            tags (list): A list of key-value pairs representing the tags to be applied.
+            on_skip (callable): Called with the number of resources skipped after each read.
+
+        Yields:
+            ParsedArn: The ARNs of the resources missing a tag or having a different value.
+        """
+        desired = adapt_tags(tags)
+        buffers = {}
+        for arn in resources:
+            arn = AWSArnParser.parse(arn)
+            if not arn.region and not TagInventory.enabled:
+                yield arn
+                continue
+
+            key = (arn.region, arn.account_id)
+            buffer = buffers.setdefault(key, [])
+            buffer.append(arn)
+            if len(buffer) >= self.batch_size:
+                yield from self._diff(key, buffer, desired, on_skip)
+                buffers[key] = []
+
+        for key, buffer in buffers.items():
+            if buffer:
+                yield from self._diff(key, buffer, desired, on_skip)
+
+    def _diff(self, key: tuple, arns: list, desired: dict, on_skip: callable):
+        region, account = key
+        current = TagInventory.lookup(arns)
+        self.cached += len(current)
+        unknown = [arn for arn in arns if arn.arn not in current]
+        if not region:
+            # Global resources cannot be read in bulk; only the cached ones are compared.
+            yield from unknown
+            arns = [arn for arn in arns if arn.arn in current]
+        elif unknown:
+            try:
+                current.update(self.read_tags(region, unknown, account))
+            except Exception as e:
+                print(f"Error reading the tags of {len(unknown)} resources in {region}: {e}")
+                yield from unknown
+                arns = [arn for arn in arns if arn.arn in current]
+
+        pending = [arn for arn in arns if needs_tagging(current.get(arn.arn), desired)]
+        self.checked += len(arns)
+        self.skipped += len(arns) - len(pending)
+        if on_skip and len(arns) > len(pending):
+            on_skip(len(arns) - len(pending))
+        yield from pending
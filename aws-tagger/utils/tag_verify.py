@@ -0,0 +1,151 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.arn_parser import AWSArnParser
+from utils.pipeline import pool_map
+from utils.tag_formatter import adapt_tags
+
+# Number of mismatched resources printed by `TagVerifier.report`
+MAX_REPORTED = 20
+
+
+def tag_mismatches(current: dict, tags: dict) -> dict:
+    """
+    Returns the requested tags a resource is missing or has a different value for.
+
+    Args:
+        current (dict): The current tag keys and values of the resource.
+        tags (dict): The requested tag keys and values.
+
+    Returns:
+        dict: The current value of every mismatched key, or None for missing keys.
+    """
+    return {key: current.get(key) for key, value in tags.items() if current.get(key) != value}
+
+
+class TagVerifier:
+    """
+    Reads back the tags of resources in bulk and finds the ones not carrying the requested tags.
+
+    A tagging call may succeed without the tags ending up on the resource (e.g., a tagger
+    catching its own errors, or a tag removed by a policy right after), so the tags of the
+    resources are read again with `get_resources`, 100 ARNs per call. Calls are spread over
+    `workers` threads, taking the (region, account) groups in turn so every region is read
+    in parallel from the start.
+
+    Global resources, whose ARN has no region, cannot be read in bulk, and resources whose
+    read failed are listed in `unverified`.
+
+    Attributes:
+        read_tags (callable): Receives a region, a list of ARNs of that region and their account,
+            and returns a dictionary mapping the ARNs to their current tag keys and values.
+        workers (int): The number of read calls sent at the same time.
+        batch_size (int): The number of ARNs read per call.
+        tags (dict): The requested tag keys and values of the last verification.
+        verified (int): The number of resources whose tags were read.
+        mismatches (dict): The current value of every mismatched key (None if missing), keyed by ARN string.
+        unverified (list): The ARN strings of the resources whose tags could not be read.
+    """
+
+    def __init__(self, read_tags: callable, workers: int = 8, batch_size: int = 100):
+        self.read_tags = read_tags
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.tags = {}
+        self.verified = 0
+        self.mismatches = {}
+        self.unverified = []
+
+    def verify(self, resources, tags: list, on_verify: callable = None) -> dict:
+        """
+        Reads the tags of resources and compares them with the requested tags.
+
+        Args:
+            resources (Iterable[str | ParsedArn]): The AWS resource ARNs. Duplicates are read once.
+            tags (list): A list of key-value pairs representing the tags that should be applied.
+            on_verify (callable): Called with the number of resources of every call, or of every
+                resource that cannot be verified, as they are done.
+
+        Returns:
+            dict: The mismatched keys of the resources missing a requested tag or having a different
+                value, keyed by ARN string. See `mismatches`.
+        """
+        self.tags = adapt_tags(tags)
+        groups = {}
+        seen = set()
+        for arn in resources:
+            arn = AWSArnParser.parse(arn)
+            if arn.arn in seen:
+                continue
+            seen.add(arn.arn)
+            if not arn.region:
+                self.unverified.append(arn.arn)
+                if on_verify:
+                    on_verify(1)
+                continue
+            groups.setdefault((arn.region, arn.account_id), []).append(arn)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="verify") as pool:
+            reads = pool_map(pool, self._read, self._chunks(groups), window=self.workers * 2, ordered=False)
+            for (region, arns, _), (current, error) in reads:
+                if error is not None:
+                    print(f"Error reading the tags of {len(arns)} resources in {region}: {error}")
+                    self.unverified.extend(arn.arn for arn in arns)
+                else:
+                    for arn in arns:
+                        mismatched = tag_mismatches(current.get(arn.arn, {}), self.tags)
+                        if mismatched:
+                            self.mismatches[arn.arn] = mismatched
+                    self.verified += len(arns)
+                if on_verify:
+                    on_verify(len(arns))
+        return self.mismatches
+
+    def _chunks(self, groups: dict):
+        # Takes a chunk of every (region, account) in turn.
+        streams = [
+            [(region, arns[start:start + self.batch_size], account) for start in range(0, len(arns), self.batch_size)]
+            for (region, account), arns in groups.items()
+        ]
+        for index in range(max(map(len, streams), default=0)):
+            for stream in streams:
+                if index < len(stream):
+                    yield stream[index]
+
+    def _read(self, region: str, arns: list, account: str) -> tuple:
+        # Failed reads are returned rather than raised, so the other reads go on.
+        try:
+            return self.read_tags(region, arns, account), None
+        except Exception as e:
+            return None, e
+
+    def report(self, limit: int = MAX_REPORTED) -> list:
+        """
+        Describes the outcome of the verification.
+
+        Args:
+            limit (int): The maximum number of mismatched resources described one by one.
+
+        Returns:
+            list: Lines of text: the first mismatched resources, then a summary.
+        """
+        lines = []
+        for arn, mismatched in list(self.mismatches.items())[:limit]:
+            keys = [
+                f"{key} missing" if value is None else f"{key}={value!r} instead of {self.tags[key]!r}"
+                for key, value in mismatched.items()
+            ]
+            lines.append(f"{arn}: {', '.join(keys)}")
+        if len(self.mismatches) > limit:
+            lines.append(f"... and {len(self.mismatches) - limit} more resources")
+        lines.append(
+            f"Verified {self.verified} resources: {self.verified - len(self.mismatches)} carry the tags and "
+            f"{len(self.mismatches)} are missing a key or have a different value. {len(self.unverified)} could not "
+            f"be verified (global resources or failed reads)."
+        )
+        return lines
+
+    def write(self, path: str) -> None:
+        """Writes the mismatched keys of every resource and the unverified resources to a JSON file."""
+        with open(path, "w") as file:
+            json.dump({"mismatches": self.mismatches, "unverified": self.unverified}, file, indent=2)